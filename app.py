@@ -5,8 +5,11 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 from scipy import stats
+from dashboard_engine import (DatasetWatcher, FilterIndex, TableView, ExportStore, CorrelationEngine,
+                              EXPORT_FORMATS, available_export_formats, binned_histogram, source_version)
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -60,19 +63,131 @@ st.markdown("""
 st.markdown('<h1 class="main-header">🌍 Africa Disaster Events Analysis Dashboard</h1>', unsafe_allow_html=True)
 
 # Load data
-@st.cache_data
-def load_data():
-    """Load disaster data"""
-    try:
-        df = pd.read_csv('Book1.csv')
-        return df
-    except FileNotFoundError:
-        st.error("⚠️ Data file 'Book1.csv' not found!")
-        return None
+DATA_FILE = 'Book1.csv'
 
-df = load_data()
+# Pages read only the columns they use from a shared column store: most pages are
+# served by the aggregate cube, and wide text columns (Location, Geo Locations,
+# Event Name, ...) are only materialized by pages that display whole rows.
+# Rows appended to Book1.csv are folded into a new snapshot in the background, raw
+# like the rest of Book1 (the dashboard does not show preprocessed columns) but typed
+# by the ingestion contract; appends that break it are reported and not loaded;
+# each run serves one snapshot, and per-snapshot structures are keyed by its version.
+@st.cache_resource
+def load_watcher():
+    """Snapshot source shared by all sessions (hot-reloads appended rows)"""
+    return DatasetWatcher(DATA_FILE)
 
-if df is not None:
+@st.cache_resource(max_entries=2)
+def load_filter_index(data_version, _snapshot):
+    """Row index for the custom filtering panel (built once per data version)"""
+    return FilterIndex(_snapshot.store, _snapshot.cube.categorical_columns[:3])
+
+@st.cache_resource(max_entries=2)
+def load_table_view(data_version, _snapshot):
+    """Paged, sortable view of the dataset (sort orders cached per column)"""
+    return TableView(_snapshot.store)
+
+@st.cache_resource(max_entries=2)
+def load_export_store(data_version, _snapshot):
+    """Export files, generated on first download and kept per format and column selection"""
+    return ExportStore(_snapshot.store)
+
+@st.cache_resource(max_entries=2)
+def load_correlations(data_version, _snapshot):
+    """Correlation matrices of all numeric columns, computed once per method"""
+    return CorrelationEngine(_snapshot.store, _snapshot.cube.numeric_columns)
+
+@st.cache_data(max_entries=2)
+def year_histogram_json(data_version, _snapshot):
+    """Temporal page: events per year, binned from the cube's year counts (figure JSON)"""
+    year_counts = _snapshot.cube.counts('Year')
+    bins = binned_histogram(year_counts.index, bins=50, weights=year_counts.values)
+    fig = go.Figure(go.Bar(x=bins['Center'], y=bins['Count'], width=bins['Width'],
+                           marker_color='#667eea',
+                           customdata=bins[['Lower', 'Upper']],
+                           hovertemplate='Year %{customdata[0]:.0f}–%{customdata[1]:.0f}<br>Events: %{y}<extra></extra>'))
+    fig.update_layout(title='Distribution of Disaster Events', bargap=0, showlegend=False,
+                      xaxis_title='Year', yaxis_title='Number of Events')
+    return fig.to_json()
+
+@st.cache_data(max_entries=2)
+def impact_histograms_json(data_version, impact_cols, _snapshot):
+    """Impact page: log10 distributions binned server-side (figure JSON)"""
+    df = _snapshot.store[list(impact_cols)]
+    fig = make_subplots(rows=2, cols=2,
+                      subplot_titles=[f'{col} Distribution' for col in impact_cols[:4]])
+    
+    colors = ['crimson', 'orange', 'purple', 'green']
+    
+    for idx, col in enumerate(impact_cols[:4]):
+        row = (idx // 2) + 1
+        col_pos = (idx % 2) + 1
+        
+        data = df[col].dropna()
+        data_log = np.log10(data[data > 0] + 1)
+        bins = binned_histogram(data_log, bins=50)
+        
+        fig.add_trace(
+            go.Bar(x=bins['Center'], y=bins['Count'], width=bins['Width'],
+                   marker_color=colors[idx],
+                   opacity=0.7,
+                   name=col),
+            row=row, col=col_pos
+        )
+        
+        fig.update_xaxes(title_text=f"Log10({col} + 1)", row=row, col=col_pos)
+        fig.update_yaxes(title_text="Frequency", row=row, col=col_pos)
+    
+    fig.update_layout(height=700, showlegend=False, template='plotly_white', bargap=0)
+    return fig.to_json()
+
+def lazy_download_button(label, build, file_name, mime, key):
+    """
+    Download button whose file is only generated once the user asks for it
+    (a "prepare" click first; callable download data needs a newer Streamlit than we pin)
+    """
+    prepared = st.session_state.setdefault("prepared_exports", set())
+    if key not in prepared:
+        if not st.button(f"⚙️ Prepare {label}", key=f"{key}_prepare"):
+            return
+        prepared.add(key)
+    st.download_button(label=f"📥 Download {label}", data=build(), file_name=file_name, mime=mime, key=key)
+
+def paginated_table(view, key, positions=None, columns=None, page_size=10):
+    """Show one page of rows with server-side sorting; only that page is sent to the browser"""
+    total = view.n_rows if positions is None else len(positions)
+    sort_options = ['(original order)'] + (columns if columns is not None else list(view.df.columns))
+    
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
+    with col1:
+        sort_by = st.selectbox("Sort by", sort_options, key=f"{key}_sort")
+    with col2:
+        ascending = st.radio("Order", ["Ascending", "Descending"], horizontal=True, key=f"{key}_order") == "Ascending"
+    with col3:
+        page_size = st.selectbox("Rows per page", [10, 25, 50, 100],
+                                 index=[10, 25, 50, 100].index(page_size), key=f"{key}_size")
+    n_pages = max(1, -(-total // page_size))
+    with col4:
+        page = st.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, value=1, key=f"{key}_page")
+    
+    rows = view.page(positions, page - 1, page_size,
+                     sort_by=None if sort_by == sort_options[0] else sort_by,
+                     ascending=ascending, columns=columns)
+    st.dataframe(rows, use_container_width=True)
+    first = (page - 1) * page_size + 1 if total else 0
+    st.caption(f"Rows {first:,}–{min(page * page_size, total):,} of {total:,}")
+
+if source_version(DATA_FILE) is not None:
+    watcher = load_watcher()
+    snapshot = watcher.poll()
+    data_version, store, cube = snapshot.version, snapshot.store, snapshot.cube
+else:
+    st.error("⚠️ Data file 'Book1.csv' not found!")
+    store = None
+
+if store is not None:
+    first_year, last_year = cube.year_range
+    
     # Sidebar
     st.sidebar.image("https://img.icons8.com/clouds/200/000000/earthquake.png", width=150)
     st.sidebar.title("📊 Dashboard Navigation")
@@ -92,9 +207,13 @@ if df is not None:
     )
     
     st.sidebar.markdown("---")
-    st.sidebar.markdown(f"**Total Records:** {len(df):,}")
-    st.sidebar.markdown(f"**Features:** {len(df.columns)}")
-    st.sidebar.markdown(f"**Time Period:** {int(df['Year'].min())} - {int(df['Year'].max())}")
+    st.sidebar.markdown(f"**Total Records:** {cube.n_rows:,}")
+    if snapshot.n_appended:
+        st.sidebar.caption(f"🔄 {snapshot.n_appended:,} records added since startup")
+    if watcher.error is not None:
+        st.sidebar.warning(f"⚠️ New rows in Book1.csv were not loaded: {watcher.error}")
+    st.sidebar.markdown(f"**Features:** {len(cube.columns)}")
+    st.sidebar.markdown(f"**Time Period:** {first_year} - {last_year}")
     
     # =================== OVERVIEW PAGE ===================
     if page == "🏠 Overview":
@@ -104,23 +223,23 @@ if df is not None:
         col1, col2, col3, col4 = st.columns(4)
         with col1:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("📝 Total Events", f"{len(df):,}")
+            st.metric("📝 Total Events", f"{cube.n_rows:,}")
             st.markdown('</div>', unsafe_allow_html=True)
         with col2:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("🌍 Countries", f"{df['Country'].nunique():,}")
+            st.metric("🌍 Countries", f"{cube.nunique('Country'):,}")
             st.markdown('</div>', unsafe_allow_html=True)
         with col3:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("📊 Features", len(df.columns))
+            st.metric("📊 Features", len(cube.columns))
             st.markdown('</div>', unsafe_allow_html=True)
         with col4:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("📅 Years Covered", f"{int(df['Year'].max() - df['Year'].min())}")
+            st.metric("📅 Years Covered", f"{last_year - first_year}")
             st.markdown('</div>', unsafe_allow_html=True)
         
         st.markdown("### 📊 Dataset Preview")
-        st.dataframe(df.head(10), use_container_width=True)
+        paginated_table(load_table_view(data_version, snapshot), key="overview_preview")
         
         # Dataset information
         col1, col2 = st.columns(2)
@@ -128,20 +247,20 @@ if df is not None:
         with col1:
             st.markdown("### 📋 Dataset Information")
             col_info = pd.DataFrame({
-                'Column': df.columns,
-                'Data Type': [str(dtype) for dtype in df.dtypes.values],
-                'Non-Null': df.count().values,
-                'Null %': (df.isnull().sum() / len(df) * 100).round(2).values
+                'Column': cube.profile['Column'],
+                'Data Type': cube.profile['Data Type'],
+                'Non-Null': cube.profile['Non-Null'],
+                'Null %': (cube.profile['Missing'] / cube.n_rows * 100).round(2)
             })
             st.dataframe(col_info, use_container_width=True, height=400)
         
         with col2:
             st.markdown("### 📊 Data Type Distribution")
-            dtype_counts = df.dtypes.value_counts()
+            dtype_counts = cube.profile['Data Type'].value_counts()
             
             # Convert dtype to string for proper display
             dtype_df = pd.DataFrame({
-                'Data Type': [str(dtype) for dtype in dtype_counts.index],
+                'Data Type': dtype_counts.index,
                 'Count': dtype_counts.values
             })
             
@@ -152,9 +271,9 @@ if df is not None:
             st.plotly_chart(fig, use_container_width=True)
             
             st.markdown("### 📈 Quick Statistics")
-            st.write(f"**Numeric Columns:** {len(df.select_dtypes(include=[np.number]).columns)}")
-            st.write(f"**Categorical Columns:** {len(df.select_dtypes(include=['object']).columns)}")
-            st.write(f"**Memory Usage:** {df.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
+            st.write(f"**Numeric Columns:** {len(cube.numeric_columns)}")
+            st.write(f"**Categorical Columns:** {len(cube.categorical_columns)}")
+            st.write(f"**Memory Usage:** {cube.memory_bytes / 1024**2:.2f} MB")
     
     # =================== DATA QUALITY PAGE ===================
     elif page == "📁 Data Quality":
@@ -163,12 +282,8 @@ if df is not None:
         # Missing values analysis
         st.markdown("### 🔍 Missing Values Analysis")
         
-        missing_data = pd.DataFrame({
-            'Column': df.columns,
-            'Missing_Count': df.isnull().sum(),
-            'Missing_Percentage': (df.isnull().sum() / len(df)) * 100,
-            'Data_Type': [str(dtype) for dtype in df.dtypes]
-        })
+        missing_data = cube.missing
+        total_missing = int(missing_data['Missing_Count'].sum())
         
         missing_data = missing_data[missing_data['Missing_Count'] > 0].sort_values(
             'Missing_Percentage', ascending=False
@@ -178,7 +293,7 @@ if df is not None:
         
         with col1:
             if len(missing_data) > 0:
-                st.markdown(f"**Columns with Missing Values:** {len(missing_data)} out of {len(df.columns)}")
+                st.markdown(f"**Columns with Missing Values:** {len(missing_data)} out of {len(cube.columns)}")
                 
                 # Visualize missing data
                 top_missing = missing_data.head(20)
@@ -202,15 +317,15 @@ if df is not None:
             
         # Completeness score
         st.markdown("### 📈 Data Completeness Score")
-        completeness = (1 - df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100
+        completeness = (1 - total_missing / (cube.n_rows * len(cube.columns))) * 100
         
         col1, col2, col3 = st.columns(3)
         with col1:
             st.metric("Overall Completeness", f"{completeness:.2f}%")
         with col2:
-            st.metric("Total Missing Values", f"{df.isnull().sum().sum():,}")
+            st.metric("Total Missing Values", f"{total_missing:,}")
         with col3:
-            st.metric("Complete Rows", f"{df.dropna().shape[0]:,}")
+            st.metric("Complete Rows", f"{cube.complete_rows:,}")
     
     # =================== TEMPORAL ANALYSIS PAGE ===================
     elif page == "📊 Temporal Analysis":
@@ -219,17 +334,13 @@ if df is not None:
         # Disaster trend over time
         st.markdown("### 📈 Disaster Events Over Time")
         
-        yearly_counts = df['Year'].value_counts().sort_index().reset_index()
+        yearly_counts = cube.counts('Year').sort_index().reset_index()
         yearly_counts.columns = ['Year', 'Count']
         
         col1, col2 = st.columns(2)
         
         with col1:
-            fig = px.histogram(df, x='Year', nbins=50,
-                             title='Distribution of Disaster Events',
-                             labels={'Year': 'Year', 'count': 'Number of Events'},
-                             color_discrete_sequence=['#667eea'])
-            fig.update_layout(showlegend=False)
+            fig = pio.from_json(year_histogram_json(data_version, snapshot))
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
@@ -245,18 +356,18 @@ if df is not None:
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Start Year", int(df['Year'].min()))
+            st.metric("Start Year", first_year)
         with col2:
-            st.metric("End Year", int(df['Year'].max()))
+            st.metric("End Year", last_year)
         with col3:
             st.metric("Peak Year", int(yearly_counts.loc[yearly_counts['Count'].idxmax(), 'Year']))
         with col4:
             st.metric("Max Events/Year", int(yearly_counts['Count'].max()))
         
         # Monthly analysis if available
-        if 'Start Month' in df.columns:
+        if 'Start Month' in cube.dimensions:
             st.markdown("### 📅 Monthly Distribution")
-            monthly_counts = df['Start Month'].value_counts().sort_index()
+            monthly_counts = cube.counts('Start Month').sort_index()
             month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
                           'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
             
@@ -275,10 +386,10 @@ if df is not None:
         st.header("🌍 Geographic Distribution Analysis")
         
         # Continent analysis
-        if 'Continent' in df.columns:
+        if 'Continent' in cube.dimensions:
             st.markdown("### 🗺️ Disasters by Continent")
             
-            continent_counts = df['Continent'].value_counts().reset_index()
+            continent_counts = cube.counts('Continent').reset_index()
             continent_counts.columns = ['Continent', 'Count']
             
             col1, col2 = st.columns(2)
@@ -300,7 +411,7 @@ if df is not None:
         # Country analysis
         st.markdown("### 🌏 Top Countries by Disaster Events")
         
-        country_counts = df['Country'].value_counts().head(20).reset_index()
+        country_counts = cube.counts('Country').head(20).reset_index()
         country_counts.columns = ['Country', 'Count']
         
         fig = px.bar(country_counts, x='Count', y='Country',
@@ -316,10 +427,10 @@ if df is not None:
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.metric("Total Countries", df['Country'].nunique())
+            st.metric("Total Countries", cube.nunique('Country'))
         with col2:
-            if 'Continent' in df.columns:
-                st.metric("Total Continents", df['Continent'].nunique())
+            if 'Continent' in cube.dimensions:
+                st.metric("Total Continents", cube.nunique('Continent'))
         with col3:
             st.metric("Most Affected Country", country_counts.iloc[0]['Country'])
     
@@ -328,10 +439,10 @@ if df is not None:
         st.header("💥 Disaster Type Analysis")
         
         # Disaster type distribution
-        if 'Disaster Type' in df.columns:
+        if 'Disaster Type' in cube.dimensions:
             st.markdown("### 📊 Distribution by Disaster Type")
             
-            disaster_counts = df['Disaster Type'].value_counts().reset_index()
+            disaster_counts = cube.counts('Disaster Type').reset_index()
             disaster_counts.columns = ['Disaster Type', 'Count']
             
             col1, col2 = st.columns(2)
@@ -351,10 +462,10 @@ if df is not None:
                 st.plotly_chart(fig, use_container_width=True)
         
         # Disaster subtype
-        if 'Disaster Subtype' in df.columns:
+        if 'Disaster Subtype' in cube.dimensions:
             st.markdown("### 🔍 Top Disaster Subtypes")
             
-            subtype_counts = df['Disaster Subtype'].value_counts().head(15).reset_index()
+            subtype_counts = cube.counts('Disaster Subtype').head(15).reset_index()
             subtype_counts.columns = ['Disaster Subtype', 'Count']
             
             fig = px.bar(subtype_counts, x='Count', y='Disaster Subtype',
@@ -367,7 +478,7 @@ if df is not None:
         
         # Disaster type statistics
         st.markdown("### 📊 Disaster Type Statistics")
-        if 'Disaster Type' in df.columns:
+        if 'Disaster Type' in cube.dimensions:
             st.dataframe(disaster_counts, use_container_width=True)
     
     # =================== IMPACT ANALYSIS PAGE ===================
@@ -376,7 +487,7 @@ if df is not None:
         
         # Impact metrics
         impact_cols = ['Total Deaths', 'No Injured', 'No Affected', 'Total Damages (\'000 US$)']
-        available_impact_cols = [col for col in impact_cols if col in df.columns]
+        available_impact_cols = [col for col in impact_cols if col in cube.metrics]
         
         if available_impact_cols:
             st.markdown("### 💔 Human and Economic Impact Overview")
@@ -384,7 +495,7 @@ if df is not None:
             cols = st.columns(len(available_impact_cols))
             for i, col in enumerate(available_impact_cols):
                 with cols[i]:
-                    total = df[col].sum()
+                    total = cube.total(col)
                     if 'Damages' in col:
                         st.metric(col.replace('(\'000 US$)', ''), f"${total/1e6:.1f}B")
                     else:
@@ -393,42 +504,19 @@ if df is not None:
             # Distribution plots
             st.markdown("### 📊 Impact Distribution (Log Scale)")
             
-            fig = make_subplots(rows=2, cols=2,
-                              subplot_titles=[f'{col} Distribution' for col in available_impact_cols[:4]])
-            
-            colors = ['crimson', 'orange', 'purple', 'green']
-            
-            for idx, col in enumerate(available_impact_cols[:4]):
-                row = (idx // 2) + 1
-                col_pos = (idx % 2) + 1
-                
-                data = df[col].dropna()
-                data_log = np.log10(data[data > 0] + 1)
-                
-                fig.add_trace(
-                    go.Histogram(x=data_log, nbinsx=50, 
-                               marker_color=colors[idx],
-                               opacity=0.7,
-                               name=col),
-                    row=row, col=col_pos
-                )
-                
-                fig.update_xaxes(title_text=f"Log10({col} + 1)", row=row, col=col_pos)
-                fig.update_yaxes(title_text="Frequency", row=row, col=col_pos)
-            
-            fig.update_layout(height=700, showlegend=False, template='plotly_white')
+            fig = pio.from_json(impact_histograms_json(data_version, tuple(available_impact_cols), snapshot))
             st.plotly_chart(fig, use_container_width=True)
             
             # Statistics table
             st.markdown("### 📊 Impact Statistics")
-            st.dataframe(df[available_impact_cols].describe().T, use_container_width=True)
+            st.dataframe(cube.impact_stats.loc[available_impact_cols], use_container_width=True)
             
             # Top disasters by impact
             st.markdown("### 🔝 Most Devastating Disasters")
             
             impact_metric = st.selectbox("Select impact metric:", available_impact_cols)
             
-            top_disasters = df.nlargest(10, impact_metric)[['Year', 'Country', 'Disaster Type', impact_metric]].reset_index(drop=True)
+            top_disasters = cube.top_events[impact_metric]
             st.dataframe(top_disasters, use_container_width=True)
     
     # =================== ADVANCED ANALYTICS PAGE ===================
@@ -438,7 +526,7 @@ if df is not None:
         # Correlation analysis
         st.markdown("### 📊 Correlation Analysis")
         
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+        numeric_cols = cube.numeric_columns
         
         if len(numeric_cols) > 1:
             # Select columns for correlation
@@ -448,8 +536,11 @@ if df is not None:
                 default=numeric_cols[:10] if len(numeric_cols) > 10 else numeric_cols
             )
             
+            corr_method = st.radio("Method", ["Pearson", "Spearman", "Kendall"], horizontal=True).lower()
+            
             if len(selected_cols) > 1:
-                corr_matrix = df[selected_cols].corr()
+                correlations = load_correlations(data_version, snapshot)
+                corr_matrix = correlations.select(selected_cols, corr_method)
                 
                 fig = px.imshow(corr_matrix,
                               text_auto='.2f',
@@ -462,18 +553,10 @@ if df is not None:
                 
                 # Strong correlations
                 st.markdown("### 🔗 Strong Correlations (|r| > 0.5)")
-                strong_corr = []
-                for i in range(len(corr_matrix.columns)):
-                    for j in range(i+1, len(corr_matrix.columns)):
-                        if abs(corr_matrix.iloc[i, j]) > 0.5:
-                            strong_corr.append({
-                                'Feature 1': corr_matrix.columns[i],
-                                'Feature 2': corr_matrix.columns[j],
-                                'Correlation': corr_matrix.iloc[i, j]
-                            })
+                strong_corr = correlations.strong_pairs(selected_cols, 0.5, corr_method)
                 
-                if strong_corr:
-                    st.dataframe(pd.DataFrame(strong_corr), use_container_width=True)
+                if len(strong_corr) > 0:
+                    st.dataframe(strong_corr, use_container_width=True)
                 else:
                     st.info("No strong correlations found")
         
@@ -484,34 +567,30 @@ if df is not None:
             filter_cols = {}
             
             # Year range filter
-            if 'Year' in df.columns:
+            if 'Year' in cube.columns:
                 year_range = st.slider("Year Range", 
-                                      int(df['Year'].min()), 
-                                      int(df['Year'].max()),
-                                      (int(df['Year'].min()), int(df['Year'].max())))
+                                      first_year, 
+                                      last_year,
+                                      (first_year, last_year))
                 filter_cols['Year'] = year_range
             
             # Categorical filters
-            categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
-            for col in categorical_cols[:3]:
-                unique_vals = df[col].dropna().unique().tolist()[:20]
+            filter_index = load_filter_index(data_version, snapshot)
+            for col in filter_index.columns:
+                unique_vals = filter_index.values[col][:20]
                 if len(unique_vals) > 0:
                     selected = st.multiselect(f"Select {col}", unique_vals, default=unique_vals)
                     filter_cols[col] = selected
         
-        # Apply filters
-        filtered_df = df.copy()
-        
-        if 'Year' in filter_cols:
-            filtered_df = filtered_df[(filtered_df['Year'] >= filter_cols['Year'][0]) & 
-                                     (filtered_df['Year'] <= filter_cols['Year'][1])]
-        
-        for col, vals in filter_cols.items():
-            if col != 'Year' and isinstance(vals, list):
-                filtered_df = filtered_df[filtered_df[col].isin(vals)]
+        # Apply filters (per-value row positions, memoized per filter combination)
+        filtered_positions = filter_index.positions(
+            filter_cols.get('Year'),
+            {col: vals for col, vals in filter_cols.items() if col != 'Year'}
+        )
         
-        st.success(f"✅ Filtered dataset: **{len(filtered_df):,}** rows (from {len(df):,})")
-        st.dataframe(filtered_df.head(20), use_container_width=True)
+        st.success(f"✅ Filtered dataset: **{len(filtered_positions):,}** rows (from {cube.n_rows:,})")
+        paginated_table(load_table_view(data_version, snapshot), key="filtered_preview",
+                        positions=filtered_positions, page_size=25)
     
     # =================== DATA EXPORT PAGE ===================
     elif page == "📥 Data Export":
@@ -519,23 +598,27 @@ if df is not None:
         
         st.markdown("### 💾 Export Options")
         
+        export_store = load_export_store(data_version, snapshot)
+        export_format = st.radio("File format", available_export_formats(), horizontal=True)
+        extension, mime = EXPORT_FORMATS[export_format]
+        
         # Export full dataset
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("#### 📊 Export Full Dataset")
-            csv_full = df.to_csv(index=False)
-            st.download_button(
-                label="📥 Download Full Dataset (CSV)",
-                data=csv_full,
-                file_name="disaster_data_full.csv",
-                mime="text/csv"
+            # The file is only generated once "Prepare" is clicked (then kept by the export store)
+            lazy_download_button(
+                f"Full Dataset ({export_format})",
+                lambda: export_store.artifact(export_format),
+                file_name=f"disaster_data_full{extension}",
+                mime=mime,
+                key=f"export_full_{export_format}"
             )
         
         with col2:
             st.markdown("#### 📊 Export Summary Statistics")
-            summary = df.describe()
-            csv_summary = summary.to_csv()
+            csv_summary = cube.summary.to_csv()
             st.download_button(
                 label="📥 Download Summary Statistics (CSV)",
                 data=csv_summary,
@@ -548,22 +631,21 @@ if df is not None:
         
         export_cols = st.multiselect(
             "Select columns to export:",
-            df.columns.tolist(),
-            default=df.columns.tolist()[:5]
+            cube.columns,
+            default=cube.columns[:5]
         )
         
         if export_cols:
-            export_df = df[export_cols]
-            csv_custom = export_df.to_csv(index=False)
-            st.download_button(
-                label=f"📥 Download {len(export_cols)} Selected Columns (CSV)",
-                data=csv_custom,
-                file_name="disaster_data_custom.csv",
-                mime="text/csv"
+            lazy_download_button(
+                f"{len(export_cols)} Selected Columns ({export_format})",
+                lambda: export_store.artifact(export_format, export_cols),
+                file_name=f"disaster_data_custom{extension}",
+                mime=mime,
+                key=f"export_custom_{export_format}_{'|'.join(export_cols)}"
             )
             
             st.markdown("#### Preview")
-            st.dataframe(export_df.head(10), use_container_width=True)
+            paginated_table(load_table_view(data_version, snapshot), key="export_preview", columns=export_cols)
 
 else:
     # Error state
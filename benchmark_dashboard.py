@@ -0,0 +1,240 @@
+"""
+Dashboard Rerun Latency Benchmark
+=================================
+Runs app.py headlessly through Streamlit's testing harness on datasets scaled
+from Book1.csv and measures what each interaction costs: every sidebar page and
+representative widget states (correlation columns, year range, export columns).
+
+For each scenario it records rerun wall time (cold first run, then p50/p95 over
+repeated reruns), peak Python heap during a rerun (tracemalloc, one separate
+traced run) and the size of the serialized page payload (element protos).
+
+    python benchmark_dashboard.py --sizes 3000,30000,100000 --reruns 10 --save dashboard_latency.json
+
+Author: Graduation Project 2026
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(APP_DIR, 'app.py')
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from benchmark_preprocessing import write_synthetic_csv
+
+DEFAULT_SIZES = [3_000, 30_000, 100_000]
+
+PAGES = ["🏠 Overview", "📁 Data Quality", "📊 Temporal Analysis", "🌍 Geographic Analysis",
+         "💥 Disaster Types", "📈 Impact Analysis", "🔍 Advanced Analytics", "📥 Data Export"]
+
+CORRELATION_LABEL = "Select columns for correlation analysis:"
+YEAR_LABEL = "Year Range"
+EXPORT_LABEL = "Select columns to export:"
+
+
+# ============================================================================
+# PART 1: MEASUREMENT
+# ============================================================================
+
+def payload_bytes(node) -> int:
+    """Serialized size of every element in the rendered tree (what is sent to the browser)"""
+    size = 0
+    proto = getattr(node, 'proto', None)
+    if proto is not None and hasattr(proto, 'ByteSize'):
+        size += proto.ByteSize()
+    for child in getattr(node, 'children', {}).values():
+        size += payload_bytes(child)
+    return size
+
+
+def widget(at, kind: str, label: str):
+    """Widget of a kind ('multiselect', 'slider', ...) by its label"""
+    matches = [w for w in getattr(at, kind) if w.label == label]
+    if not matches:
+        raise LookupError(f"No {kind} labelled {label!r} on this page")
+    return matches[0]
+
+
+def measure(at, apply_state: Callable, reruns: int) -> dict:
+    """
+    Apply a widget state, then time the cold rerun and `reruns` warm reruns
+    The peak heap is taken on one extra traced rerun so tracing does not skew timings
+    """
+    apply_state(at)
+    start = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    samples = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    at.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'cold_ms': cold * 1000,
+        'p50_ms': float(np.percentile(samples, 50)) * 1000 if samples else None,
+        'p95_ms': float(np.percentile(samples, 95)) * 1000 if samples else None,
+        'peak_heap_mb': peak / 1024**2,
+        'payload_kb': payload_bytes(at._tree) / 1024,
+    }
+
+
+# ============================================================================
+# PART 2: SCENARIOS
+# ============================================================================
+
+def go_to(page: str) -> Callable:
+    def apply_state(at):
+        at.sidebar.radio[0].set_value(page)
+    return apply_state
+
+
+def set_widget(kind: str, label: str, choose: Callable) -> Callable:
+    """State change: set the widget to choose(widget) (e.g. a subset of its options)"""
+    def apply_state(at):
+        w = widget(at, kind, label)
+        w.set_value(choose(w))
+    return apply_state
+
+
+def widget_scenarios() -> List[Tuple[str, str, Callable]]:
+    """(name, page, state change) for representative widget states"""
+    return [
+        ("correlation: 3 columns", "🔍 Advanced Analytics",
+         set_widget('multiselect', CORRELATION_LABEL, lambda w: w.options[:3])),
+        ("correlation: 10 columns", "🔍 Advanced Analytics",
+         set_widget('multiselect', CORRELATION_LABEL, lambda w: w.options[:10])),
+        ("correlation: all columns", "🔍 Advanced Analytics",
+         set_widget('multiselect', CORRELATION_LABEL, lambda w: w.options)),
+        ("year range: full", "🔍 Advanced Analytics",
+         set_widget('slider', YEAR_LABEL, lambda w: (w.min, w.max))),
+        ("year range: last decade", "🔍 Advanced Analytics",
+         set_widget('slider', YEAR_LABEL, lambda w: (max(w.min, w.max - 10), w.max))),
+        ("year range: narrow", "🔍 Advanced Analytics",
+         set_widget('slider', YEAR_LABEL, lambda w: ((w.min + w.max) // 2, (w.min + w.max) // 2 + 2))),
+        ("export: 5 columns", "📥 Data Export",
+         set_widget('multiselect', EXPORT_LABEL, lambda w: w.options[:5])),
+        ("export: 15 columns", "📥 Data Export",
+         set_widget('multiselect', EXPORT_LABEL, lambda w: w.options[:15])),
+        ("export: all columns", "📥 Data Export",
+         set_widget('multiselect', EXPORT_LABEL, lambda w: w.options)),
+    ]
+
+
+def benchmark_dataset(data_dir: str, reruns: int) -> List[dict]:
+    """Run every scenario against the Book1.csv in data_dir"""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    # Resources are process-wide; start each dataset from empty caches
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+    results = []
+    cwd = os.getcwd()
+    os.chdir(data_dir)
+    try:
+        at = AppTest.from_file(APP_PATH, default_timeout=600)
+        start = time.perf_counter()
+        at.run()
+        results.append({'scenario': 'startup', 'page': PAGES[0],
+                        'cold_ms': (time.perf_counter() - start) * 1000, 'p50_ms': None, 'p95_ms': None,
+                        'peak_heap_mb': None, 'payload_kb': payload_bytes(at._tree) / 1024})
+
+        for page in PAGES:
+            result = measure(at, go_to(page), reruns)
+            results.append({'scenario': 'page', 'page': page, **result})
+
+        for name, page, apply_state in widget_scenarios():
+            at.sidebar.radio[0].set_value(page).run()
+            result = measure(at, apply_state, reruns)
+            results.append({'scenario': name, 'page': page, **result})
+    finally:
+        os.chdir(cwd)
+    return results
+
+
+def run_benchmarks(sizes: List[int], reruns: int = 10, template_path: str = 'Book1.csv', seed: int = 0) -> dict:
+    """Benchmark the dashboard on each dataset size"""
+    template = pd.read_csv(template_path, low_memory=False)
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'reruns': reruns,
+            'seed': seed,
+        },
+        'sizes': {},
+    }
+
+    for n_rows in sizes:
+        print(f"\n📦 {n_rows:,} rows")
+        with tempfile.TemporaryDirectory() as tmp:
+            write_synthetic_csv(template, os.path.join(tmp, 'Book1.csv'), n_rows, seed)
+            results = benchmark_dataset(tmp, reruns)
+        report['sizes'][str(n_rows)] = results
+        print_results(results)
+
+    return report
+
+
+def print_results(results: List[dict]):
+    """Latency table for one dataset"""
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else format('-', '>' + spec.split('.')[0])
+
+    print(f"  {'Scenario':<28} {'Page':<24} {'Cold ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'Heap MB':>8} {'Payload KB':>11}")
+    for row in results:
+        print(f"  {row['scenario']:<28} {row['page']:<24} {fmt(row['cold_ms'], '9.1f')} {fmt(row['p50_ms'], '9.1f')} "
+              f"{fmt(row['p95_ms'], '9.1f')} {fmt(row['peak_heap_mb'], '8.2f')} {fmt(row['payload_kb'], '11.1f')}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark dashboard rerun latency headlessly")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated dataset row counts (scaled from the template)")
+    parser.add_argument('--reruns', type=int, default=10, help="Warm reruns per scenario (for p50/p95)")
+    parser.add_argument('--template', default=os.path.join(APP_DIR, 'Book1.csv'))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', default=None, help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("DASHBOARD RERUN LATENCY BENCHMARK")
+    print("=" * 80)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    report = run_benchmarks(sizes, args.reruns, args.template, args.seed)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Saved results to: {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+"""
+Benchmark Suite for the Preprocessing Pipeline
+==============================================
+Generates synthetic datasets shaped like Book1.csv at increasing sizes and times
+the pipeline on them: preprocess_training_data, fit, transform (training and
+production, KNN index and batch mode) and every transform phase (timed under the
+phase names of DisasterDataPreprocessor, e.g. 'impute_temporal').
+
+Legacy batch KNN is quadratic in the rows transformed and only runs up to
+KNN_BATCH_MAX_ROWS (--knn-batch-max-rows); larger sizes record it as skipped.
+
+Results are written as JSON baselines; --compare flags regressions against one.
+
+    python benchmark_preprocessing.py --sizes 10000,100000 --save baseline.json
+    python benchmark_preprocessing.py --sizes 10000,100000 --compare baseline.json --threshold 0.2
+
+Sizes up to 10,000,000 rows are supported; the largest need tens of GB of RAM.
+
+Author: Graduation Project 2026
+"""
+
+import os
+import io
+import sys
+import copy
+import json
+import time
+import argparse
+import platform
+import tempfile
+import contextlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+import numpy as np
+
+from ingestion import read_raw_csv
+from preprocessing_pipeline import (
+    DisasterDataPreprocessor, PhaseProfiler, NEW_DATA_DROP_COLUMNS,
+    peak_rss_bytes, preprocess_training_data
+)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+# Legacy batch KNN refits the imputer on every batch (quadratic): about 5 s at 10,000 rows
+# and 25 s at 20,000, so 100,000 rows would take ~10 min per run; skip it above this size
+KNN_BATCH_MAX_ROWS = 20_000
+
+# Impact columns that get multiplicative noise so resampled rows stay distinct
+NOISY_COLUMNS = ['Total Deaths', 'No Injured', 'No Affected', 'No Homeless', 'Total Affected',
+                 "Total Damages ('000 US$)", "Insured Damages ('000 US$)", 'Aid Contribution']
+
+
+# ============================================================================
+# PART 1: SYNTHETIC DATA
+# ============================================================================
+
+def generate_synthetic_dataset(template: pd.DataFrame, n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Synthetic dataset with the template's columns, missingness and value mix
+    Rows are resampled from the template (keeping per-column missing rates, the
+    GLIDE valid/malformed/missing mix and the country/type distribution), then
+    sequence numbers, days, impact figures and GLIDE sequences are varied so that
+    rows are not exact duplicates
+    """
+    rng = np.random.default_rng(seed)
+    df = template.iloc[rng.integers(0, len(template), n_rows)].reset_index(drop=True)
+
+    df['Seq'] = rng.integers(1, 10_000, n_rows)
+
+    for col in ['Start Day', 'End Day']:
+        if col in df.columns:
+            present = df[col].notna().to_numpy()
+            df.loc[present, col] = rng.integers(1, 29, present.sum()).astype(float)
+
+    for col in NOISY_COLUMNS:
+        if col in df.columns:
+            present = df[col].notna().to_numpy()
+            noise = rng.lognormal(0.0, 0.3, present.sum())
+            df.loc[present, col] = np.round(df.loc[present, col].to_numpy() * noise)
+
+    # Well-formed GLIDE codes get a fresh 6-digit sequence; malformed ones stay as they are
+    if 'Glide' in df.columns:
+        parts = df['Glide'].astype('string').str.strip().str.extract(r'^([A-Z]{2}-\d{4}-)\d{6}(-[A-Z]{3})?$')
+        valid = parts[0].notna().to_numpy()
+        sequences = pd.Series(rng.integers(1, 1_000_000, valid.sum())).astype(str).str.zfill(6).to_numpy()
+        df.loc[valid, 'Glide'] = (
+            parts.loc[valid, 0].to_numpy(dtype=object) + sequences + parts.loc[valid, 1].fillna('').to_numpy(dtype=object)
+        )
+
+    return df
+
+
+def write_synthetic_csv(
+    template: pd.DataFrame,
+    path: str,
+    n_rows: int,
+    seed: int = 0,
+    chunk_rows: int = 1_000_000
+) -> str:
+    """Write a synthetic dataset to CSV in chunks (generation memory is bounded by chunk_rows)"""
+    written = 0
+    for i, start in enumerate(range(0, n_rows, chunk_rows)):
+        rows = min(chunk_rows, n_rows - start)
+        chunk = generate_synthetic_dataset(template, rows, seed=seed + i)
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        written += rows
+    return path
+
+
+# ============================================================================
+# PART 2: TIMED RUNS
+# ============================================================================
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the pipeline's progress output while timing"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def timed(function, *args, **kwargs):
+    """(result, wall seconds) of one call"""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def phase_walls(profiler: PhaseProfiler) -> Dict[str, float]:
+    """Wall seconds per transform phase"""
+    report = profiler.to_frame()
+    return dict(zip(report['phase'], report['wall_s'].astype(float)))
+
+
+def benchmark_size(csv_path: str, n_rows: int, repeat: int = 1,
+                   knn_batch_max_rows: int = KNN_BATCH_MAX_ROWS) -> dict:
+    """
+    Time every pipeline entry point on one synthetic file (best of `repeat` runs)
+
+    Returns:
+    --------
+    {metric name: seconds} plus per-phase timings, skipped metrics and peak RSS
+    """
+    best = {}
+    skipped = {}
+
+    def record(name, seconds):
+        best[name] = min(best.get(name, float('inf')), seconds)
+
+    phases = {}
+    for _ in range(repeat):
+        with quiet():
+            # Full training entry point (transform in training mode + split + fit)
+            (train_df, _, preprocessor), seconds = timed(
+                preprocess_training_data, csv_path, temporal_split=False, test_size=0.2
+            )
+            record('preprocess_training_data', seconds)
+
+            # fit() on its own
+            _, seconds = timed(DisasterDataPreprocessor().fit, train_df)
+            record('fit', seconds)
+
+            raw = read_raw_csv(csv_path)
+            raw = raw.drop(columns=[col for col in NEW_DATA_DROP_COLUMNS if col in raw.columns])
+
+            # transform, training mode (unfitted preprocessor, row drops allowed)
+            profiler = PhaseProfiler()
+            _, seconds = timed(DisasterDataPreprocessor().transform, raw, is_training=True, profiler=profiler)
+            record('transform_training', seconds)
+            for phase, wall in phase_walls(profiler).items():
+                phases.setdefault('training', {})[phase] = min(phases.get('training', {}).get(phase, float('inf')), wall)
+
+            # transform, production mode with the fitted neighbor index
+            profiler = PhaseProfiler()
+            _, seconds = timed(copy.deepcopy(preprocessor).transform, raw, is_training=False, profiler=profiler)
+            record('transform_production_index', seconds)
+            for phase, wall in phase_walls(profiler).items():
+                phases.setdefault('production', {})[phase] = min(phases.get('production', {}).get(phase, float('inf')), wall)
+
+            # transform, production mode with legacy per-batch KNN
+            if n_rows <= knn_batch_max_rows:
+                batch_preprocessor = copy.deepcopy(preprocessor)
+                batch_preprocessor.knn_mode = 'batch'
+                _, seconds = timed(batch_preprocessor.transform, raw, is_training=False)
+                record('transform_production_batch', seconds)
+            else:
+                skipped['transform_production_batch'] = f"batch KNN above {knn_batch_max_rows:,} rows"
+
+    peak = peak_rss_bytes()
+    return {
+        'rows': n_rows,
+        'timings_s': best,
+        'phases_s': phases,
+        'skipped': skipped,
+        'peak_rss_mb': peak / 1024**2 if peak is not None else None,
+    }
+
+
+def run_benchmarks(sizes: List[int], template_path: str = 'Book1.csv', repeat: int = 1,
+                   seed: int = 0, workdir: Optional[str] = None,
+                   knn_batch_max_rows: int = KNN_BATCH_MAX_ROWS) -> dict:
+    """Generate each size, benchmark it, and collect the results with environment metadata"""
+    template = pd.read_csv(template_path, low_memory=False)
+    results = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat,
+            'seed': seed,
+            'knn_batch_max_rows': knn_batch_max_rows,
+        },
+        'sizes': {},
+    }
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for n_rows in sizes:
+            print(f"\n📦 {n_rows:,} rows")
+            csv_path = os.path.join(tmp, f'synthetic_{n_rows}.csv')
+            _, seconds = timed(write_synthetic_csv, template, csv_path, n_rows, seed)
+            print(f"  ✓ Generated in {seconds:.1f}s ({os.path.getsize(csv_path) / 1024**2:.0f} MB)")
+
+            result = benchmark_size(csv_path, n_rows, repeat, knn_batch_max_rows)
+            results['sizes'][str(n_rows)] = result
+            for name, value in result['timings_s'].items():
+                print(f"  {name:<32} {value:>9.3f}s")
+            for name, reason in result['skipped'].items():
+                print(f"  {name:<32} skipped ({reason})")
+            os.remove(csv_path)
+
+    return results
+
+
+# ============================================================================
+# PART 3: BASELINE COMPARISON
+# ============================================================================
+
+def compare_to_baseline(results: dict, baseline: dict, threshold: float = 0.2,
+                        min_seconds: float = 0.05) -> List[dict]:
+    """
+    Compare timings with a baseline; a regression is a slowdown above threshold (0.2 = 20%)
+    that also adds more than min_seconds (keeps millisecond phases from flagging noise)
+
+    Returns:
+    --------
+    One entry per metric present in both, with ratio and regression flag
+    """
+    rows = []
+    for size, result in results['sizes'].items():
+        base = baseline.get('sizes', {}).get(size)
+        if base is None:
+            continue
+        metrics = [(name, value, base['timings_s'].get(name)) for name, value in result['timings_s'].items()]
+        for mode, walls in result.get('phases_s', {}).items():
+            base_walls = base.get('phases_s', {}).get(mode, {})
+            metrics += [(f'{mode}:{phase}', wall, base_walls.get(phase)) for phase, wall in walls.items()]
+
+        for name, value, base_value in metrics:
+            if base_value is None or base_value <= 0:
+                continue
+            ratio = value / base_value
+            rows.append({
+                'size': int(size), 'metric': name, 'baseline_s': base_value, 'current_s': value,
+                'ratio': ratio, 'regression': ratio > 1 + threshold and value - base_value > min_seconds,
+            })
+    return rows
+
+
+def print_comparison(rows: List[dict], threshold: float):
+    """Print the comparison table, regressions marked"""
+    print(f"\n📈 Comparison with baseline (regression threshold +{threshold * 100:.0f}%):")
+    print(f"  {'Size':>10} {'Metric':<44} {'Baseline':>9} {'Current':>9} {'Ratio':>7}")
+    for row in rows:
+        flag = '  ⚠️ REGRESSION' if row['regression'] else ''
+        print(f"  {row['size']:>10,} {row['metric']:<44} {row['baseline_s']:>9.3f} "
+              f"{row['current_s']:>9.3f} {row['ratio']:>7.2f}{flag}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the disaster preprocessing pipeline")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES[:2]),
+                        help="Comma-separated row counts (default: 10000,100000; "
+                             f"full suite: {','.join(str(size) for size in DEFAULT_SIZES)})")
+    parser.add_argument('--template', default='Book1.csv', help="Dataset whose shape is reproduced")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per size (best time is kept)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', default=None, help="Directory for the temporary synthetic CSVs")
+    parser.add_argument('--knn-batch-max-rows', type=int, default=KNN_BATCH_MAX_ROWS,
+                        help=f"Largest size that also times legacy batch KNN (default: {KNN_BATCH_MAX_ROWS:,})")
+    parser.add_argument('--save', default=None, help="Write results as a JSON baseline")
+    parser.add_argument('--compare', default=None, help="Baseline JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument('--min-seconds', type=float, default=0.05, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("PREPROCESSING PIPELINE BENCHMARK")
+    print("=" * 80)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    results = run_benchmarks(sizes, args.template, args.repeat, args.seed, args.workdir, args.knn_batch_max_rows)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Saved results to: {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare_to_baseline(results, baseline, args.threshold, args.min_seconds)
+        print_comparison(rows, args.threshold)
+        regressions = [row for row in rows if row['regression']]
+        if regressions:
+            print(f"\n⚠️ {len(regressions)} regression(s) beyond +{args.threshold * 100:.0f}%")
+            return 1
+        print("\n✅ No regressions")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,860 @@
+"""
+Dashboard Data Engine
+=====================
+Precomputed, read-only structures behind the Streamlit dashboard pages.
+Each structure is built once per data version and shared by every session,
+so widget interactions read small summaries instead of re-scanning the dataset.
+
+Author: Graduation Project 2026
+"""
+
+import os
+import io
+import sys
+import gzip
+import threading
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+import numpy as np
+
+from data_cache import read_csv_cached, read_csv_shape, open_shared_dataset
+from ingestion import SchemaError, check_columns, enforce_schema, parse_dtypes
+
+# ============================================================================
+# PART 1: DATA VERSION & COLUMN STORE
+# ============================================================================
+
+def source_version(file_path: str) -> Optional[str]:
+    """
+    Cheap identifier of a data file's version (modification time + size)
+    Used as the cache key for everything derived from the file; None if missing
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+class ColumnStore:
+    """
+    Lazily loaded, shared columns of a CSV
+    A column is materialized the first time a page asks for it and kept;
+    store[col] gives a Series, store[[cols]] a DataFrame of just those columns
+
+    With shared=True the columns come from the read-only shared dataset
+    (memory-mapped, one copy for all sessions and processes; writes raise);
+    otherwise, or without pyarrow, from the columnar CSV cache
+    """
+
+    def __init__(self, source_path: str, shared: bool = True, **read_csv_kwargs):
+        self.source_path = source_path
+        self.read_csv_kwargs = read_csv_kwargs
+        self.dataset = open_shared_dataset(source_path, **read_csv_kwargs) if shared else None
+        if self.dataset is not None:
+            self.columns, self.n_rows = list(self.dataset.columns), self.dataset.n_rows
+        else:
+            self.columns, self.n_rows = read_csv_shape(source_path, **read_csv_kwargs)
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def _read(self, columns: List[str]) -> pd.DataFrame:
+        if self.dataset is not None:
+            return self.dataset.read(columns)
+        return read_csv_cached(self.source_path, columns=columns, **self.read_csv_kwargs)
+
+    def load(self, columns: List[str]) -> None:
+        """Materialize columns that are not loaded yet (one projected read)"""
+        with self._lock:
+            missing = [col for col in columns if col not in self._loaded]
+            if missing:
+                frame = self._read(missing)
+                for col in missing:
+                    self._loaded[col] = frame[col]
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in self.columns:
+                raise KeyError(key)
+            self.load([key])
+            return self._loaded[key]
+
+        columns = list(key)
+        unknown = [col for col in columns if col not in self.columns]
+        if unknown:
+            raise KeyError(unknown)
+        if not columns:
+            return pd.DataFrame(index=pd.RangeIndex(self.n_rows))
+        self.load(columns)
+        return pd.concat([self._loaded[col] for col in columns], axis=1, copy=False)
+
+    def items(self) -> Iterator:
+        """(name, Series) for every column; columns not loaded yet are read transiently"""
+        for col in self.columns:
+            series = self._loaded.get(col)
+            yield col, series if series is not None else self._read([col])[col]
+
+    @property
+    def loaded_columns(self) -> List[str]:
+        """Columns currently materialized"""
+        return [col for col in self.columns if col in self._loaded]
+
+
+# ============================================================================
+# PART 2: AGGREGATE CUBE
+# ============================================================================
+
+# Cube keys: Year x Month x Country x Disaster Type
+# (Continent and Disaster Subtype ride along; they refine Country / Disaster Type)
+CUBE_DIMENSIONS = ['Year', 'Start Month', 'Country', 'Continent', 'Disaster Type', 'Disaster Subtype']
+
+# Impact metrics summed in every cube cell
+CUBE_METRICS = ['Total Deaths', 'No Injured', 'No Affected', "Total Damages ('000 US$)"]
+
+
+def column_memory(series: pd.Series) -> int:
+    """Deep memory of a column (also for read-only object arrays, which pandas cannot measure)"""
+    values = series.to_numpy()
+    if values.dtype == object and not values.flags.writeable:
+        return int(values.nbytes + sum(map(sys.getsizeof, values)))
+    return int(series.memory_usage(deep=True, index=False))
+
+
+def combined_dtype(base, new):
+    """dtype of a column once new values are stacked under base ones (as StackedStore does)"""
+    if isinstance(base, np.dtype) and isinstance(new, np.dtype):
+        return np.result_type(base, new)
+    from pandas.core.dtypes.cast import find_common_type
+    return find_common_type([base, new])
+
+
+class AggregateCube:
+    """
+    Compact cube of event counts and impact sums, plus a per-column profile
+    Replaces value_counts / describe / isnull / dropna scans of the full frame
+
+    source is a DataFrame or a ColumnStore; with a store, only the cube and
+    numeric columns are kept in memory (the profile reads the rest one at a time).
+    folded() adds appended rows without rescanning the existing ones.
+    """
+
+    def __init__(self, source):
+        self.columns = list(source.columns)
+        self.n_rows = len(source)
+        self.dimensions = [col for col in CUBE_DIMENSIONS if col in self.columns]
+        self.metrics = [col for col in CUBE_METRICS if col in self.columns]
+
+        # Column profile, one column at a time (Overview / Data Quality pages)
+        self.dtypes, non_null, complete = [], [], np.ones(self.n_rows, dtype=bool)
+        self.memory_bytes = int(pd.RangeIndex(self.n_rows).memory_usage(deep=True))
+        for col, series in source.items():
+            present = series.notna().to_numpy()
+            self.dtypes.append(series.dtype)
+            non_null.append(int(present.sum()))
+            complete &= present
+            self.memory_bytes += column_memory(series)
+        self._classify_columns()
+        self.profile = pd.DataFrame({
+            'Column': self.columns,
+            'Data Type': [str(dtype) for dtype in self.dtypes],
+            'Non-Null': non_null,
+            'Missing': [self.n_rows - count for count in non_null],
+        })
+        self.complete_rows = int(complete.sum())
+
+        # Cube cells: one row per observed combination of dimension values
+        df = source[list(dict.fromkeys(self.dimensions + self.metrics))]
+        self.cells = self._aggregate(df)
+
+        # Top events (Impact page); summary statistics are computed on first use
+        self.top_events = {
+            metric: df.nlargest(10, metric)[['Year', 'Country', 'Disaster Type', metric]].reset_index(drop=True)
+            for metric in self.metrics
+        }
+
+        self._source = source
+        self._summary = None
+        self._impact_stats = None
+        self._counts = {}
+
+    def _classify_columns(self) -> None:
+        """Numeric (non-boolean) and categorical (object) columns, from the column dtypes"""
+        self.numeric_columns = [
+            col for col, dtype in zip(self.columns, self.dtypes)
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        ]
+        self.categorical_columns = [col for col, dtype in zip(self.columns, self.dtypes) if dtype == object]
+
+    def _aggregate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Group rows (or cube cells carrying 'Events') into cube cells"""
+        grouped = df.groupby(self.dimensions, dropna=False, observed=True, sort=False)
+        cells = grouped[self.metrics].sum()
+        cells['Events'] = grouped['Events'].sum() if 'Events' in df.columns else grouped.size()
+        return cells.reset_index()
+
+    def folded(self, new_rows: pd.DataFrame, source) -> 'AggregateCube':
+        """
+        New cube covering the current rows plus new_rows (appended at the end)
+        Only new_rows are scanned; source is the combined data for lazy statistics
+        """
+        cube = object.__new__(AggregateCube)
+        cube.__dict__.update(self.__dict__)
+        new_rows = new_rows.reindex(columns=self.columns)
+
+        cube.n_rows = self.n_rows + len(new_rows)
+        cube.dtypes = [combined_dtype(dtype, new_rows[col].dtype) for col, dtype in zip(self.columns, self.dtypes)]
+        cube._classify_columns()
+        non_null = self.profile['Non-Null'].to_numpy() + new_rows.notna().sum().to_numpy()
+        cube.profile = self.profile.assign(**{
+            'Data Type': [str(dtype) for dtype in cube.dtypes], 'Non-Null': non_null, 'Missing': cube.n_rows - non_null
+        })
+        cube.complete_rows = self.complete_rows + int(new_rows.notna().all(axis=1).sum())
+        cube.memory_bytes = self.memory_bytes + sum(column_memory(series) for _, series in new_rows.items())
+
+        cube.cells = self._aggregate(pd.concat(
+            [self.cells, self._aggregate(new_rows.assign(Events=1))], ignore_index=True
+        ))
+        cube.top_events = {
+            metric: pd.concat([self.top_events[metric], new_rows[['Year', 'Country', 'Disaster Type', metric]]],
+                              ignore_index=True).nlargest(10, metric).reset_index(drop=True)
+            for metric in self.metrics
+        }
+
+        cube._source = source
+        cube._summary = None
+        cube._impact_stats = None
+        cube._counts = {}
+        return cube
+
+    @property
+    def summary(self) -> pd.DataFrame:
+        """describe() of the numeric columns (Export page)"""
+        if self._summary is None:
+            self._summary = self._source[self.numeric_columns].describe()
+        return self._summary
+
+    @property
+    def impact_stats(self) -> pd.DataFrame:
+        """describe() of the impact metrics, one row per metric (Impact page)"""
+        if self._impact_stats is None:
+            self._impact_stats = self.summary[self.metrics].T
+        return self._impact_stats
+
+    def counts(self, dimension: str) -> pd.Series:
+        """Event counts per value of one dimension, most frequent first (like value_counts)"""
+        if dimension not in self._counts:
+            counts = self.cells.groupby(dimension, observed=True)['Events'].sum()
+            self._counts[dimension] = counts.sort_values(ascending=False, kind='stable')
+        return self._counts[dimension]
+
+    def total(self, metric: str) -> float:
+        """Sum of an impact metric over the whole dataset"""
+        return self.cells[metric].sum()
+
+    def nunique(self, dimension: str) -> int:
+        """Number of distinct (non-missing) values of a dimension"""
+        return len(self.counts(dimension))
+
+    @property
+    def year_range(self) -> tuple:
+        """(first year, last year) in the data"""
+        years = self.counts('Year').index
+        return int(years.min()), int(years.max())
+
+    @property
+    def missing(self) -> pd.DataFrame:
+        """Missing-value profile per column (Column, Missing_Count, Missing_Percentage, Data_Type)"""
+        return pd.DataFrame({
+            'Column': self.profile['Column'],
+            'Missing_Count': self.profile['Missing'],
+            'Missing_Percentage': self.profile['Missing'] / self.n_rows * 100,
+            'Data_Type': self.profile['Data Type'],
+        })
+
+
+# ============================================================================
+# PART 3: FILTER INDEX
+# ============================================================================
+
+def remember(cache: dict, lock: threading.Lock, key, value, max_cached: int) -> None:
+    """Store value in a bounded memo shared by sessions, evicting the oldest entry under lock"""
+    with lock:
+        if key not in cache and len(cache) >= max_cached:
+            cache.pop(next(iter(cache)))
+        cache[key] = value
+
+
+class FilterIndex:
+    """
+    Row index for the custom filtering panel
+    Per column, row positions grouped by value (one stable argsort of the value codes,
+    plus each code's start/end bounds) and a sorted Year index: O(rows + unique values)
+    memory whatever the cardinality. A filter ANDs one row mask per filtered column,
+    each built from the selected values' positions only.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: List[str], max_cached: int = 32):
+        self.df = df
+        self.n_rows = len(df)
+        self.columns = [col for col in columns if col in df.columns]
+        self.max_cached = max_cached
+        position_dtype = np.int32 if self.n_rows < 2**31 else np.int64
+
+        # Categorical columns: rows ordered by value code; code c owns order[bounds[c]:bounds[c + 1]]
+        # (missing values get code -1 and sort before bounds[0], so no selection matches them)
+        self.values = {}
+        self._codes = {}
+        self._order = {}
+        self._bounds = {}
+        for col in self.columns:
+            codes, uniques = pd.factorize(df[col])
+            self.values[col] = uniques.tolist()
+            self._codes[col] = {value: code for code, value in enumerate(self.values[col])}
+            order = np.argsort(codes, kind='stable')
+            self._order[col] = order.astype(position_dtype)
+            self._bounds[col] = np.searchsorted(codes[order], np.arange(len(uniques) + 1)).astype(position_dtype)
+
+        # Year: row positions sorted by year (missing years sort last and never match)
+        if 'Year' in df.columns:
+            years = df['Year'].to_numpy(dtype=float, na_value=np.nan)
+            self._year_order = np.argsort(years, kind='stable').astype(position_dtype)
+            self._sorted_years = years[self._year_order]
+        else:
+            self._year_order = None
+
+        # Shared across sessions (st.cache_resource), so the memo is guarded like ColumnStore
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @property
+    def memory_bytes(self) -> int:
+        """Size of the index arrays (excluding the indexed frame and the memo)"""
+        arrays = list(self._order.values()) + list(self._bounds.values())
+        if self._year_order is not None:
+            arrays += [self._year_order, self._sorted_years]
+        return int(sum(array.nbytes for array in arrays))
+
+    def _year_mask(self, year_range: tuple) -> np.ndarray:
+        """Rows with first <= Year <= last"""
+        lo = np.searchsorted(self._sorted_years, year_range[0], side='left')
+        hi = np.searchsorted(self._sorted_years, year_range[1], side='right')
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self._year_order[lo:hi]] = True
+        return mask
+
+    def _value_mask(self, col: str, codes: tuple) -> np.ndarray:
+        """Rows whose value is any of the selected ones"""
+        order, bounds = self._order[col], self._bounds[col]
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for code in codes:
+            mask[order[bounds[code]:bounds[code + 1]]] = True
+        return mask
+
+    def positions(self, year_range: Optional[tuple] = None, selections: Optional[Dict[str, list]] = None) -> np.ndarray:
+        """
+        Row positions matching all filters (memoized on the filter tuple)
+
+        Parameters:
+        -----------
+        year_range : (first, last) inclusive, or None for all years
+        selections : {column: selected values}; rows with other or missing values are dropped
+        """
+        selections = selections or {}
+        key_parts = []
+        for col, vals in selections.items():
+            lookup = self._codes[col]
+            key_parts.append((col, tuple(sorted({lookup[val] for val in vals if val in lookup}))))
+        year_key = tuple(year_range) if year_range is not None and self._year_order is not None else None
+        key = (year_key, tuple(sorted(key_parts)))
+
+        with self._lock:
+            result = self._cache.get(key)
+        if result is None:
+            mask = self._year_mask(year_key) if year_key is not None else None
+            for col, codes in key[1]:
+                col_mask = self._value_mask(col, codes)
+                mask = col_mask if mask is None else np.logical_and(mask, col_mask, out=mask)
+
+            result = np.arange(self.n_rows) if mask is None else np.flatnonzero(mask)
+            remember(self._cache, self._lock, key, result, self.max_cached)
+        return result
+
+    def filter(self, year_range: Optional[tuple] = None, selections: Optional[Dict[str, list]] = None) -> pd.DataFrame:
+        """Filtered rows of the indexed frame (one take, original index kept)"""
+        return self.df[list(self.df.columns)].take(self.positions(year_range, selections))
+
+
+# ============================================================================
+# PART 4: PAGINATED TABLE
+# ============================================================================
+
+class TableView:
+    """
+    Server-side paging and sorting over a frame
+    Sort orders are computed once per column as global row ranks; any subset of
+    rows (e.g. a filter result) is sorted by its ranks, and only one page is sliced
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.n_rows = len(df)
+        self._ranks = {}
+
+    def rank(self, column: str, ascending: bool = True) -> np.ndarray:
+        """Position of every row in the stable sort by column (missing values last)"""
+        key = (column, ascending)
+        if key not in self._ranks:
+            values = self.df[column].reset_index(drop=True)
+            try:
+                order = values.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+            except TypeError:
+                # Mixed types in an object column: sort by text
+                order = values.where(values.isna(), values.astype(str)).sort_values(
+                    ascending=ascending, kind='stable', na_position='last'
+                ).index.to_numpy()
+            ranks = np.empty(self.n_rows, dtype=np.int64)
+            ranks[order] = np.arange(self.n_rows)
+            self._ranks[key] = ranks
+        return self._ranks[key]
+
+    def page(
+        self,
+        positions: Optional[np.ndarray] = None,
+        page: int = 0,
+        page_size: int = 25,
+        sort_by: Optional[str] = None,
+        ascending: bool = True,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        One page of rows
+
+        Parameters:
+        -----------
+        positions : Row positions to show (e.g. FilterIndex.positions); None = all rows
+        page : Zero-based page number
+        page_size : Rows per page
+        sort_by : Column to sort on, or None for the stored order
+        ascending : Sort direction
+        columns : Columns to include; None = all
+        """
+        if positions is None:
+            positions = np.arange(self.n_rows)
+        if sort_by is not None:
+            ranks = self.rank(sort_by, ascending)[positions]
+            start = page * page_size
+            stop = min(start + page_size, len(positions))
+            if start >= stop:
+                visible = positions[:0]
+            elif stop < len(positions):
+                # Only the rows up to the end of this page need a full sort
+                head = np.argpartition(ranks, stop - 1)[:stop]
+                visible = positions[head[np.argsort(ranks[head])]][start:stop]
+            else:
+                visible = positions[np.argsort(ranks)][start:stop]
+        else:
+            visible = positions[page * page_size:(page + 1) * page_size]
+
+        frame = self.df[list(self.df.columns) if columns is None else columns]
+        return frame.take(visible)
+
+
+# ============================================================================
+# PART 5: EXPORT
+# ============================================================================
+
+# Format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'CSV': ('.csv', 'text/csv'),
+    'CSV (gzip)': ('.csv.gz', 'application/gzip'),
+    'Parquet': ('.parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def available_export_formats() -> List[str]:
+    """Export formats usable in this environment (Parquet needs pyarrow)"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return [fmt for fmt in EXPORT_FORMATS if fmt != 'Parquet']
+    return list(EXPORT_FORMATS)
+
+
+def iter_csv_chunks(df, columns: Optional[List[str]] = None, chunksize: int = 50_000) -> Iterator[bytes]:
+    """Serialize df (DataFrame or ColumnStore) to UTF-8 CSV in row chunks (header with the first chunk)"""
+    frame = df[list(df.columns) if columns is None else columns]
+    for start in range(0, max(len(frame), 1), chunksize):
+        yield frame.iloc[start:start + chunksize].to_csv(index=False, header=start == 0).encode('utf-8')
+
+
+class ExportStore:
+    """
+    Export files built on demand and kept per (format, column selection)
+    Hold one store per data version; nothing is serialized until a download is requested
+    """
+
+    def __init__(self, df: pd.DataFrame, max_cached: int = 4, chunksize: int = 50_000):
+        self.df = df
+        self.max_cached = max_cached
+        self.chunksize = chunksize
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _build(self, fmt: str, columns: Optional[List[str]]) -> bytes:
+        if fmt == 'CSV':
+            return b''.join(iter_csv_chunks(self.df, columns, self.chunksize))
+        if fmt == 'CSV (gzip)':
+            buffer = io.BytesIO()
+            with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as gz:
+                for chunk in iter_csv_chunks(self.df, columns, self.chunksize):
+                    gz.write(chunk)
+            return buffer.getvalue()
+        if fmt == 'Parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            frame = self.df[list(self.df.columns) if columns is None else columns]
+            buffer = io.BytesIO()
+            pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), buffer, compression='zstd')
+            return buffer.getvalue()
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    def artifact(self, fmt: str, columns: Optional[List[str]] = None) -> bytes:
+        """File contents of df (optionally a column subset) in the given export format"""
+        key = (fmt, tuple(columns) if columns is not None else None)
+        with self._lock:
+            data = self._cache.get(key)
+        if data is None:
+            # Built outside the lock: a large export does not block other sessions
+            data = self._build(fmt, columns)
+            remember(self._cache, self._lock, key, data, self.max_cached)
+        return data
+
+
+# ============================================================================
+# PART 6: CORRELATIONS
+# ============================================================================
+
+def pairwise_pearson(values: np.ndarray) -> np.ndarray:
+    """
+    Pearson correlation of every column pair over the rows where both are present
+    (same result as DataFrame.corr(), computed with a few matrix products)
+    """
+    present = ~np.isnan(values)
+    weights = present.astype(float)
+
+    # Centering by the column mean does not change r but avoids cancellation
+    centered = np.where(present, values - np.nanmean(values, axis=0), 0.0)
+
+    n = weights.T @ weights
+    sum_x = centered.T @ weights
+    sum_y = sum_x.T
+    sum_xx = (centered ** 2).T @ weights
+    sum_yy = sum_xx.T
+    sum_xy = centered.T @ centered
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sum_xy - sum_x * sum_y / n
+        var_x = sum_xx - sum_x ** 2 / n
+        var_y = sum_yy - sum_y ** 2 / n
+        corr = cov / np.sqrt(var_x * var_y)
+
+    corr[(n < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+class CorrelationEngine:
+    """
+    Correlation matrices over all numeric columns, computed once per method
+    A column selection is a slice of the full matrix
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: Optional[List[str]] = None):
+        self.columns = columns if columns is not None else df.select_dtypes(include=[np.number]).columns.tolist()
+        self.df = df[self.columns]
+        self._matrices = {}
+
+    def matrix(self, method: str = 'pearson') -> pd.DataFrame:
+        """Full correlation matrix (pearson, spearman or kendall)"""
+        if method not in self._matrices:
+            if method == 'pearson':
+                values = self.df.to_numpy(dtype=float, na_value=np.nan)
+                corr = pairwise_pearson(values)
+                np.fill_diagonal(corr, np.where(np.isnan(np.diag(corr)), np.nan, 1.0))
+                self._matrices[method] = pd.DataFrame(corr, index=self.columns, columns=self.columns)
+            elif method in ('spearman', 'kendall'):
+                self._matrices[method] = self.df.corr(method=method)
+            else:
+                raise ValueError(f"Unknown correlation method: {method}")
+        return self._matrices[method]
+
+    def select(self, columns: List[str], method: str = 'pearson') -> pd.DataFrame:
+        """Correlation matrix of a column selection"""
+        return self.matrix(method).loc[columns, columns]
+
+    def strong_pairs(self, columns: List[str], threshold: float = 0.5, method: str = 'pearson') -> pd.DataFrame:
+        """Column pairs with |r| > threshold (upper triangle, in matrix order)"""
+        corr = self.select(columns, method).to_numpy()
+        rows, cols = np.triu_indices(len(columns), k=1)
+        values = corr[rows, cols]
+        strong = np.abs(values) > threshold
+        names = np.asarray(columns, dtype=object)
+        return pd.DataFrame({
+            'Feature 1': names[rows[strong]],
+            'Feature 2': names[cols[strong]],
+            'Correlation': values[strong],
+        })
+
+
+# ============================================================================
+# PART 7: PRE-BINNED HISTOGRAMS
+# ============================================================================
+
+def binned_histogram(values, bins: int = 50, weights=None) -> pd.DataFrame:
+    """
+    Bin values server-side (np.histogram) so a chart only ships bar heights
+    weights lets pre-aggregated data be binned, e.g. event counts per year
+
+    Returns:
+    --------
+    DataFrame with one row per bin: Lower, Upper, Center, Width, Count
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    values = values[valid]
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)[valid]
+    if len(values) == 0:
+        return pd.DataFrame(columns=['Lower', 'Upper', 'Center', 'Width', 'Count'])
+
+    counts, edges = np.histogram(values, bins=bins, weights=weights)
+    return pd.DataFrame({
+        'Lower': edges[:-1],
+        'Upper': edges[1:],
+        'Center': (edges[:-1] + edges[1:]) / 2,
+        'Width': np.diff(edges),
+        'Count': counts,
+    })
+
+
+# ============================================================================
+# PART 8: HOT RELOAD
+# ============================================================================
+
+class StackedStore:
+    """
+    Base column store plus rows appended since it was built (same interface as ColumnStore)
+    Combined columns are built on first use and are read-only like the base
+    """
+
+    def __init__(self, base: ColumnStore, appended: pd.DataFrame):
+        self.base = base
+        self.appended = appended
+        self.columns = list(base.columns)
+        self.n_rows = len(base) + len(appended)
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def _combine(self, col: str) -> pd.Series:
+        base, new = self.base[col], self.appended[col]
+        if isinstance(base.dtype, np.dtype) and isinstance(new.dtype, np.dtype):
+            values = np.concatenate([base.to_numpy(), new.to_numpy()])
+            values.flags.writeable = False
+            return pd.Series(values, name=col, copy=False)
+        return pd.concat([base, new], ignore_index=True)
+
+    def __getitem__(self, key):
+        columns = [key] if isinstance(key, str) else list(key)
+        unknown = [col for col in columns if col not in self.columns]
+        if unknown:
+            raise KeyError(key if isinstance(key, str) else unknown)
+        with self._lock:
+            for col in columns:
+                if col not in self._loaded:
+                    self._loaded[col] = self._combine(col)
+        if isinstance(key, str):
+            return self._loaded[key]
+        if not columns:
+            return pd.DataFrame(index=pd.RangeIndex(self.n_rows))
+        return pd.concat([self._loaded[col] for col in columns], axis=1, copy=False)
+
+    def items(self) -> Iterator:
+        for col in self.columns:
+            yield col, self[col]
+
+
+class DatasetSnapshot:
+    """
+    Immutable state of the dataset served to page runs: data, aggregates, and the
+    file position up to which the source has been read
+    """
+
+    def __init__(self, store, cube: AggregateCube, base_version: str, n_appended: int,
+                 offset: int, tail: bytes, stat_key: tuple):
+        self.store = store
+        self.cube = cube
+        self.base_version = base_version
+        self.n_appended = n_appended
+        self.offset = offset
+        self.tail = tail
+        self.stat_key = stat_key
+
+    @property
+    def version(self) -> str:
+        """Cache key of this snapshot (changes when rows are appended)"""
+        return f"{self.base_version}+{self.n_appended}"
+
+
+class DatasetWatcher:
+    """
+    Keeps a snapshot of a CSV that grows by appended rows
+    poll() checks the file size and mtime; appended complete lines are parsed and
+    folded into the aggregates in a background thread while callers keep getting
+    the previous snapshot. A rewritten or truncated file, or appended rows beyond
+    compact_ratio of the base, triggers a full reload.
+
+    The base and the appended rows are both parsed with the ingestion column
+    contract (ingestion.RAW_SCHEMA), so a column keeps its contract dtype as rows
+    arrive. With on_error='raise', an append that breaks the contract is rejected:
+    the previous snapshot keeps being served and the SchemaError is kept in
+    `error` until the file changes again. With on_error='quarantine', the bad rows
+    are dropped with a QuarantineWarning.
+
+    Appended rows are served raw, like the base: the watcher does not run them
+    through DisasterDataPreprocessor, whose output columns differ from the
+    source's. A reload never disturbs older snapshots: their shared columns stay
+    mapped (see data_cache.SharedDataset), and without a shared dataset the base
+    is read in full when it is loaded.
+
+    Parameters:
+    -----------
+    source_path : CSV file to watch
+    transform : Applied to each batch of appended rows before folding; must return
+                the source's columns (ValueError otherwise)
+    compact_ratio : Appended/base row ratio above which the base is rebuilt
+    on_error : 'raise' (reject appends that break the contract, default) or 'quarantine'
+    """
+
+    TAIL_BYTES = 4096
+
+    def __init__(self, source_path: str, transform=None, compact_ratio: float = 0.25,
+                 on_error: str = 'raise'):
+        self.source_path = source_path
+        self.transform = transform
+        self.compact_ratio = compact_ratio
+        self.on_error = on_error
+        self.error = None
+        self._rejected_key = None
+        self._updating = threading.Lock()
+        self.snapshot = self._load_base()
+
+    @staticmethod
+    def _stat_key(stat) -> tuple:
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_tail(self, offset: int) -> bytes:
+        with open(self.source_path, 'rb') as f:
+            f.seek(max(offset - self.TAIL_BYTES, 0))
+            return f.read(min(offset, self.TAIL_BYTES))
+
+    def _load_base(self) -> DatasetSnapshot:
+        """Snapshot of the whole file"""
+        stat = os.stat(self.source_path)
+        columns = list(pd.read_csv(self.source_path, nrows=0).columns)
+        check_columns(columns, self.source_path)
+
+        # Named per mode: the columnar cache is keyed by the postprocess name
+        def enforce(df):
+            return enforce_schema(df, self.on_error)[0]
+        enforce.__name__ = f'enforce_schema_{self.on_error}'
+
+        store = ColumnStore(self.source_path, dtype=parse_dtypes(columns, typed=False), postprocess=enforce)
+        if store.dataset is None:
+            # Lazy reads would see later versions of the file
+            store.load(store.columns)
+        return DatasetSnapshot(
+            store, AggregateCube(store), f"{stat.st_mtime_ns}-{stat.st_size}", 0,
+            stat.st_size, self._read_tail(stat.st_size), self._stat_key(stat)
+        )
+
+    def _read_appended(self, snapshot: DatasetSnapshot, size: int):
+        """Parse complete lines appended after the snapshot; (rows, new offset), or None if not an append"""
+        if size < snapshot.offset or self._read_tail(snapshot.offset) != snapshot.tail:
+            return None
+        with open(self.source_path, 'rb') as f:
+            f.seek(snapshot.offset)
+            data = f.read(size - snapshot.offset)
+
+        # A partially written last line waits for the next poll
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return pd.DataFrame(columns=snapshot.store.columns), snapshot.offset
+        columns = snapshot.store.columns
+        rows = pd.read_csv(io.BytesIO(data[:end]), header=None, names=columns, dtype={
+            **{col: object for col in snapshot.cube.categorical_columns}, **parse_dtypes(columns, typed=False)
+        })
+        return enforce_schema(rows, self.on_error)[0].reset_index(drop=True), snapshot.offset + end
+
+    def _update(self) -> None:
+        try:
+            snapshot = self.snapshot
+            stat = os.stat(self.source_path)
+            try:
+                appended = self._read_appended(snapshot, stat.st_size)
+                if appended is None:
+                    self.snapshot = self._load_base()
+                    self.error = None
+                    return
+            except SchemaError as e:
+                # Keep serving the previous snapshot; this version of the file is not parsed again
+                self.error, self._rejected_key = e, self._stat_key(stat)
+                return
+
+            rows, offset = appended
+            if len(rows) > 0 and self.transform is not None:
+                rows = self.transform(rows)
+                if list(rows.columns) != list(snapshot.store.columns):
+                    raise ValueError("transform must return the source's columns")
+            if len(rows) == 0:
+                new_store, cube, n_appended = snapshot.store, snapshot.cube, snapshot.n_appended
+            else:
+                if isinstance(snapshot.store, StackedStore):
+                    base, previous = snapshot.store.base, snapshot.store.appended
+                    all_rows = pd.concat([previous, rows], ignore_index=True)
+                else:
+                    base, all_rows = snapshot.store, rows.reset_index(drop=True)
+                if len(all_rows) > self.compact_ratio * len(base):
+                    self.snapshot = self._load_base()
+                    return
+                new_store = StackedStore(base, all_rows)
+                cube = snapshot.cube.folded(rows, new_store)
+                n_appended = len(all_rows)
+
+            self.snapshot = DatasetSnapshot(
+                new_store, cube, snapshot.base_version, n_appended,
+                offset, self._read_tail(offset), self._stat_key(stat)
+            )
+            self.error = None
+        finally:
+            self._updating.release()
+
+    def poll(self, background: bool = True) -> DatasetSnapshot:
+        """Current snapshot; starts an update if the file changed since it was taken"""
+        snapshot = self.snapshot
+        try:
+            key = self._stat_key(os.stat(self.source_path))
+        except FileNotFoundError:
+            return snapshot
+        changed = key != snapshot.stat_key and key != self._rejected_key
+        if changed and self._updating.acquire(blocking=False):
+            if background:
+                threading.Thread(target=self._update, daemon=True).start()
+            else:
+                self._update()
+        return self.snapshot if not background else snapshot
@@ -0,0 +1,383 @@
+"""
+Columnar Cache for CSV Data
+===========================
+Converts CSV files to Feather (Arrow IPC) on first read and serves later reads
+from the columnar copy: typed columns, column projection, memory-mapped reads.
+
+The cache lives next to the source as '<file>.cache.feather' and is keyed by the
+source modification time, size and content hash. A changed source rebuilds it.
+Without pyarrow everything falls back to plain CSV reads.
+
+A shared dataset ('<file>.shared/<version>/') lays the same data out for
+read-only, zero-copy use by many sessions and processes: numeric columns are
+memory-mapped .npy files, text columns an Arrow file.
+
+Author: Graduation Project 2026
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+import numpy as np
+
+CACHE_SUFFIX = '.cache.feather'
+CACHE_FORMAT_VERSION = '1'
+
+SHARED_SUFFIX = '.shared'
+SHARED_FORMAT_VERSION = '1'
+# Versions kept on disk per source (the current one included). The previous
+# version survives a rebuild so processes that are attaching to it still find it.
+SHARED_KEEP_VERSIONS = 2
+
+
+def cache_path_for(source_path: str) -> str:
+    """Location of the columnar cache for a source file"""
+    return source_path + CACHE_SUFFIX
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """Content hash of a file (read in blocks, never fully in memory)"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_key(source_path: str, options: str) -> dict:
+    """Metadata identifying the source version a cache was built from"""
+    stat = os.stat(source_path)
+    return {
+        'format': CACHE_FORMAT_VERSION,
+        'mtime_ns': str(stat.st_mtime_ns),
+        'size': str(stat.st_size),
+        'hash': file_digest(source_path),
+        'options': options,
+    }
+
+
+def _options_key(read_csv_kwargs: dict, postprocess: Optional[Callable]) -> str:
+    """How the CSV is parsed; a cache built with other options is not reused"""
+    return repr(sorted(read_csv_kwargs.items())) + (postprocess.__name__ if postprocess else '')
+
+
+def _cache_is_valid(source_path: str, cache_path: str, options: str) -> bool:
+    """Check a cache against its source: mtime+size fast path, content hash otherwise"""
+    import pyarrow as pa
+
+    if not os.path.exists(cache_path):
+        return False
+    try:
+        with pa.memory_map(cache_path) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowException):
+        return False
+
+    cached = {
+        key.decode()[len('cache.'):]: value.decode()
+        for key, value in metadata.items() if key.startswith(b'cache.')
+    }
+    if cached.get('format') != CACHE_FORMAT_VERSION or cached.get('options') != options:
+        return False
+
+    stat = os.stat(source_path)
+    if cached.get('mtime_ns') == str(stat.st_mtime_ns) and cached.get('size') == str(stat.st_size):
+        return True
+
+    # Touched but possibly unchanged: compare content, once
+    if cached.get('hash') != file_digest(source_path):
+        return False
+    _refresh_cache_stat(cache_path, stat)
+    return True
+
+
+def _refresh_cache_stat(cache_path: str, stat) -> None:
+    """
+    Record the source's new mtime and size in a cache whose content still matches,
+    so later reads take the fast path instead of hashing the source again
+    (best effort: on a read-only directory the hash is simply repeated)
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    try:
+        with pa.memory_map(cache_path) as source:
+            table = pa.ipc.open_file(source).read_all()
+        metadata = dict(table.schema.metadata or {})
+        metadata[b'cache.mtime_ns'] = str(stat.st_mtime_ns).encode()
+        metadata[b'cache.size'] = str(stat.st_size).encode()
+        feather.write_feather(table.replace_schema_metadata(metadata), cache_path + '.tmp',
+                              compression='uncompressed')
+        os.replace(cache_path + '.tmp', cache_path)
+    except (OSError, pa.ArrowException):
+        pass
+
+
+def write_cache(df: pd.DataFrame, source_path: str, options: str = '') -> Optional[str]:
+    """
+    Write df as the columnar cache of source_path (dtypes are preserved)
+    Returns the cache path, or None if pyarrow is missing or the directory is read-only
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        return None
+
+    cache_path = cache_path_for(source_path)
+    key = _source_key(source_path, options)
+
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata.update({f'cache.{name}'.encode(): value.encode() for name, value in key.items()})
+        table = table.replace_schema_metadata(metadata)
+
+        # Uncompressed so that reads can be memory-mapped
+        feather.write_feather(table, cache_path + '.tmp', compression='uncompressed')
+        os.replace(cache_path + '.tmp', cache_path)
+    except (OSError, pa.ArrowException):
+        return None
+    return cache_path
+
+
+def read_csv_cached(
+    source_path: str,
+    columns: Optional[List[str]] = None,
+    postprocess: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    **read_csv_kwargs
+) -> pd.DataFrame:
+    """
+    Read a CSV through its columnar cache
+
+    Parameters:
+    -----------
+    source_path : Path to the CSV file (the source of truth)
+    columns : Only load these columns (projection on the columnar file)
+    postprocess : Applied to the parsed CSV before caching (e.g. restoring a dtype schema)
+    read_csv_kwargs : Passed to pd.read_csv when (re)building the cache
+
+    Returns:
+    --------
+    DataFrame with the cached dtypes
+    """
+    options = _options_key(read_csv_kwargs, postprocess)
+
+    try:
+        import pyarrow.feather as feather
+    except ImportError:
+        df = pd.read_csv(source_path, **read_csv_kwargs)
+        df = postprocess(df) if postprocess else df
+        return df[columns] if columns is not None else df
+
+    cache_path = cache_path_for(source_path)
+    if _cache_is_valid(source_path, cache_path, options):
+        table = feather.read_table(cache_path, columns=columns, memory_map=True)
+        return table.to_pandas()
+
+    # Cold read: parse the CSV once and convert it
+    df = pd.read_csv(source_path, **read_csv_kwargs)
+    if postprocess:
+        df = postprocess(df)
+    write_cache(df, source_path, options)
+
+    return df[columns] if columns is not None else df
+
+
+def write_csv_cached(
+    df: pd.DataFrame,
+    csv_path: str,
+    postprocess: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None
+) -> None:
+    """
+    Write df to CSV and store its typed columnar cache alongside
+    Pass the same postprocess that readers use, so the cache key matches theirs
+    """
+    df.to_csv(csv_path, index=False)
+    write_cache(df, csv_path, _options_key({}, postprocess))
+
+
+def read_csv_shape(
+    source_path: str,
+    postprocess: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    **read_csv_kwargs
+) -> Tuple[List[str], int]:
+    """
+    Column names and row count of a CSV, read from the columnar cache's schema
+    (the cache is built first if needed; no column data is loaded when it is valid)
+    """
+    options = _options_key(read_csv_kwargs, postprocess)
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        df = pd.read_csv(source_path, **read_csv_kwargs)
+        df = postprocess(df) if postprocess else df
+        return df.columns.tolist(), len(df)
+
+    cache_path = cache_path_for(source_path)
+    if not _cache_is_valid(source_path, cache_path, options):
+        df = read_csv_cached(source_path, postprocess=postprocess, **read_csv_kwargs)
+        return df.columns.tolist(), len(df)
+
+    # Record batches are memory-mapped: counting rows touches no column data
+    with pa.memory_map(cache_path) as source:
+        reader = pa.ipc.open_file(source)
+        n_rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+        return reader.schema.names, n_rows
+
+
+# ============================================================================
+# SHARED READ-ONLY DATASET
+# ============================================================================
+
+def shared_dir_for(source_path: str) -> str:
+    """Directory holding the shared dataset versions of a source file"""
+    return source_path + SHARED_SUFFIX
+
+
+def _shared_version(source_path: str, options: str) -> str:
+    """Name of the shared dataset built from the current source file and read options"""
+    stat = os.stat(source_path)
+    options_digest = hashlib.blake2b(options.encode(), digest_size=4).hexdigest()
+    return f"{SHARED_FORMAT_VERSION}-{stat.st_mtime_ns}-{stat.st_size}-{options_digest}"
+
+
+class SharedDataset:
+    """
+    Read-only view of a shared dataset directory
+    Numeric columns are read-only memory maps (one copy in the OS page cache for
+    every process); text columns are read from a memory-mapped Arrow file and made
+    read-only. Writing into a returned column raises ValueError.
+
+    Every file is mapped when the dataset is attached (mapping touches no data), so
+    an attached dataset keeps reading after a rebuild removes its directory.
+    """
+
+    def __init__(self, path: str):
+        import pyarrow as pa
+
+        self.path = path
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        self.n_rows = manifest['n_rows']
+        self.columns = [entry['name'] for entry in manifest['columns']]
+        self._entries = {entry['name']: entry for entry in manifest['columns']}
+
+        self._numeric = {
+            entry['name']: np.load(os.path.join(path, entry['file']), mmap_mode='r')
+            for entry in manifest['columns'] if entry['kind'] == 'numeric'
+        }
+        # Zero-copy: the table's buffers point into the mapped file
+        with pa.memory_map(os.path.join(path, 'text.arrow')) as source:
+            self._text_table = pa.ipc.open_file(source).read_all()
+
+    def _text_frame(self, columns: List[str]) -> pd.DataFrame:
+        return self._text_table.select(columns).to_pandas()
+
+    def read(self, columns: List[str]) -> pd.DataFrame:
+        """Columns as a DataFrame backed by the shared, read-only buffers"""
+        series = {}
+        for col in columns:
+            entry = self._entries[col]
+            if entry['kind'] == 'numeric':
+                series[col] = pd.Series(self._numeric[col], name=col, copy=False)
+
+        text_columns = [col for col in columns if self._entries[col]['kind'] == 'text']
+        if text_columns:
+            for col, values in self._text_frame(text_columns).items():
+                if isinstance(values.dtype, np.dtype):
+                    array = values.to_numpy()
+                    array.flags.writeable = False
+                    values = pd.Series(array, name=col, copy=False)
+                series[col] = values
+
+        if not columns:
+            return pd.DataFrame(index=pd.RangeIndex(self.n_rows))
+        return pd.concat([series[col] for col in columns], axis=1, copy=False)
+
+
+def build_shared_dataset(
+    source_path: str,
+    postprocess: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    **read_csv_kwargs
+) -> Optional[str]:
+    """
+    Lay out the current version of source_path as a shared dataset
+    Returns its directory, or None if pyarrow is missing or the directory is read-only
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+
+    options = _options_key(read_csv_kwargs, postprocess)
+    root = shared_dir_for(source_path)
+    path = os.path.join(root, _shared_version(source_path, options))
+    if os.path.exists(os.path.join(path, 'manifest.json')):
+        return path
+
+    df = read_csv_cached(source_path, postprocess=postprocess, **read_csv_kwargs)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        os.makedirs(tmp_path, exist_ok=True)
+        entries, text_columns = [], []
+        for i, (col, values) in enumerate(df.items()):
+            # Plain NumPy numeric columns map straight into memory; everything else goes to Arrow
+            if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biuf':
+                np.save(os.path.join(tmp_path, f'{i}.npy'), values.to_numpy())
+                entries.append({'name': col, 'kind': 'numeric', 'file': f'{i}.npy'})
+            else:
+                text_columns.append(col)
+                entries.append({'name': col, 'kind': 'text'})
+
+        table = pa.Table.from_pandas(df[text_columns], preserve_index=False)
+        with pa.OSFile(os.path.join(tmp_path, 'text.arrow'), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+            json.dump({'n_rows': len(df), 'columns': entries}, f)
+
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another process published this version first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+    except (OSError, pa.ArrowException):
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        return None
+
+    _remove_old_versions(root, keep=os.path.basename(path))
+    return path
+
+
+def _remove_old_versions(root: str, keep: str) -> None:
+    """
+    Delete all but the SHARED_KEEP_VERSIONS newest versions under root (never keep)
+    Attached SharedDatasets hold their files mapped and are unaffected on POSIX;
+    where mapped files cannot be deleted (Windows) removal is retried on a later build.
+    """
+    versions = []
+    for name in os.listdir(root):
+        if '.tmp-' in name or name == keep:
+            continue
+        try:
+            versions.append((os.path.getmtime(os.path.join(root, name)), name))
+        except OSError:
+            continue  # removed by another process meanwhile
+    for _, name in sorted(versions, reverse=True)[SHARED_KEEP_VERSIONS - 1:]:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def open_shared_dataset(
+    source_path: str,
+    postprocess: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    **read_csv_kwargs
+) -> Optional[SharedDataset]:
+    """Attach to the shared dataset of source_path, building it on first use (None if unavailable)"""
+    path = build_shared_dataset(source_path, postprocess=postprocess, **read_csv_kwargs)
+    return SharedDataset(path) if path is not None else None
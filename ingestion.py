@@ -0,0 +1,257 @@
+"""
+Schema-Validated Ingestion for Raw Disaster Data
+================================================
+Reads the raw disaster CSV (Book1.csv layout) against an explicit column contract
+instead of letting pandas infer every type, so a column's dtype never depends on
+which rows (or which chunk) were read:
+
+    text        → object (str, NaN when missing)
+    float       → float64
+    int         → Int64 (nullable; years and sequence numbers)
+    coordinate  → float64 signed decimal degrees ('15.1794 N' → 15.1794, '5.4 W' → -5.4)
+
+Missing required columns fail fast, before any rows are parsed. Cells that break
+their contract (e.g. 'unknown' in Total Deaths, '12 X' in Latitude) are found with one
+vectorized pass per column; the offending rows are rejected (SchemaError, the
+default) or, on request, quarantined in bulk (QuarantineWarning), optionally to a
+CSV for review.
+
+Author: Graduation Project 2026
+"""
+
+import re
+import warnings
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import numpy as np
+
+# Coordinate strings: plain signed decimals ('-4.37') or hemisphere suffixed ('15.1794 N')
+COORDINATE_PATTERN = re.compile(r'^\s*(?P<value>[-+]?\d+(?:\.\d*)?)\s*(?P<hemisphere>[NSEW])?\s*$', re.IGNORECASE)
+
+# Column contract for the raw dataset (every Book1.csv column)
+RAW_SCHEMA = {
+    'Year': 'int', 'Seq': 'int', 'Glide': 'text',
+    'Disaster Group': 'text', 'Disaster Subgroup': 'text', 'Disaster Type': 'text',
+    'Disaster Subtype': 'text', 'Disaster Subsubtype': 'text', 'Event Name': 'text',
+    'Country': 'text', 'ISO': 'text', 'Region': 'text', 'Continent': 'text',
+    'Location': 'text', 'Origin': 'text', 'Associated Dis': 'text', 'Associated Dis2': 'text',
+    'OFDA Response': 'text', 'Appeal': 'text', 'Declaration': 'text',
+    'Aid Contribution': 'float', 'Dis Mag Value': 'float', 'Dis Mag Scale': 'text',
+    'Latitude': 'coordinate', 'Longitude': 'coordinate',
+    'Local Time': 'text', 'River Basin': 'text',
+    'Start Year': 'int', 'Start Month': 'float', 'Start Day': 'float',
+    'End Year': 'int', 'End Month': 'float', 'End Day': 'float',
+    'Total Deaths': 'float', 'No Injured': 'float', 'No Affected': 'float',
+    'No Homeless': 'float', 'Total Affected': 'float',
+    "Insured Damages ('000 US$)": 'float', "Total Damages ('000 US$)": 'float', 'CPI': 'float',
+    'Adm Level': 'text', 'Admin1 Code': 'text', 'Admin2 Code': 'text', 'Geo Locations': 'text',
+}
+
+# Columns the preprocessing transform reads unconditionally
+REQUIRED_COLUMNS = [
+    'Year', 'Glide', 'Disaster Type', 'Country', 'Continent', 'Latitude', 'Longitude',
+    'Start Year', 'Start Month', 'Start Day', 'End Year', 'End Month', 'End Day',
+    'Total Deaths', 'No Injured', 'No Affected', 'No Homeless',
+    "Total Damages ('000 US$)", 'Dis Mag Value',
+]
+
+# dtype the CSV parser produces for each kind (coordinates are parsed afterwards)
+PARSE_DTYPES = {'text': object, 'float': 'float64', 'int': 'Int64', 'coordinate': object}
+
+# Column added to quarantined rows, naming the columns whose contract they broke
+VIOLATION_COLUMN = 'Schema_Violations'
+
+ON_ERROR_MODES = ('raise', 'quarantine')
+
+
+class SchemaError(ValueError):
+    """Raw data does not satisfy the column contract"""
+
+
+class QuarantineWarning(UserWarning):
+    """Rows breaking the column contract were dropped (on_error='quarantine')"""
+
+
+def parse_coordinates(values: pd.Series) -> pd.Series:
+    """
+    Convert a column of coordinates into signed decimal degrees
+    South and West hemispheres become negative, unparseable values become NaN
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype('float64')
+
+    parts = values.astype('string').str.extract(COORDINATE_PATTERN)
+    magnitude = pd.to_numeric(parts['value'], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    southern_or_western = parts['hemisphere'].str.upper().isin(['S', 'W']).to_numpy(dtype=bool)
+
+    return pd.Series(np.where(southern_or_western, -magnitude, magnitude), index=values.index)
+
+
+# ============================================================================
+# PART 1: COLUMN CONTRACTS
+# ============================================================================
+
+def check_columns(columns: List[str], file_path: str = '<frame>') -> List[str]:
+    """
+    Fail fast on a header that cannot be processed
+    Returns the columns not covered by the contract (kept with inferred types)
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing:
+        raise SchemaError(f"{file_path} is missing required columns: {missing}")
+
+    unknown = [col for col in columns if col not in RAW_SCHEMA]
+    if unknown:
+        print(f"⚠ {len(unknown)} columns not in the schema (types inferred): {unknown}")
+    return unknown
+
+
+def parse_dtypes(columns: List[str], typed: bool = True) -> Dict[str, object]:
+    """
+    read_csv dtype map for the contract columns present in a header
+    Untyped: numeric columns are read as strings, to be validated in bulk by enforce_schema
+    """
+    return {
+        col: PARSE_DTYPES[RAW_SCHEMA[col]] if typed else object
+        for col in columns if col in RAW_SCHEMA
+    }
+
+
+def enforce_schema(df: pd.DataFrame, on_error: str = 'raise') -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Cast every contract column to its declared type in one vectorized pass per column
+
+    Parameters:
+    -----------
+    df : Raw frame (contract columns already typed, or read as strings)
+    on_error : 'raise' rejects the data on any violation (SchemaError, the default)
+               'quarantine' moves violating rows out of the clean frame (opt-in: the
+               rows are dropped, with a warning giving their count)
+
+    Returns:
+    --------
+    clean_df, quarantined_df (raw values of the bad rows + Schema_Violations)
+    """
+    if on_error not in ON_ERROR_MODES:
+        raise ValueError(f"on_error must be one of {ON_ERROR_MODES}, got {on_error!r}")
+
+    typed = {}
+    violations = {}
+    for col in df.columns:
+        kind = RAW_SCHEMA.get(col)
+        if kind is None or kind == 'text':
+            continue
+
+        values = df[col]
+        if kind == 'coordinate':
+            parsed = parse_coordinates(values)
+        elif pd.api.types.is_numeric_dtype(values):
+            parsed = values
+        else:
+            parsed = pd.to_numeric(values, errors='coerce')
+
+        bad = values.notna() & parsed.isna()
+        if kind == 'int':
+            fractional = parsed.notna() & (parsed % 1 != 0)
+            bad = bad | fractional
+            parsed = parsed.where(~fractional)
+
+        if bad.any():
+            violations[col] = bad
+        typed[col] = parsed.astype(PARSE_DTYPES[kind] if kind != 'coordinate' else 'float64')
+
+    clean = df.assign(**typed)
+    if not violations:
+        return clean, df.iloc[:0].assign(**{VIOLATION_COLUMN: pd.Series(dtype=object)})
+
+    bad_rows = pd.concat(violations, axis=1).any(axis=1)
+    counts = ', '.join(f"{col}={mask.sum()}" for col, mask in violations.items())
+    if on_error == 'raise':
+        first = df.index[bad_rows.to_numpy()][:5].tolist()
+        raise SchemaError(f"{bad_rows.sum()} rows break the column contract ({counts}); first rows: {first}")
+
+    quarantined = df[bad_rows].copy()
+    broken = pd.DataFrame(violations)[bad_rows]
+    quarantined[VIOLATION_COLUMN] = broken.dot(broken.columns + ';').str.rstrip(';')
+    print(f"⚠ Quarantined {len(quarantined):,} rows that break the column contract ({counts})")
+    warnings.warn(f"{len(quarantined):,} rows quarantined ({counts})", QuarantineWarning, stacklevel=2)
+    return clean[~bad_rows], quarantined
+
+
+# ============================================================================
+# PART 2: READING RAW FILES
+# ============================================================================
+
+def _write_quarantine(quarantined: pd.DataFrame, quarantine_path: Optional[str], append: bool):
+    """Append quarantined rows (with their file row number) to the review CSV"""
+    if quarantine_path is None or len(quarantined) == 0:
+        return
+    quarantined.to_csv(quarantine_path, mode='a' if append else 'w', header=not append, index_label='Row')
+
+
+def read_raw_csv(
+    file_path: str,
+    on_error: str = 'raise',
+    quarantine_path: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Read a raw disaster CSV with every column typed by the contract
+
+    Parameters:
+    -----------
+    file_path : Path to raw CSV file
+    on_error : 'raise' (reject the file, default) or 'quarantine' (drop bad rows) on contract violations
+    quarantine_path : CSV that quarantined rows are written to for review
+
+    The parser types numeric columns directly; only a file with a bad numeric cell
+    is read again with those columns as strings to locate the bad rows in bulk.
+    """
+    columns = list(pd.read_csv(file_path, nrows=0).columns)
+    check_columns(columns, file_path)
+
+    try:
+        df = pd.read_csv(file_path, low_memory=False, dtype=parse_dtypes(columns))
+    except (ValueError, TypeError):
+        df = pd.read_csv(file_path, low_memory=False, dtype=parse_dtypes(columns, typed=False))
+
+    df, quarantined = enforce_schema(df, on_error)
+    _write_quarantine(quarantined, quarantine_path, append=False)
+    return df
+
+
+def iter_raw_csv(
+    file_path: str,
+    chunksize: int,
+    on_error: str = 'raise',
+    quarantine_path: Optional[str] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Chunked read_raw_csv: every chunk has the same dtypes, whatever values it holds
+    Quarantined rows of all chunks are collected in one quarantine_path file
+    """
+    columns = list(pd.read_csv(file_path, nrows=0).columns)
+    check_columns(columns, file_path)
+
+    rows_read = 0
+    typed = True
+    written = False
+    while True:
+        # After a bad numeric cell, resume untyped from the first row not yet yielded
+        reader = pd.read_csv(
+            file_path, chunksize=chunksize, low_memory=False,
+            dtype=parse_dtypes(columns, typed=typed), skiprows=range(1, rows_read + 1)
+        )
+        try:
+            for chunk in reader:
+                chunk.index = pd.RangeIndex(rows_read, rows_read + len(chunk))
+                rows_read += len(chunk)
+                chunk, quarantined = enforce_schema(chunk, on_error)
+                _write_quarantine(quarantined, quarantine_path, append=written)
+                written = written or len(quarantined) > 0
+                yield chunk
+            return
+        except (ValueError, TypeError) as e:
+            if isinstance(e, SchemaError) or not typed:
+                raise
+            typed = False
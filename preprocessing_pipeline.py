@@ -11,12 +11,21 @@ Date: February 26, 2026
 import pandas as pd
 import numpy as np
 import re
-from typing import Dict, Tuple, Optional
+import io
+import os
+import sys
+import json
+import time
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Tuple, Optional, Union
 import warnings
 warnings.filterwarnings('ignore')
 from sklearn.impute import KNNImputer
 from sklearn.preprocessing import StandardScaler
 
+from ingestion import parse_coordinates, read_raw_csv, iter_raw_csv
+
 # ============================================================================
 # PART 1: MAPPING DICTIONARIES (Research-based - Update with your findings)
 # ============================================================================
@@ -196,6 +205,15 @@ DISASTER_TO_GROUP = {
     'Landslide': 'Hydrological', 'Avalanche': 'Hydrological',
 }
 
+# Keyword fallbacks for types missing from DISASTER_TO_GROUP (applied in order; a later match wins)
+DISASTER_GROUP_PATTERNS = [
+    ('flood', 'Hydrological'),
+    ('storm|cyclone|wind', 'Meteorological'),
+    ('earthquake|seismic|volcano', 'Geophysical'),
+    ('drought|fire|temperature', 'Climatological'),
+    ('epidemic|disease|infection', 'Biological'),
+]
+
 # TODO: Add your research findings here!
 # Expected disaster durations in days (average) - RESEARCH THESE VALUES!
 DISASTER_DURATION_DAYS = {
@@ -276,10 +294,138 @@ COUNTRY_CENTROIDS = {
 }
 
 
+# Memory budget for a processed frame with the output schema applied
+# (object/int64 columns take ~1,500 bytes per row; the compact schema ~450)
+MAX_BYTES_PER_ROW = 600
+
+# Output schema enforced at the end of the pipeline (compact dtypes)
+OUTPUT_SCHEMA = {
+    # Low-cardinality text
+    'Country': 'category', 'ISO': 'category', 'Region': 'category', 'Continent': 'category',
+    'Disaster Group': 'category', 'Disaster Subgroup': 'category',
+    'Disaster Type': 'category', 'Disaster Subtype': 'category',
+    'Associated Dis': 'category', 'Dis Mag Scale': 'category',
+    'Appeal': 'category', 'Declaration': 'category',
+    'GLIDE_Type_Code': 'category', 'GLIDE_Country_ISO': 'category',
+    'Decade_Label': 'category', 'Data_Era': 'category', 'Season': 'category',
+    
+    # Data quality flags and small codes (0/1 or 0-4)
+    'Deaths_Known': 'int8', 'Injured_Known': 'int8', 'Affected_Known': 'int8',
+    'Homeless_Known': 'int8', 'Damages_Known': 'int8', 'Location_Precise': 'int8',
+    'Has_Magnitude': 'int8', 'GLIDE_Complete': 'int8',
+    'Is_Recent': 'int8', 'Severity_Category': 'int8',
+    
+    # Calendar fields
+    'Year': 'int16', 'Start Year': 'int16', 'End Year': 'int16',
+    'Decade': 'int16', 'GLIDE_Year': 'int16',
+    'Start Month': 'int8', 'End Month': 'int8',
+    'Start Day': 'int8', 'End Day': 'int8',
+    'GLIDE_Sequence': 'int32', 'Seq': 'int32',
+}
+
+
+def apply_output_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast processed columns to OUTPUT_SCHEMA dtypes (columns not present are skipped)
+    Also used to restore dtypes after reading processed CSV files back
+    """
+    dtypes = {col: dtype for col, dtype in OUTPUT_SCHEMA.items() if col in df.columns}
+    return df.astype(dtypes)
+
+
+def output_schema_mismatches(df: pd.DataFrame) -> List[str]:
+    """Columns present in df whose dtype differs from OUTPUT_SCHEMA"""
+    return [col for col, dtype in OUTPUT_SCHEMA.items() if col in df.columns and str(df[col].dtype) != dtype]
+
+
+# ============================================================================
+# PART 1B: UNIQUE-VALUE MEMOIZATION
+# ============================================================================
+
+def factorize_rows(*columns: pd.Series) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """
+    Code every row by its combination of values across the columns
+    (missing is a value too; None, NaN and NA are the same missing value)
+    Returns the row codes and, per column, the value of each unique combination
+    """
+    codes, uniques = pd.factorize(columns[0], use_na_sentinel=False)
+    if len(columns) == 1:
+        return codes, [np.asarray(uniques, dtype=object)]
+
+    column_codes = [codes]
+    for col in columns[1:]:
+        col_codes, col_uniques = pd.factorize(col, use_na_sentinel=False)
+        column_codes.append(col_codes)
+        codes, _ = pd.factorize(codes * len(col_uniques) + col_codes)
+
+    # Values of each combination, taken from the row where it first appears
+    _, first_rows = np.unique(codes, return_index=True)
+    values = [col.to_numpy(dtype=object)[first_rows] for col in columns]
+    return codes, values
+
+
+def map_unique(derive: Union[Callable, dict], *columns: pd.Series) -> pd.Series:
+    """
+    Row-wise derive(*values) computed once per unique combination of values,
+    then broadcast back to every row with a take
+
+    Parameters:
+    -----------
+    derive : Function of one value per column, or a dict for one column (unmapped values become NaN, as Series.map)
+    columns : Aligned columns the derived value depends on
+    """
+    codes, values = factorize_rows(*columns)
+    if isinstance(derive, dict):
+        derived = pd.Series(derive).reindex(values[0])
+    else:
+        derived = pd.Series([derive(*combination) for combination in zip(*values)])
+    name = columns[0].name if len(columns) == 1 else None
+    return pd.Series(derived.to_numpy().take(codes), index=columns[0].index, name=name)
+
+
+# ============================================================================
+# PART 1C: COPY-FREE COLUMN WRITES
+# ============================================================================
+
+def assign_rows(df: pd.DataFrame, col: str, mask, values) -> None:
+    """
+    Same result (values and dtype) as df.loc[mask, col] = values, but written to a copy
+    of the one column, which then replaces it: frames sharing df's buffers (the shallow
+    copy transform starts from, the caller's frame) are never modified
+    A missing (NA) mask entry counts as False, as in df.loc
+    """
+    if isinstance(mask, pd.Series):
+        mask = mask.to_numpy(dtype=bool, na_value=False)
+    mask = np.asarray(mask, dtype=bool)
+    if not mask.any():
+        # Setting through an empty mask can still upcast; probe the dtype on zero rows
+        probe = df[col].iloc[:0].copy()
+        probe.loc[mask[:0]] = values
+        if probe.dtype != df[col].dtype:
+            df[col] = df[col].astype(probe.dtype)
+        return
+    
+    column = df[col].copy()
+    column.loc[mask] = values
+    df[col] = column
+
+
 # ============================================================================
 # PART 2: GLIDE PARSING FUNCTIONS
 # ============================================================================
 
+# Precompiled GLIDE patterns
+# Full form:    XX-YYYY-NNNNNN-CCC
+# Partial form: XX-YYYY-NNNNNN (missing country)
+GLIDE_FULL_PATTERN = re.compile(r'^([A-Z]{2})-(\d{4})-(\d+)-([A-Z]{3})$')
+GLIDE_PARTIAL_PATTERN = re.compile(r'^([A-Z]{2})-(\d{4})-(\d+)$')
+
+# Batch pattern covering both forms (country group is optional)
+GLIDE_BATCH_PATTERN = re.compile(
+    r'^(?P<type_code>[A-Z]{2})-(?P<year>\d{4})-(?P<sequence>\d+)(?:-(?P<country_code>[A-Z]{3}))?$'
+)
+
+
 def parse_glide(glide_code: str) -> Dict[str, Optional[str]]:
     """
     Parse GLIDE code into components
@@ -291,8 +437,7 @@ def parse_glide(glide_code: str) -> Dict[str, Optional[str]]:
         return {'type_code': None, 'year': None, 'sequence': None, 'country_code': None}
     
     # Standard GLIDE pattern: XX-YYYY-NNNNNN-CCC
-    pattern = r'^([A-Z]{2})-(\d{4})-(\d+)-([A-Z]{3})$'
-    match = re.match(pattern, glide_code.strip())
+    match = GLIDE_FULL_PATTERN.match(glide_code.strip())
     
     if match:
         return {
@@ -304,8 +449,7 @@ def parse_glide(glide_code: str) -> Dict[str, Optional[str]]:
     
     # Try partial matches
     # Pattern: XX-YYYY-NNNNNN (missing country)
-    pattern2 = r'^([A-Z]{2})-(\d{4})-(\d+)$'
-    match2 = re.match(pattern2, glide_code.strip())
+    match2 = GLIDE_PARTIAL_PATTERN.match(glide_code.strip())
     if match2:
         return {
             'type_code': match2.group(1),
@@ -317,6 +461,26 @@ def parse_glide(glide_code: str) -> Dict[str, Optional[str]]:
     return {'type_code': None, 'year': None, 'sequence': None, 'country_code': None}
 
 
+def parse_glide_series(glide_codes: pd.Series) -> pd.DataFrame:
+    """
+    Parse a whole column of GLIDE codes in one vectorized pass
+    Batch equivalent of parse_glide (full and partial forms)
+    
+    Returns DataFrame (same index) with: type_code, country_code (category),
+    year, sequence (nullable Int64)
+    """
+    codes = glide_codes.astype('string').str.strip()
+    
+    parts = codes.str.extract(GLIDE_BATCH_PATTERN)
+    
+    return pd.DataFrame({
+        'type_code': parts['type_code'].astype(object).astype('category'),
+        'year': pd.to_numeric(parts['year']).astype('Int64'),
+        'sequence': pd.to_numeric(parts['sequence']).astype('Int64'),
+        'country_code': parts['country_code'].astype(object).astype('category'),
+    }, index=glide_codes.index)
+
+
 def construct_glide(disaster_type: str, year: int, sequence: int, country: str) -> Optional[str]:
     """
     Construct GLIDE code from components
@@ -340,6 +504,342 @@ def construct_glide(disaster_type: str, year: int, sequence: int, country: str)
         return None
 
 
+def construct_glide_series(
+    disaster_types: pd.Series,
+    years: pd.Series,
+    sequences: pd.Series,
+    countries: pd.Series
+) -> pd.Series:
+    """
+    Construct GLIDE codes for whole columns at once
+    Batch equivalent of construct_glide (NaN where type or country is unmapped)
+    """
+    type_codes = map_unique(DISASTER_TO_GLIDE_TYPE, disaster_types)
+    iso_codes = map_unique(COUNTRY_TO_ISO, countries)
+    
+    glides = (
+        type_codes + '-' +
+        years.astype(int).astype(str) + '-' +
+        sequences.astype(int).astype(str).str.zfill(6) + '-' +
+        iso_codes
+    )
+    return glides
+
+
+# ============================================================================
+# PART 2B: GEOGRAPHIC AND CALENDAR HELPERS
+# ============================================================================
+
+def build_country_reference() -> pd.DataFrame:
+    """
+    Compile the country lookup dictionaries into one reference frame
+    Indexed by Country with columns: Continent, Region, Latitude, Longitude (numeric)
+    """
+    countries = sorted(set(COUNTRY_TO_CONTINENT) | set(COUNTRY_TO_REGION) | set(COUNTRY_CENTROIDS))
+    centroids = pd.DataFrame.from_dict(COUNTRY_CENTROIDS, orient='index', columns=['Latitude', 'Longitude'])
+    
+    reference = pd.DataFrame(index=pd.Index(countries, name='Country'))
+    reference['Continent'] = pd.Series(COUNTRY_TO_CONTINENT, dtype=object)
+    reference['Region'] = pd.Series(COUNTRY_TO_REGION, dtype=object)
+    reference['Latitude'] = parse_coordinates(centroids['Latitude'])
+    reference['Longitude'] = parse_coordinates(centroids['Longitude'])
+    return reference
+
+
+# Compiled once at import; lookups are a single reindex against this frame
+COUNTRY_REFERENCE = build_country_reference()
+
+
+def lookup_country_reference(countries: pd.Series) -> pd.DataFrame:
+    """COUNTRY_REFERENCE row of every country (NaN row if unknown), aligned to countries"""
+    codes, (uniques,) = factorize_rows(countries)
+    reference = COUNTRY_REFERENCE.reindex(uniques).take(codes)
+    reference.index = countries.index
+    return reference
+
+
+def month_starts(years: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """First day of each (year, month) pair as datetime64[D]"""
+    return ((years - 1970) * 12 + (months - 1)).astype('datetime64[M]').astype('datetime64[D]')
+
+
+def expected_end_days(
+    start_years: np.ndarray,
+    start_months: np.ndarray,
+    start_days: np.ndarray,
+    end_years: np.ndarray,
+    end_months: np.ndarray,
+    duration_days: np.ndarray
+) -> np.ndarray:
+    """
+    Day of month on which an event is expected to end
+    Start date + duration on the real calendar, kept inside the known end month
+    """
+    start_months = np.clip(start_months, 1, 12)
+    end_months = np.clip(end_months, 1, 12)
+    
+    start_month_begin = month_starts(start_years, start_months)
+    start_month_length = (month_starts(start_years, start_months + 1) - start_month_begin).astype(int)
+    start_dates = start_month_begin + (np.clip(start_days, 1, start_month_length) - 1)
+    
+    end_month_begin = month_starts(end_years, end_months)
+    end_month_last = month_starts(end_years, end_months + 1) - 1
+    end_dates = np.clip(start_dates + duration_days, end_month_begin, end_month_last)
+    
+    return (end_dates - end_month_begin).astype(int) + 1
+
+
+# Reference year for Is_Recent (events in the last 10 years)
+CURRENT_YEAR = 2026
+
+
+def categorize_severity(deaths: float) -> int:
+    """Severity level from Total Deaths: 0 none, 1 minor (<10), 2 moderate (<100), 3 severe (<1000), 4 catastrophic"""
+    if deaths == 0:
+        return 0  # No Deaths
+    elif deaths < 10:
+        return 1  # Minor
+    elif deaths < 100:
+        return 2  # Moderate
+    elif deaths < 1000:
+        return 3  # Severe
+    else:
+        return 4  # Catastrophic
+
+
+def categorize_era(year: float) -> str:
+    """Data era of a year: Historical (<1990), Modern (<2010) or Recent"""
+    if year < 1990:
+        return 'Historical'
+    elif year < 2010:
+        return 'Modern'
+    else:
+        return 'Recent'
+
+
+def decade_label(decade) -> str:
+    """Decade_Label of a decade ('1990s')"""
+    return str(decade) + 's'
+
+
+def event_name(disaster_type, country, year) -> str:
+    """Event Name for an unnamed event: '<type> - <country> <year>'"""
+    return str(disaster_type) + ' - ' + str(country) + ' ' + str(year)
+
+
+def general_location(country) -> str:
+    """Location for an event only known at country level"""
+    return str(country) + ' (General)'
+
+
+def get_season(month: float) -> str:
+    """Season of a start month (meteorological, by month number), 'Unknown' if missing"""
+    if pd.isna(month):
+        return 'Unknown'
+    month = int(month)
+    if month in [12, 1, 2]:
+        return 'Winter'
+    elif month in [3, 4, 5]:
+        return 'Spring'
+    elif month in [6, 7, 8]:
+        return 'Summer'
+    else:
+        return 'Fall'
+
+
+# ============================================================================
+# PART 2C: PHASE PROFILING
+# ============================================================================
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident memory of this process so far (None where unavailable, e.g. Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # kB on Linux
+
+
+class PhaseProfiler:
+    """
+    Records wall time, CPU time, peak RSS growth and rows in/out for each
+    transform() phase. Pass one to transform(profiler=...); without it
+    transform() calls the phases directly (no overhead).
+    Repeated transforms (e.g. chunks) append to the same profiler.
+    """
+    
+    def __init__(self):
+        self.records = []
+    
+    def run(self, phase: str, method, df: pd.DataFrame) -> pd.DataFrame:
+        """Run one phase and record its cost"""
+        rows_in = len(df)
+        peak_before = peak_rss_bytes()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        
+        result = method(df)
+        
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        peak_after = peak_rss_bytes()
+        self.records.append({
+            'phase': phase,
+            'wall_s': wall,
+            'cpu_s': cpu,
+            'peak_rss_delta_mb': (peak_after - peak_before) / 1024**2 if peak_before is not None else None,
+            'rows_in': rows_in,
+            'rows_out': len(result),
+        })
+        return result
+    
+    def to_frame(self) -> pd.DataFrame:
+        """Per-phase totals (one row per phase, in pipeline order)"""
+        if not self.records:
+            return pd.DataFrame(columns=['phase', 'calls', 'wall_s', 'cpu_s', 'peak_rss_delta_mb', 'rows_in', 'rows_out'])
+        records = pd.DataFrame(self.records)
+        report = records.groupby('phase', sort=False).agg(
+            calls=('phase', 'size'),
+            wall_s=('wall_s', 'sum'),
+            cpu_s=('cpu_s', 'sum'),
+            peak_rss_delta_mb=('peak_rss_delta_mb', 'sum'),
+            rows_in=('rows_in', 'sum'),
+            rows_out=('rows_out', 'sum'),
+        ).reset_index()
+        report['wall_pct'] = report['wall_s'] / report['wall_s'].sum() * 100 if report['wall_s'].sum() > 0 else 0.0
+        return report
+    
+    def to_dict(self) -> dict:
+        """Structured report: per-phase totals plus overall totals"""
+        report = self.to_frame()
+        return {
+            'phases': report.to_dict(orient='records'),
+            'total': {
+                'wall_s': float(report['wall_s'].sum()),
+                'cpu_s': float(report['cpu_s'].sum()),
+                'peak_rss_delta_mb': float(report['peak_rss_delta_mb'].sum()),
+            },
+        }
+    
+    def to_json(self, path: Optional[str] = None) -> str:
+        """Report as JSON (also written to path if given)"""
+        text = json.dumps(self.to_dict(), indent=2, default=float)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+    
+    def print_report(self):
+        """Print the per-phase table"""
+        report = self.to_frame()
+        print(f"\n⏱️  Phase Timings:")
+        print(f"  {'Phase':<32} {'Wall (s)':>9} {'CPU (s)':>9} {'%':>6} {'Peak RSS +MB':>13} {'Rows in':>10} {'Rows out':>10}")
+        for row in report.itertuples(index=False):
+            print(f"  {row.phase:<32} {row.wall_s:>9.3f} {row.cpu_s:>9.3f} {row.wall_pct:>6.1f} "
+                  f"{row.peak_rss_delta_mb:>13.1f} {row.rows_in:>10,} {row.rows_out:>10,}")
+        print(f"  {'TOTAL':<32} {report['wall_s'].sum():>9.3f} {report['cpu_s'].sum():>9.3f}")
+
+
+# ============================================================================
+# PART 2D: KNN NEIGHBOR INDEX
+# ============================================================================
+
+class NeighborIndex:
+    """
+    Distance-weighted KNN imputation over a fixed training matrix, answered by KD-trees
+    instead of a brute-force scan of every training row.
+
+    Donors follow KNNImputer (nan_euclidean, weights='distance'): every training row observed
+    on the imputed column is a candidate, at the distance over the features both rows observe,
+    scaled by sqrt(n_features / n_common). That distance only depends on the two missing
+    patterns, so training rows are grouped by their own pattern; a query observed on features O
+    searches one tree per donor pattern D, over the O & D coordinates, and the k nearest of the
+    merged candidates are weighted as sklearn does. Columns without a donor fall back to their
+    training mean, as KNNImputer does. Trees are built the first time an (O & D, D) pair is
+    needed and kept, so a query costs O(n_patterns * log n_train) per row instead of O(n_train).
+    """
+
+    def __init__(self, train: np.ndarray, n_neighbors: int = 5):
+        self.train = np.asarray(train, dtype='float64')
+        self.n_neighbors = n_neighbors
+        self.observed = ~np.isnan(self.train)
+        self.column_means = np.nanmean(np.where(self.observed.any(axis=0), self.train, 0), axis=0)
+        self.donor_patterns, donor_codes = np.unique(self.observed, axis=0, return_inverse=True)
+        order = np.argsort(donor_codes.reshape(-1), kind='stable')
+        self.donor_rows = np.split(order, np.cumsum(np.bincount(donor_codes.reshape(-1)))[:-1])
+        self._trees = {}
+
+    def __getstate__(self) -> dict:
+        """Trees are rebuilt on demand, so pickles only carry the training matrix"""
+        state = self.__dict__.copy()
+        state['_trees'] = {}
+        return state
+
+    def _tree(self, features: Tuple[int, ...], pattern: int):
+        """KD-tree over the training rows with donor pattern `pattern`, in the `features` coordinates"""
+        key = (features, pattern)
+        if key not in self._trees:
+            from sklearn.neighbors import KDTree
+            self._trees[key] = KDTree(self.train[self.donor_rows[pattern]][:, list(features)])
+        return self._trees[key]
+
+    def impute(self, queries: np.ndarray, columns: List[int]) -> np.ndarray:
+        """
+        Values of `columns` for each query row: observed values are kept, missing ones imputed
+
+        Parameters:
+        -----------
+        queries : Rows in the training feature space (NaN where missing)
+        columns : Feature positions to return
+        """
+        queries = np.asarray(queries, dtype='float64')
+        result = queries[:, columns].copy()
+        missing = np.isnan(queries)
+        n_features = queries.shape[1]
+
+        patterns, pattern_codes = np.unique(missing, axis=0, return_inverse=True)
+        pattern_codes = pattern_codes.reshape(-1)
+        for code, pattern in enumerate(patterns):
+            targets = [(out_col, target) for out_col, target in enumerate(columns) if pattern[target]]
+            if not targets:
+                continue
+            rows = np.flatnonzero(pattern_codes == code)
+
+            # Nearest rows of each donor pattern sharing at least one observed feature
+            candidates = []
+            for donor_code, donor_observed in enumerate(self.donor_patterns):
+                features = tuple(np.flatnonzero(~pattern & donor_observed))
+                if not features or not any(donor_observed[target] for _, target in targets):
+                    continue
+                donor_rows = self.donor_rows[donor_code]
+                distances, neighbors = self._tree(features, donor_code).query(
+                    queries[np.ix_(rows, features)], k=min(self.n_neighbors, len(donor_rows))
+                )
+                candidates.append((donor_observed, distances * np.sqrt(n_features / len(features)), donor_rows[neighbors]))
+
+            for out_col, target in targets:
+                usable = [(distances, donors) for donor_observed, distances, donors in candidates if donor_observed[target]]
+                if not usable:
+                    result[rows, out_col] = self.column_means[target]
+                    continue
+
+                distances = np.hstack([distances for distances, _ in usable])
+                donors = np.hstack([donors for _, donors in usable])
+                k = min(self.n_neighbors, distances.shape[1])
+                if k < distances.shape[1]:
+                    nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+                    distances = np.take_along_axis(distances, nearest, axis=1)
+                    donors = np.take_along_axis(donors, nearest, axis=1)
+
+                # Inverse-distance weights; exact matches take all the weight (as sklearn)
+                with np.errstate(divide='ignore'):
+                    weights = 1.0 / distances
+                exact = distances == 0
+                has_exact = exact.any(axis=1)
+                weights[has_exact] = exact[has_exact]
+                result[rows, out_col] = (weights * self.train[donors, target]).sum(axis=1) / weights.sum(axis=1)
+        return result
+
+
 # ============================================================================
 # PART 3: CORE PREPROCESSING CLASS
 # ============================================================================
@@ -350,23 +850,61 @@ class DisasterDataPreprocessor:
     Handles: GLIDE parsing, intelligent imputation, validation, feature engineering
     """
     
-    def __init__(self):
+    def __init__(self, knn_mode: str = 'index', knn_chunk_size: int = 5000):
+        """
+        Parameters:
+        -----------
+        knn_mode : 'index' queries a KD-tree neighbor index over the training matrix kept by fit() (default)
+                   'batch' re-fits the KNN imputer on every transformed batch (legacy, brute force)
+        knn_chunk_size : Rows per KNN query chunk in 'index' mode (bounds memory)
+        """
+        if knn_mode not in ('index', 'batch'):
+            raise ValueError(f"knn_mode must be 'index' or 'batch', got {knn_mode!r}")
+        
         self.fitted = False
         
         # Statistics to learn from training data
         self.median_deaths_by_type = {}
         self.median_injured_by_type = {}
         self.median_affected_by_group = {}  # Will use (country, type, decade)
+        self.median_affected_by_type = {}   # Fallback when a group is unseen
         self.median_damages_by_type = {}
         
-        # KNN Imputer for correlated numerical features
-        self.knn_imputer = KNNImputer(n_neighbors=5, weights='distance')
+        # KNN imputation for correlated numerical features
+        # 'index' mode: neighbor index over the scaled training matrix, built in fit()
+        # 'batch' mode: the KNN imputer is re-fitted on every batch
+        self.knn_mode = knn_mode
+        self.knn_chunk_size = knn_chunk_size
+        self.knn_imputer = KNNImputer(n_neighbors=5, weights='distance', keep_empty_features=True)
+        self.knn_index = None
         self.impact_scaler = StandardScaler()
         self.knn_fitted = False
+        self.knn_impact_cols = []
+        self.knn_year_range = (0, 0)
+        self.knn_top_disaster_types = []
         
         # Sequence number tracker for GLIDE construction
         self.sequence_counter = {}
         
+        # Fitted fills for fields that would otherwise depend on the batch
+        self.dis_mag_scale_mode = None
+        self.seq_counter = None             # Last Seq handed out to a row missing it
+        self.median_cpi_by_year = {}
+        self.median_cpi = None
+    
+    def __setstate__(self, state: dict):
+        """Restore a pickled preprocessor, defaulting statistics added in later versions"""
+        self.__init__()
+        self.__dict__.update(state)
+        
+        # Pickles from before the fitted neighbor index keep the legacy per-batch mode
+        if 'knn_mode' not in state:
+            self.knn_mode = 'batch'
+        
+        # Index-mode pickles from before NeighborIndex kept the training matrix in the imputer
+        if self.knn_mode == 'index' and self.knn_index is None and hasattr(self.knn_imputer, '_fit_X'):
+            self.knn_index = NeighborIndex(self.knn_imputer._fit_X, self.knn_imputer.n_neighbors)
+        
     def fit(self, df: pd.DataFrame) -> 'DisasterDataPreprocessor':
         """
         Learn statistics from training data
@@ -377,41 +915,60 @@ class DisasterDataPreprocessor:
         print("=" * 80)
         
         # Learn median values for imputation
-        self.median_deaths_by_type = df.groupby('Disaster Type')['Total Deaths'].median().to_dict()
-        self.median_injured_by_type = df.groupby('Disaster Type')['No Injured'].median().to_dict()
-        self.median_damages_by_type = df.groupby('Disaster Type')["Total Damages ('000 US$)"].median().to_dict()
+        self.median_deaths_by_type = df.groupby('Disaster Type', observed=True)['Total Deaths'].median().to_dict()
+        self.median_injured_by_type = df.groupby('Disaster Type', observed=True)['No Injured'].median().to_dict()
+        self.median_damages_by_type = df.groupby('Disaster Type', observed=True)["Total Damages ('000 US$)"].median().to_dict()
+        self.median_affected_by_type = df.groupby('Disaster Type', observed=True)['No Affected'].median().to_dict()
+        
+        # Learn fills that must not depend on which rows are transformed together
+        if 'Dis Mag Scale' in df.columns:
+            most_common = df['Dis Mag Scale'].mode()
+            self.dis_mag_scale_mode = most_common[0] if len(most_common) > 0 else 'Unknown'
+        if 'Seq' in df.columns:
+            max_seq = df['Seq'].max() if df['Seq'].notna().any() else 0
+            self.seq_counter = max(int(max_seq), self.seq_counter or 0)
+        if 'CPI' in df.columns:
+            self.median_cpi_by_year = df.groupby('Year', observed=True)['CPI'].median().to_dict()
+            self.median_cpi = df['CPI'].median()
         
         # Learn median affected by (Country, Disaster Type, Decade)
         # This is more granular for better imputation
         df_temp = df.copy()
         df_temp['Decade'] = (df_temp['Year'] // 10) * 10
-        grouped = df_temp.groupby(['Country', 'Disaster Type', 'Decade'])['No Affected'].median()
+        grouped = df_temp.groupby(['Country', 'Disaster Type', 'Decade'], observed=True)['No Affected'].median()
         self.median_affected_by_group = grouped.to_dict()
         
         # Track max sequence numbers per year for GLIDE construction
-        glide_parsed = df['Glide'].apply(parse_glide)
-        for idx, parsed in glide_parsed.items():
-            if parsed['year'] and parsed['sequence']:
-                year = parsed['year']
-                seq = parsed['sequence']
-                if year not in self.sequence_counter:
-                    self.sequence_counter[year] = seq
-                else:
-                    self.sequence_counter[year] = max(self.sequence_counter[year], seq)
+        glide_parsed = parse_glide_series(df['Glide'])
+        valid = (glide_parsed['year'] > 0) & (glide_parsed['sequence'] > 0)
+        max_seq_by_year = glide_parsed[valid.fillna(False)].groupby('year')['sequence'].max()
+        for year, seq in max_seq_by_year.items():
+            year, seq = int(year), int(seq)
+            self.sequence_counter[year] = max(self.sequence_counter.get(year, seq), seq)
         
         # Fit KNN Imputer on impact metrics (correlated features)
         impact_cols = ['Total Deaths', 'No Injured', 'No Affected', 'No Homeless', "Total Damages ('000 US$)"]
-        impact_data = df[impact_cols].copy()
+        optional_cols = [col for col in ['Total Affected', 'CPI'] if col in df.columns]
+        self.knn_impact_cols = impact_cols + optional_cols
+        impact_data = df[self.knn_impact_cols].copy()
+        
+        # Contextual features are fixed at fit time so every batch is encoded identically
+        self.knn_year_range = (df['Year'].min(), df['Year'].max())
+        self.knn_top_disaster_types = df['Disaster Type'].value_counts().head(10).index.tolist()
         
-        # Replace 0s with NaN temporarily to let KNN learn patterns (disasters often have 0 impact)
-        # But keep track of original zeros
         try:
             # Fit scaler on non-null values
             mask = impact_data.notna()
             if mask.any().any():
                 self.impact_scaler.fit(impact_data[mask.any(axis=1)])
+                
+                # Build the neighbor index once over the scaled training matrix
+                if self.knn_mode == 'index':
+                    train = self._knn_features(df).to_numpy(dtype='float64', na_value=np.nan)
+                    self.knn_index = NeighborIndex(train, self.knn_imputer.n_neighbors)
+                
                 self.knn_fitted = True
-                print("✓ KNN imputer fitted on impact metrics")
+                print(f"✓ KNN imputer fitted on impact metrics ({self.knn_mode} mode)")
             else:
                 self.knn_fitted = False
                 print("⚠ Warning: Not enough data to fit KNN imputer")
@@ -423,69 +980,28 @@ class DisasterDataPreprocessor:
         print("✓ Preprocessor fitted successfully!")
         return self
     
-    def transform(self, df: pd.DataFrame, is_training: bool = False) -> pd.DataFrame:
+    def transform(
+        self,
+        df: pd.DataFrame,
+        is_training: bool = False,
+        profiler: Optional[PhaseProfiler] = None
+    ) -> pd.DataFrame:
         """
         Apply preprocessing transformations
         Works on both training and new data automatically
         
         Parameters:
         -----------
-        df : DataFrame to transform
+        df : DataFrame to transform (never modified)
         is_training : If True, allows row dropping. If False (production), keeps all rows
+        profiler : If given, records time, memory and row counts of every phase
         """
         print("\n" + "=" * 80)
         print(f"PREPROCESSING DATA ({'TRAINING' if is_training else 'PRODUCTION'} MODE)")
         print("=" * 80)
         print(f"Initial shape: {df.shape}")
         
-        df = df.copy()
-        
-        # PHASE 1: Parse GLIDE codes
-        print("\n[1/10] Parsing GLIDE codes...")
-        df = self._parse_glide_codes(df)
-        
-        # PHASE 2: Drop critical missing rows (ONLY in training)
-        if is_training:
-            print("\n[2/10] Dropping rows with missing critical fields...")
-            df = self._drop_critical_missing(df)
-        else:
-            print("\n[2/10] Skipping row drops (production mode)")
-        
-        # PHASE 3: Use GLIDE to impute features
-        print("\n[3/10] Imputing features from GLIDE...")
-        df = self._impute_from_glide(df)
-        
-        # PHASE 4: Use features to impute GLIDE
-        print("\n[4/10] Constructing missing GLIDE codes...")
-        df = self._construct_missing_glide(df)
-        
-        # PHASE 5: Impute geographic features
-        print("\n[5/10] Imputing geographic features...")
-        df = self._impute_geographic(df)
-        
-        # PHASE 6: Create data quality flags (BEFORE imputation!)
-        print("\n[6/10] Creating data quality flags...")
-        df = self._create_quality_flags(df)
-        
-        # PHASE 7: Impute temporal features
-        print("\n[7/10] Imputing temporal features...")
-        df = self._impute_temporal(df)
-        
-        # PHASE 7.5: Impute categorical and binary fields
-        print("\n[7.5/10] Imputing categorical and binary fields...")
-        df = self._impute_categorical_and_binary(df)
-        
-        # PHASE 8: Impute impact metrics
-        print("\n[8/10] Imputing impact metrics...")
-        df = self._impute_impact_metrics(df)
-        
-        # PHASE 9: Feature engineering
-        print("\n[9/10] Engineering new features...")
-        df = self._engineer_features(df)
-        
-        # PHASE 10: Final cleaning
-        print("\n[10/10] Final data cleaning...")
-        df = self._final_cleaning(df)
+        df = TransformPlan(self, is_training).run(df, profiler)
         
         print("\n" + "=" * 80)
         print(f"PREPROCESSING COMPLETE!")
@@ -494,14 +1010,20 @@ class DisasterDataPreprocessor:
         
         return df
     
+    def _run_phase(self, profiler: Optional[PhaseProfiler], phase: str, method, df: pd.DataFrame) -> pd.DataFrame:
+        """Run a transform phase, through the profiler if one is attached"""
+        if profiler is None:
+            return method(df)
+        return profiler.run(phase, method, df)
+    
     def _parse_glide_codes(self, df: pd.DataFrame) -> pd.DataFrame:
         """Parse all GLIDE codes and extract components"""
-        glide_parsed = df['Glide'].apply(parse_glide)
+        glide_parsed = parse_glide_series(df['Glide'])
         
-        df['GLIDE_Type_Code'] = glide_parsed.apply(lambda x: x['type_code'])
-        df['GLIDE_Year'] = glide_parsed.apply(lambda x: x['year'])
-        df['GLIDE_Sequence'] = glide_parsed.apply(lambda x: x['sequence'])
-        df['GLIDE_Country_ISO'] = glide_parsed.apply(lambda x: x['country_code'])
+        df['GLIDE_Type_Code'] = glide_parsed['type_code']
+        df['GLIDE_Year'] = glide_parsed['year']
+        df['GLIDE_Sequence'] = glide_parsed['sequence']
+        df['GLIDE_Country_ISO'] = glide_parsed['country_code']
         
         print(f"  ✓ Parsed {df['GLIDE_Type_Code'].notna().sum()} GLIDE codes")
         return df
@@ -525,29 +1047,31 @@ class DisasterDataPreprocessor:
         
         # 1. Disaster Type from GLIDE
         mask = df['Disaster Type'].isna() & df['GLIDE_Type_Code'].notna()
-        df.loc[mask, 'Disaster Type'] = df.loc[mask, 'GLIDE_Type_Code'].map(GLIDE_TYPE_TO_DISASTER)
+        assign_rows(df, 'Disaster Type', mask, df.loc[mask, 'GLIDE_Type_Code'].map(GLIDE_TYPE_TO_DISASTER))
         filled_type = mask.sum()
         
         # 2. Year from GLIDE
-        mask = df['Year'].isna() & df['GLIDE_Year'].notna()
-        df.loc[mask, 'Year'] = df.loc[mask, 'GLIDE_Year']
+        has_glide_year = df['GLIDE_Year'].notna()
+        mask = df['Year'].isna() & has_glide_year
+        assign_rows(df, 'Year', mask, df.loc[mask, 'GLIDE_Year'])
         filled_year = mask.sum()
         
         # 3. Start Year from GLIDE
-        mask = df['Start Year'].isna() & df['GLIDE_Year'].notna()
-        df.loc[mask, 'Start Year'] = df.loc[mask, 'GLIDE_Year']
+        mask = df['Start Year'].isna() & has_glide_year
+        assign_rows(df, 'Start Year', mask, df.loc[mask, 'GLIDE_Year'])
         filled_start_year = mask.sum()
         
         # 4. Country from GLIDE ISO code
-        mask = df['Country'].isna() & df['GLIDE_Country_ISO'].notna()
-        df.loc[mask, 'Country'] = df.loc[mask, 'GLIDE_Country_ISO'].map(ISO_TO_COUNTRY)
+        has_glide_iso = df['GLIDE_Country_ISO'].notna()
+        mask = df['Country'].isna() & has_glide_iso
+        assign_rows(df, 'Country', mask, df.loc[mask, 'GLIDE_Country_ISO'].map(ISO_TO_COUNTRY))
         filled_country = mask.sum()
         
         # 5. ISO code directly from GLIDE
         if 'ISO' not in df.columns:
             df['ISO'] = None
-        mask = df['ISO'].isna() & df['GLIDE_Country_ISO'].notna()
-        df.loc[mask, 'ISO'] = df.loc[mask, 'GLIDE_Country_ISO']
+        mask = df['ISO'].isna() & has_glide_iso
+        assign_rows(df, 'ISO', mask, df.loc[mask, 'GLIDE_Country_ISO'])
         filled_iso = mask.sum()
         
         print(f"  ✓ Filled from GLIDE: Type={filled_type}, Year={filled_year}, Country={filled_country}")
@@ -561,61 +1085,63 @@ class DisasterDataPreprocessor:
             print(f"  ✓ No missing GLIDE codes to construct")
             return df
         
-        constructed_count = 0
+        # Only rows with type, year and country consume a sequence number
+        eligible = mask & df['Disaster Type'].notna() & df['Year'].notna() & df['Country'].notna()
+        if not eligible.any():
+            print(f"  ✓ Constructed 0 GLIDE codes")
+            return df
         
-        for idx in df[mask].index:
-            disaster_type = df.loc[idx, 'Disaster Type']
-            year = df.loc[idx, 'Year']
-            country = df.loc[idx, 'Country']
-            
-            if pd.notna(disaster_type) and pd.notna(year) and pd.notna(country):
-                # Get or create sequence number
-                year_int = int(year)
-                if year_int not in self.sequence_counter:
-                    self.sequence_counter[year_int] = 1
-                else:
-                    self.sequence_counter[year_int] += 1
-                
-                sequence = self.sequence_counter[year_int]
-                
-                # Construct GLIDE
-                glide = construct_glide(disaster_type, year_int, sequence, country)
-                if glide:
-                    df.loc[idx, 'Glide'] = glide
-                    constructed_count += 1
+        glides = self._next_glides(df.loc[eligible, ['Disaster Type', 'Year', 'Country']])
+        assign_rows(df, 'Glide', eligible, glides.to_numpy())
+        constructed_count = glides.notna().sum()
         
         print(f"  ✓ Constructed {constructed_count} GLIDE codes")
         return df
     
+    def _next_glides(self, rows: pd.DataFrame) -> pd.Series:
+        """
+        GLIDE codes for rows with Disaster Type, Year and Country, taking the next sequence numbers
+        Sequences are consecutive per year and continue from (then advance) the stored maximum
+        """
+        years = rows['Year'].astype(int)
+        
+        offsets = years.map(self.sequence_counter).fillna(0).astype(int)
+        sequences = offsets + years.groupby(years).cumcount() + 1
+        
+        for year, seq in sequences.groupby(years).max().items():
+            self.sequence_counter[int(year)] = int(seq)
+        
+        return construct_glide_series(rows['Disaster Type'], years, sequences, rows['Country'])
+    
     def _impute_geographic(self, df: pd.DataFrame) -> pd.DataFrame:
         """Impute geographic features: Continent, Region, Lat/Lon"""
         
+        # One lookup of every unique Country against the reference table
+        reference = lookup_country_reference(df['Country'])
+        has_country = df['Country'].notna()
+        
         # 1. Continent from Country
-        mask = df['Continent'].isna() & df['Country'].notna()
-        df.loc[mask, 'Continent'] = df.loc[mask, 'Country'].map(COUNTRY_TO_CONTINENT)
+        mask = df['Continent'].isna() & has_country
+        df['Continent'] = df['Continent'].fillna(reference['Continent'])
         filled_continent = mask.sum()
         
         # 2. Region from Country
         if 'Region' not in df.columns:
             df['Region'] = None
-        mask = df['Region'].isna() & df['Country'].notna()
-        df.loc[mask, 'Region'] = df.loc[mask, 'Country'].map(COUNTRY_TO_REGION)
+        mask = df['Region'].isna() & has_country
+        df['Region'] = df['Region'].fillna(reference['Region'])
         filled_region = mask.sum()
         
-        # 3. Latitude/Longitude from Country centroids
-        # Handle Latitude
-        mask = df['Latitude'].isna() & df['Country'].notna()
-        for country, coords in COUNTRY_CENTROIDS.items():
-            country_mask = mask & (df['Country'] == country)
-            df.loc[country_mask, 'Latitude'] = coords[0]
+        # 3. Latitude/Longitude from Country centroids (as signed decimal degrees)
+        mask = df['Latitude'].isna() & has_country
+        df['Latitude'] = parse_coordinates(df['Latitude']).fillna(
+            reference['Latitude']
+        )
         filled_lat = mask.sum()
         
-        # Handle Longitude
-        mask = df['Longitude'].isna() & df['Country'].notna()
-        for country, coords in COUNTRY_CENTROIDS.items():
-            country_mask = mask & (df['Country'] == country)
-            df.loc[country_mask, 'Longitude'] = coords[1]
-        filled_lon = mask.sum()
+        df['Longitude'] = parse_coordinates(df['Longitude']).fillna(
+            reference['Longitude']
+        )
         
         print(f"  ✓ Filled geographic: Continent={filled_continent}, Region={filled_region}, Coords={filled_lat}")
         return df
@@ -640,38 +1166,57 @@ class DisasterDataPreprocessor:
         
         # 1. Start Month - default to July (mid-year)
         mask = df['Start Month'].isna()
-        df.loc[mask, 'Start Month'] = 7
+        assign_rows(df, 'Start Month', mask, 7)
         filled_month = mask.sum()
         
         # 2. Start Day - default to 15 (mid-month)
         mask = df['Start Day'].isna()
-        df.loc[mask, 'Start Day'] = 15
+        assign_rows(df, 'Start Day', mask, 15)
         filled_day = mask.sum()
         
         # 3. End Year - use Start Year + disaster duration
         mask = df['End Year'].isna() & df['Start Year'].notna()
-        df.loc[mask, 'End Year'] = df.loc[mask, 'Start Year']
+        assign_rows(df, 'End Year', mask, df.loc[mask, 'Start Year'])
         
-        # 4. End Month - based on disaster type duration
+        # 4. End Month - based on disaster type duration (whole months, rolling over into later years)
+        duration = (
+            df['Disaster Type'].map(DISASTER_DURATION_DAYS)
+            .fillna(DISASTER_DURATION_DAYS['Default'])
+            .to_numpy(dtype=int)
+        )
         mask = df['End Month'].isna() & df['Start Month'].notna() & df['Disaster Type'].notna()
-        for idx in df[mask].index:
-            disaster_type = df.loc[idx, 'Disaster Type']
-            start_month = df.loc[idx, 'Start Month']
-            duration = DISASTER_DURATION_DAYS.get(disaster_type, DISASTER_DURATION_DAYS['Default'])
-            
-            # Simple approximation: add duration as months
-            end_month = start_month + (duration // 30)
-            if end_month > 12:
-                end_month = 12
-                df.loc[idx, 'End Year'] = df.loc[idx, 'Start Year'] + 1
+        if mask.any():
+            rows = mask.to_numpy()
+            months_elapsed = (df.loc[mask, 'Start Month'].to_numpy(dtype=int) - 1) + duration[rows] // 30
+            years_elapsed = months_elapsed // 12
             
-            df.loc[idx, 'End Month'] = end_month
+            end_years = np.where(
+                years_elapsed > 0,
+                df.loc[mask, 'Start Year'].to_numpy() + years_elapsed,
+                df.loc[mask, 'End Year'].to_numpy()
+            )
+            assign_rows(df, 'End Month', mask, months_elapsed % 12 + 1)
+            assign_rows(df, 'End Year', mask, end_years)
         
         filled_end = mask.sum()
         
-        # 5. End Day - use start day + duration
+        # 5. End Day - start date + duration on the calendar, within the end month
         mask = df['End Day'].isna() & df['Start Day'].notna()
-        df.loc[mask, 'End Day'] = df.loc[mask, 'Start Day']
+        dated = mask & df[['Start Year', 'End Year', 'End Month']].notna().all(axis=1)
+        if dated.any():
+            rows = dated.to_numpy()
+            assign_rows(df, 'End Day', dated, expected_end_days(
+                df.loc[dated, 'Start Year'].to_numpy(dtype=int),
+                df.loc[dated, 'Start Month'].to_numpy(dtype=int),
+                df.loc[dated, 'Start Day'].to_numpy(dtype=int),
+                df.loc[dated, 'End Year'].to_numpy(dtype=int),
+                df.loc[dated, 'End Month'].to_numpy(dtype=int),
+                duration[rows]
+            ))
+        
+        # Without a full end date, fall back to the start day
+        undated = mask & ~dated
+        assign_rows(df, 'End Day', undated, df.loc[undated, 'Start Day'])
         
         print(f"  ✓ Filled temporal: Month={filled_month}, Day={filled_day}, EndDate={filled_end}")
         return df
@@ -686,48 +1231,38 @@ class DisasterDataPreprocessor:
         # 2. Event Name - construct from available data
         if 'Event Name' in df.columns:
             mask = df['Event Name'].isna()
-            df.loc[mask, 'Event Name'] = (
-                df.loc[mask, 'Disaster Type'].astype(str) + ' - ' +
-                df.loc[mask, 'Country'].astype(str) + ' ' +
-                df.loc[mask, 'Year'].astype(str)
-            )
+            assign_rows(df, 'Event Name', mask, map_unique(
+                event_name, df.loc[mask, 'Disaster Type'], df.loc[mask, 'Country'], df.loc[mask, 'Year']
+            ))
         
         # 3. Location - use country or "Unknown"
         if 'Location' in df.columns:
             mask = df['Location'].isna() & df['Country'].notna()
-            df.loc[mask, 'Location'] = df.loc[mask, 'Country'].astype(str) + ' (General)'
+            assign_rows(df, 'Location', mask, map_unique(general_location, df.loc[mask, 'Country']))
             df['Location'] = df['Location'].fillna('Unknown Location')
         
         # 4. Disaster Subtype - use Disaster Type as fallback
         if 'Disaster Subtype' in df.columns:
             df['Disaster Subtype'] = df['Disaster Subtype'].fillna(df['Disaster Type'])
         
-        # 5. Disaster Group - derive from Disaster Type if possible
-        if 'Disaster Group' in df.columns:
-            mask = df['Disaster Group'].isna() & df['Disaster Type'].notna()
-            for disaster_type, group in DISASTER_TO_GROUP.items():
-                type_mask = mask & (df['Disaster Type'] == disaster_type)
-                df.loc[type_mask, 'Disaster Group'] = group
-            
-            # Additional specific mappings for common types not in dictionary
-            mask = df['Disaster Group'].isna() & df['Disaster Type'].notna()
-            df.loc[mask & (df['Disaster Type'].str.contains('flood', case=False, na=False)), 'Disaster Group'] = 'Hydrological'
-            df.loc[mask & (df['Disaster Type'].str.contains('storm|cyclone|wind', case=False, na=False)), 'Disaster Group'] = 'Meteorological'
-            df.loc[mask & (df['Disaster Type'].str.contains('earthquake|seismic|volcano', case=False, na=False)), 'Disaster Group'] = 'Geophysical'
-            df.loc[mask & (df['Disaster Type'].str.contains('drought|fire|temperature', case=False, na=False)), 'Disaster Group'] = 'Climatological'
-            df.loc[mask & (df['Disaster Type'].str.contains('epidemic|disease|infection', case=False, na=False)), 'Disaster Group'] = 'Biological'
-            
-            # Final fallback to "Other"
-            df['Disaster Group'] = df['Disaster Group'].fillna('Other')
-        
-        # 6. Disaster Subgroup - use Group or Type as fallback
+        # 5-6. Disaster Subgroup - use the Disaster Group (imputed from Disaster Type) or Type as fallback
+        #      Feature engineering re-derives Disaster Group for every row, so the imputed
+        #      group is only worked out for the rows whose Subgroup reads it
         if 'Disaster Subgroup' in df.columns:
-            # Fallback to Group or Type
             mask = df['Disaster Subgroup'].isna()
             if 'Disaster Group' in df.columns:
-                df.loc[mask, 'Disaster Subgroup'] = df.loc[mask, 'Disaster Group']
+                groups = df.loc[mask, 'Disaster Group']
+                types = df.loc[mask, 'Disaster Type']
+                
+                # Group dictionary first, then the keyword patterns (once per unique type), then "Other"
+                unknown = groups.isna() & types.notna()
+                groups = groups.where(~unknown, map_unique(DISASTER_TO_GROUP, types))
+                unknown = groups.isna() & types.notna()
+                if unknown.any():
+                    groups = groups.where(~unknown, classify_disaster_groups(types[unknown]))
+                assign_rows(df, 'Disaster Subgroup', mask, groups.fillna('Other'))
             else:
-                df.loc[mask, 'Disaster Subgroup'] = df.loc[mask, 'Disaster Type']
+                assign_rows(df, 'Disaster Subgroup', mask, df.loc[mask, 'Disaster Type'])
         
         # 7. Appeal - binary, fill with "No"
         if 'Appeal' in df.columns:
@@ -738,12 +1273,16 @@ class DisasterDataPreprocessor:
             df['Declaration'] = df['Declaration'].fillna('No')
         
         # 9. Dis Mag Scale - fill with most common or "Unknown"
+        #    (fitted mode when available, so every batch gets the same fill)
         if 'Dis Mag Scale' in df.columns:
-            most_common = df['Dis Mag Scale'].mode()
-            if len(most_common) > 0:
-                df['Dis Mag Scale'] = df['Dis Mag Scale'].fillna(most_common[0])
+            if self.dis_mag_scale_mode is not None:
+                df['Dis Mag Scale'] = df['Dis Mag Scale'].fillna(self.dis_mag_scale_mode)
             else:
-                df['Dis Mag Scale'] = df['Dis Mag Scale'].fillna('Unknown')
+                most_common = df['Dis Mag Scale'].mode()
+                if len(most_common) > 0:
+                    df['Dis Mag Scale'] = df['Dis Mag Scale'].fillna(most_common[0])
+                else:
+                    df['Dis Mag Scale'] = df['Dis Mag Scale'].fillna('Unknown')
         
         # 9a. Dis Mag Value - fill with 0 (many disasters don't have magnitude)
         if 'Dis Mag Value' in df.columns:
@@ -752,28 +1291,33 @@ class DisasterDataPreprocessor:
         # 10. ISO - derive from Country
         if 'ISO' in df.columns:
             mask = df['ISO'].isna() & df['Country'].notna()
-            df.loc[mask, 'ISO'] = df.loc[mask, 'Country'].map(COUNTRY_TO_ISO)
+            assign_rows(df, 'ISO', mask, map_unique(COUNTRY_TO_ISO, df.loc[mask, 'Country']))
         
         # 11. Seq - fill with sequential numbers if missing
+        #     (fitted: continue from the stored counter, so consecutive batches never overlap)
         if 'Seq' in df.columns:
             mask = df['Seq'].isna()
             if mask.sum() > 0:
-                max_seq = df['Seq'].max() if df['Seq'].notna().any() else 0
-                df.loc[mask, 'Seq'] = range(int(max_seq) + 1, int(max_seq) + 1 + mask.sum())
+                if self.seq_counter is not None:
+                    max_seq = self.seq_counter
+                    self.seq_counter += int(mask.sum())
+                else:
+                    max_seq = df['Seq'].max() if df['Seq'].notna().any() else 0
+                assign_rows(df, 'Seq', mask, range(int(max_seq) + 1, int(max_seq) + 1 + mask.sum()))
         
         # 12. Glide - try to construct if still missing after Phase 4
         # (This handles cases where construction failed)
         if 'Glide' in df.columns:
             mask = df['Glide'].isna()
-            df.loc[mask, 'Glide'] = 'UNKNOWN-' + df.loc[mask, 'Year'].astype(str)
+            assign_rows(df, 'Glide', mask, 'UNKNOWN-' + df.loc[mask, 'Year'].astype(str))
         
         # 13. GLIDE components - if still missing after construction
+        # (components are categorical after parsing, so fill on object values and re-encode)
         if 'GLIDE_Type_Code' in df.columns:
-            mask = df['GLIDE_Type_Code'].isna() & df['Disaster Type'].notna()
-            for disaster_type, code in DISASTER_TO_GLIDE_TYPE.items():
-                type_mask = mask & (df['Disaster Type'] == disaster_type)
-                df.loc[type_mask, 'GLIDE_Type_Code'] = code
-            df['GLIDE_Type_Code'] = df['GLIDE_Type_Code'].fillna('XX')
+            type_codes = map_unique(DISASTER_TO_GLIDE_TYPE, df['Disaster Type'])
+            df['GLIDE_Type_Code'] = (
+                df['GLIDE_Type_Code'].astype(object).fillna(type_codes).fillna('XX').astype('category')
+            )
         
         if 'GLIDE_Year' in df.columns:
             df['GLIDE_Year'] = df['GLIDE_Year'].fillna(df['Year'])
@@ -782,9 +1326,10 @@ class DisasterDataPreprocessor:
             df['GLIDE_Sequence'] = df['GLIDE_Sequence'].fillna(0)
         
         if 'GLIDE_Country_ISO' in df.columns:
-            mask = df['GLIDE_Country_ISO'].isna() & df['Country'].notna()
-            df.loc[mask, 'GLIDE_Country_ISO'] = df.loc[mask, 'Country'].map(COUNTRY_TO_ISO)
-            df['GLIDE_Country_ISO'] = df['GLIDE_Country_ISO'].fillna('XX')
+            iso_codes = map_unique(COUNTRY_TO_ISO, df['Country'])
+            df['GLIDE_Country_ISO'] = (
+                df['GLIDE_Country_ISO'].astype(object).fillna(iso_codes).fillna('XX').astype('category')
+            )
         
         print(f"  ✓ Imputed all categorical and binary fields")
         return df
@@ -813,31 +1358,11 @@ class DisasterDataPreprocessor:
             # Use KNN Imputation for correlated impact metrics
             print(f"  → Using KNN imputation for {missing_before} missing values in impact metrics")
             
-            # Create feature matrix for KNN
-            # Add contextual features to help KNN: Year, Disaster Type (encoded)
-            knn_features = df[impact_cols].copy()
-            
-            # Add Year as a feature (normalized)
-            knn_features['Year_norm'] = (df['Year'] - df['Year'].min()) / (df['Year'].max() - df['Year'].min())
-            
-            # Add Disaster Type as one-hot encoding
-            disaster_dummies = pd.get_dummies(df['Disaster Type'], prefix='DisType')
-            # Only keep top 10 disaster types to avoid too many features
-            top_disasters = df['Disaster Type'].value_counts().head(10).index
-            for disaster in top_disasters:
-                col_name = f'DisType_{disaster}'
-                if col_name in disaster_dummies.columns:
-                    knn_features[col_name] = disaster_dummies[col_name]
-            
             try:
-                # Apply KNN imputation
-                knn_imputed = self.knn_imputer.fit_transform(knn_features)
-                
-                # Extract only the impact columns (not the helper features)
-                for i, col in enumerate(impact_cols):
-                    df[col] = knn_imputed[:, i]
-                    # Ensure no negative values
-                    df[col] = df[col].clip(lower=0)
+                if self.knn_mode == 'index':
+                    self._knn_index_imputation(df)
+                else:
+                    self._knn_batch_imputation(df, impact_cols)
                 
                 print(f"  ✓ KNN imputation completed successfully")
                 
@@ -859,56 +1384,126 @@ class DisasterDataPreprocessor:
         # Ensure Total Affected is computed if  missing
         if 'Total Affected' in df.columns:
             mask = df['Total Affected'].isna() | (df['Total Affected'] == 0)
-            df.loc[mask, 'Total Affected'] = (
+            assign_rows(df, 'Total Affected', mask, (
                 df.loc[mask, 'No Injured'].fillna(0) +
                 df.loc[mask, 'No Affected'].fillna(0) +
                 df.loc[mask, 'No Homeless'].fillna(0)
-            )
+            ))
         
         print(f"  ✓ Impact metrics imputation complete")
         return df
     
+    def _knn_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        KNN feature matrix built from fitted statistics only
+        Scaled impact metrics + normalized Year + one-hot of the fitted top disaster types
+        """
+        impact_data = df.reindex(columns=self.knn_impact_cols).astype(float)
+        features = pd.DataFrame(
+            self.impact_scaler.transform(impact_data),
+            columns=self.knn_impact_cols,
+            index=df.index
+        )
+        
+        year_min, year_max = self.knn_year_range
+        features['Year_norm'] = (df['Year'] - year_min) / ((year_max - year_min) or 1)
+        
+        for disaster in self.knn_top_disaster_types:
+            features[f'DisType_{disaster}'] = (df['Disaster Type'] == disaster).astype(float)
+        
+        return features
+    
+    def _knn_index_imputation(self, df: pd.DataFrame) -> None:
+        """
+        Impute impact metrics by querying the neighbor index built in fit()
+        Only rows with missing values are queried, in chunks of knn_chunk_size
+        (tree queries are O(log n_train) per row; chunks bound the query memory)
+        """
+        features = self._knn_features(df)
+        n_impact = len(self.knn_impact_cols)
+        
+        query = features[features.iloc[:, :n_impact].isna().any(axis=1).to_numpy()]
+        if len(query) == 0:
+            return
+        
+        query_matrix = query.to_numpy(dtype='float64', na_value=np.nan)
+        imputed = np.vstack([
+            self.knn_index.impute(query_matrix[start:start + self.knn_chunk_size], list(range(n_impact)))
+            for start in range(0, len(query), self.knn_chunk_size)
+        ])
+        imputed = pd.DataFrame(
+            self.impact_scaler.inverse_transform(imputed),
+            columns=self.knn_impact_cols,
+            index=query.index
+        ).clip(lower=0)
+        
+        # Only the missing cells are written back; observed values stay untouched
+        for col in self.knn_impact_cols:
+            if col in df.columns:
+                df[col] = df[col].fillna(imputed[col])
+    
+    def _knn_batch_imputation(self, df: pd.DataFrame, impact_cols: list) -> None:
+        """Legacy KNN imputation: re-fit the imputer on the batch being transformed"""
+        
+        # Create feature matrix for KNN
+        # Add contextual features to help KNN: Year, Disaster Type (encoded)
+        knn_features = df[impact_cols].copy()
+        
+        # Add Year as a feature (normalized)
+        knn_features['Year_norm'] = (df['Year'] - df['Year'].min()) / (df['Year'].max() - df['Year'].min())
+        
+        # Add Disaster Type as one-hot encoding
+        disaster_dummies = pd.get_dummies(df['Disaster Type'], prefix='DisType')
+        # Only keep top 10 disaster types to avoid too many features
+        top_disasters = df['Disaster Type'].value_counts().head(10).index
+        for disaster in top_disasters:
+            col_name = f'DisType_{disaster}'
+            if col_name in disaster_dummies.columns:
+                knn_features[col_name] = disaster_dummies[col_name]
+        
+        # Apply KNN imputation
+        knn_imputed = self.knn_imputer.fit_transform(knn_features)
+        
+        # Extract only the impact columns (not the helper features)
+        for i, col in enumerate(impact_cols):
+            df[col] = knn_imputed[:, i]
+            # Ensure no negative values
+            df[col] = df[col].clip(lower=0)
+    
     def _fallback_median_imputation(self, df: pd.DataFrame, impact_cols: list) -> None:
         """Fallback median imputation method"""
         
         # 1. Total Deaths - impute with median by type
         if 'Total Deaths' in impact_cols:
-            mask = df['Total Deaths'].isna() & df['Disaster Type'].notna()
-            for disaster_type, median_val in self.median_deaths_by_type.items():
-                type_mask = mask & (df['Disaster Type'] == disaster_type)
-                df.loc[type_mask, 'Total Deaths'] = median_val if pd.notna(median_val) else 0
-            df['Total Deaths'] = df['Total Deaths'].fillna(0)
+            medians = df['Disaster Type'].map(self.median_deaths_by_type)
+            df['Total Deaths'] = df['Total Deaths'].fillna(medians).fillna(0)
         
         # 2. No Injured - impute with median by type
         if 'No Injured' in impact_cols:
-            mask = df['No Injured'].isna() & df['Disaster Type'].notna()
-            for disaster_type, median_val in self.median_injured_by_type.items():
-                type_mask = mask & (df['Disaster Type'] == disaster_type)
-                df.loc[type_mask, 'No Injured'] = median_val if pd.notna(median_val) else 0
-            df['No Injured'] = df['No Injured'].fillna(0)
+            medians = df['Disaster Type'].map(self.median_injured_by_type)
+            df['No Injured'] = df['No Injured'].fillna(medians).fillna(0)
         
         # 3. No Affected - impute by (Country, Disaster Type, Decade)
         if 'No Affected' in impact_cols:
             if 'Decade' not in df.columns:
                 df['Decade'] = (df['Year'] // 10) * 10
-            mask = df['No Affected'].isna()
             
-            for idx in df[mask].index:
-                country = df.loc[idx, 'Country']
-                disaster_type = df.loc[idx, 'Disaster Type']
-                decade = df.loc[idx, 'Decade']
-                
-                key = (country, disaster_type, decade)
-                median_val = self.median_affected_by_group.get(key)
-                
-                if pd.notna(median_val):
-                    df.loc[idx, 'No Affected'] = median_val
-                else:
-                    # Fallback: median for just disaster type
-                    fallback = df[df['Disaster Type'] == disaster_type]['No Affected'].median()
-                    df.loc[idx, 'No Affected'] = fallback if pd.notna(fallback) else 0
+            # Join fitted group medians on the (Country, Disaster Type, Decade) key
+            if self.median_affected_by_group:
+                group_medians = pd.Series(self.median_affected_by_group, dtype='float64')
+                keys = pd.MultiIndex.from_arrays([df['Country'], df['Disaster Type'], df['Decade']])
+                df['No Affected'] = df['No Affected'].fillna(
+                    pd.Series(group_medians.reindex(keys).to_numpy(), index=df.index)
+                )
             
-            df['No Affected'] = df['No Affected'].fillna(0)
+            # Fallback: median for just disaster type, then 0
+            # (unfitted: medians of the batch itself, taken before any row is filled)
+            if self.median_affected_by_type:
+                affected_by_type = self.median_affected_by_type
+            else:
+                affected_by_type = df.groupby('Disaster Type')['No Affected'].median().to_dict()
+            type_medians = df['Disaster Type'].map(affected_by_type)
+            df['No Affected'] = df['No Affected'].fillna(type_medians).fillna(0)
         
         # 4. No Homeless - impute with 0
         if 'No Homeless' in impact_cols:
@@ -916,15 +1511,16 @@ class DisasterDataPreprocessor:
         
         # 5. Total Damages - impute by disaster type median
         if "Total Damages ('000 US$)" in impact_cols:
-            mask = df["Total Damages ('000 US$)"].isna() & df['Disaster Type'].notna()
-            for disaster_type, median_val in self.median_damages_by_type.items():
-                type_mask = mask & (df['Disaster Type'] == disaster_type)
-                df.loc[type_mask, "Total Damages ('000 US$)"] = median_val if pd.notna(median_val) else 0
-            df["Total Damages ('000 US$)"] = df["Total Damages ('000 US$)"].fillna(0)
+            medians = df['Disaster Type'].map(self.median_damages_by_type)
+            df["Total Damages ('000 US$)"] = df["Total Damages ('000 US$)"].fillna(medians).fillna(0)
         
-        # 6. CPI - forward fill or use global median
+        # 6. CPI - fitted median for the year, then global median
+        #    (unfitted: forward fill or use the batch median)
         if 'CPI' in impact_cols:
-            df['CPI'] = df['CPI'].ffill().bfill().fillna(df['CPI'].median())
+            if self.median_cpi is not None:
+                df['CPI'] = df['CPI'].fillna(df['Year'].map(self.median_cpi_by_year)).fillna(self.median_cpi)
+            else:
+                df['CPI'] = df['CPI'].ffill().bfill().fillna(df['CPI'].median())
     
     def _engineer_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Create new engineered features"""
@@ -936,27 +1532,18 @@ class DisasterDataPreprocessor:
             (df['End Day'].fillna(0) - df['Start Day'].fillna(0))
         )
         df['Duration_Days'] = df['Duration_Days'].clip(lower=0)  # No negative durations
+        df['Duration_Days'] = df['Duration_Days'].astype('float64')  # Years are nullable Int64 on ingestion
         
         # 2. Decade
-        # Already created in imputation
+        # Usually created in imputation (median fallback path only)
+        if 'Decade' not in df.columns:
+            df['Decade'] = (df['Year'] // 10) * 10
         
         # 3. Decade Label
-        df['Decade_Label'] = df['Decade'].astype(str) + 's'
+        df['Decade_Label'] = map_unique(decade_label, df['Decade'])
         
         # 4. Severity Category (from Total Deaths)
-        def categorize_severity(deaths):
-            if deaths == 0:
-                return 0  # No Deaths
-            elif deaths < 10:
-                return 1  # Minor
-            elif deaths < 100:
-                return 2  # Moderate
-            elif deaths < 1000:
-                return 3  # Severe
-            else:
-                return 4  # Catastrophic
-        
-        df['Severity_Category'] = df['Total Deaths'].apply(categorize_severity)
+        df['Severity_Category'] = map_unique(categorize_severity, df['Total Deaths'])
         
         # 5. Total Human Impact
         df['Total_Human_Impact'] = (
@@ -966,38 +1553,17 @@ class DisasterDataPreprocessor:
         )
         
         # 6. Data Era (Historical/Modern/Recent)
-        def categorize_era(year):
-            if year < 1990:
-                return 'Historical'
-            elif year < 2010:
-                return 'Modern'
-            else:
-                return 'Recent'
-        
-        df['Data_Era'] = df['Year'].apply(categorize_era)
+        # (years are nullable Int64 until final cleaning; a missing year compares as NaN)
+        df['Data_Era'] = map_unique(categorize_era, df['Year'].astype('float64'))
         
         # 7. Season from Start Month
-        def get_season(month):
-            if pd.isna(month):
-                return 'Unknown'
-            month = int(month)
-            if month in [12, 1, 2]:
-                return 'Winter'
-            elif month in [3, 4, 5]:
-                return 'Spring'
-            elif month in [6, 7, 8]:
-                return 'Summer'
-            else:
-                return 'Fall'
-        
-        df['Season'] = df['Start Month'].apply(get_season)
+        df['Season'] = map_unique(get_season, df['Start Month'])
         
         # 8. Is Recent (last 10 years)
-        current_year = 2026
-        df['Is_Recent'] = (df['Year'] >= current_year - 10).astype(int)
+        df['Is_Recent'] = (df['Year'].astype('float64') >= CURRENT_YEAR - 10).astype(int)
         
         # 9. Disaster Group (from disaster type)
-        df['Disaster Group'] = df['Disaster Type'].map(DISASTER_TO_GROUP)
+        df['Disaster Group'] = map_unique(DISASTER_TO_GROUP, df['Disaster Type'])
         
         print(f"  ✓ Created 9 engineered features")
         return df
@@ -1014,7 +1580,7 @@ class DisasterDataPreprocessor:
         # 2. Ensure temporal consistency
         # End Year >= Start Year
         mask = df['End Year'] < df['Start Year']
-        df.loc[mask, 'End Year'] = df.loc[mask, 'Start Year']
+        assign_rows(df, 'End Year', mask, df.loc[mask, 'Start Year'])
         
         # 3. Data type conversions
         int_cols = ['Year', 'Start Year', 'End Year', 'Start Month', 'End Month', 'Start Day', 'End Day']
@@ -1023,8 +1589,9 @@ class DisasterDataPreprocessor:
                 df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
         
         # 4. Remove any remaining duplicates
+        #    (take, unlike drop_duplicates, returns a frame the fills below may write to)
         initial_count = len(df)
-        df = df.drop_duplicates()
+        df = df.take(np.flatnonzero(~df.duplicated().to_numpy()))
         removed_dupes = initial_count - len(df)
         
         if removed_dupes > 0:
@@ -1035,31 +1602,128 @@ class DisasterDataPreprocessor:
         if 'Disaster Group' in df.columns:
             df['Disaster Group'] = df['Disaster Group'].fillna('Other')
         
+        # (one scan finds the columns that still hold nulls)
+        has_nulls = df.isnull().any()
+        
         # All categorical columns - replace any remaining NaNs with "Unknown"
         categorical_cols = df.select_dtypes(include=['object']).columns
         for col in categorical_cols:
-            if df[col].isnull().sum() > 0:
+            if has_nulls[col]:
                 df[col] = df[col].fillna('Unknown')
         
         # All numerical columns - replace any remaining NaNs with 0
         numerical_cols = df.select_dtypes(include=[np.number]).columns
         for col in numerical_cols:
-            if df[col].isnull().sum() > 0:
+            if has_nulls[col]:
                 df[col] = df[col].fillna(0)
         
+        # 6. Enforce the output schema (categoricals, small ints)
+        df = apply_output_schema(df)
+        
         print(f"  ✓ Final cleaning complete")
         return df
 
 
+# ============================================================================
+# PART 3B: TRANSFORM PLAN
+# ============================================================================
+
+def classify_disaster_group(disaster_type) -> Optional[str]:
+    """Keyword group of a disaster type (DISASTER_GROUP_PATTERNS, a later match wins), NaN if none"""
+    group = np.nan
+    if isinstance(disaster_type, str):
+        for pattern, candidate in DISASTER_GROUP_PATTERNS:
+            if re.search(pattern, disaster_type, re.IGNORECASE):
+                group = candidate
+    return group
+
+
+def classify_disaster_groups(disaster_types: pd.Series) -> pd.Series:
+    """
+    Keyword group of each disaster type (see classify_disaster_group)
+    The patterns run once per unique type, not once per row
+    """
+    return map_unique(classify_disaster_group, disaster_types)
+
+
+class TransformPlan:
+    """
+    DisasterDataPreprocessor.transform compiled into its ordered list of phases
+    
+    Each phase is still its own pass over the frame (the plan does not fuse phases or
+    share masks between them); what the plan changes is how each pass touches memory:
+    
+    - The input frame is shallow-copied, not deep-copied: phases replace the columns they
+      change (assign_rows, fillna) instead of writing into buffers shared with the caller
+    - Within a phase each mask is computed once; Disaster Type keyword patterns and other
+      string-derived values run once per unique value (map_unique)
+    - Row drops are compiled in only in training mode
+    
+    The Book1.csv output is pinned by the golden fixtures in tests/fixtures
+    """
+    
+    def __init__(self, preprocessor: 'DisasterDataPreprocessor', is_training: bool = False):
+        self.preprocessor = preprocessor
+        self.is_training = is_training
+        self.steps = self.compile()
+    
+    def compile(self) -> list:
+        """Ordered (label, name, description, phase) list; phase is None for a skipped step"""
+        p = self.preprocessor
+        drop_rows = (
+            ('2', 'drop_critical_missing', "Dropping rows with missing critical fields", p._drop_critical_missing)
+            if self.is_training else
+            ('2', 'drop_critical_missing', "Skipping row drops (production mode)", None)
+        )
+        return [
+            ('1', 'parse_glide_codes', "Parsing GLIDE codes", p._parse_glide_codes),
+            drop_rows,
+            ('3', 'impute_from_glide', "Imputing features from GLIDE", p._impute_from_glide),
+            ('4', 'construct_missing_glide', "Constructing missing GLIDE codes", p._construct_missing_glide),
+            ('5', 'impute_geographic', "Imputing geographic features", p._impute_geographic),
+            ('6', 'create_quality_flags', "Creating data quality flags", p._create_quality_flags),
+            ('7', 'impute_temporal', "Imputing temporal features", p._impute_temporal),
+            ('7.5', 'impute_categorical_and_binary', "Imputing categorical and binary fields",
+             p._impute_categorical_and_binary),
+            ('8', 'impute_impact_metrics', "Imputing impact metrics", p._impute_impact_metrics),
+            ('9', 'engineer_features', "Engineering new features", p._engineer_features),
+            ('10', 'final_cleaning', "Final data cleaning", p._final_cleaning),
+        ]
+    
+    def run(self, df: pd.DataFrame, profiler: Optional[PhaseProfiler] = None) -> pd.DataFrame:
+        """Run every phase on a shallow copy of df (the caller's columns are never modified)"""
+        df = df.copy(deep=False)
+        
+        for label, name, description, phase in self.steps:
+            if phase is None:
+                print(f"\n[{label}/10] {description}")
+                continue
+            print(f"\n[{label}/10] {description}...")
+            df = self.preprocessor._run_phase(profiler, name, phase, df)
+        
+        return df
+
+
 # ============================================================================
 # PART 4: MAIN PREPROCESSING FUNCTIONS
 # ============================================================================
 
+# Columns dropped from new/production data (same as training)
+NEW_DATA_DROP_COLUMNS = [
+    'Insured Damages (\'000 US$)', 'Local Time', 'Associated Dis2',
+    'Aid Contribution', 'River Basin', 'OFDA Response',
+    'Admin1 Code', 'Admin2 Code', 'Origin', 'Adm Level',
+    'Geo Locations', 'Disaster Subsubtype'
+]
+
 def preprocess_training_data(
     file_path: str,
     test_size: float = 0.2,
     temporal_split: bool = True,
-    cutoff_year: int = 2020
+    cutoff_year: int = 2020,
+    profiler: Optional[PhaseProfiler] = None,
+    on_error: str = 'raise',
+    quarantine_path: Optional[str] = None
 ) -> Tuple[pd.DataFrame, pd.DataFrame, DisasterDataPreprocessor]:
     """
     Complete preprocessing for training data with train/test split
@@ -1070,6 +1734,9 @@ def preprocess_training_data(
     test_size : Fraction for test set (if not using temporal split)
     temporal_split : Use temporal split (recommended for time series)
     cutoff_year : Year for temporal split
+    profiler : If given, records the cost of every transform phase
+    on_error : Rows breaking the column contract: 'raise' (reject the file) or 'quarantine' (drop them)
+    quarantine_path : CSV that quarantined rows are written to for review
     
     Returns:
     --------
@@ -1081,7 +1748,7 @@ def preprocess_training_data(
     
     # Load data
     print("\nLoading data...")
-    df = pd.read_csv(file_path, low_memory=False)
+    df = read_raw_csv(file_path, on_error=on_error, quarantine_path=quarantine_path)
     print(f"Loaded: {df.shape[0]:,} rows × {df.shape[1]} columns")
     
     # Initialize preprocessor
@@ -1118,7 +1785,7 @@ def preprocess_training_data(
     print(f"Remaining columns: {len(df.columns)}")
     
     # Basic transformations (no statistics!)
-    df = preprocessor.transform(df, is_training=True)
+    df = preprocessor.transform(df, is_training=True, profiler=profiler)
     
     # PHASE 2: Split data
     print("\n" + "=" * 80)
@@ -1158,8 +1825,15 @@ def preprocess_training_data(
 
 def preprocess_new_data(
     file_path: str,
-    preprocessor: DisasterDataPreprocessor
-) -> pd.DataFrame:
+    preprocessor: DisasterDataPreprocessor,
+    chunksize: Optional[int] = None,
+    output_path: Optional[str] = None,
+    n_jobs: Optional[int] = None,
+    profiler: Optional[PhaseProfiler] = None,
+    on_error: str = 'raise',
+    quarantine_path: Optional[str] = None,
+    dedupe: bool = True
+) -> Optional[pd.DataFrame]:
     """
     Preprocess new/production data using fitted preprocessor
     This is AUTOMATIC - no manual intervention needed!
@@ -1168,10 +1842,18 @@ def preprocess_new_data(
     -----------
     file_path : Path to new CSV file
     preprocessor : Fitted DisasterDataPreprocessor instance
+    chunksize : If set, stream the file in chunks of this many rows (requires output_path)
+    output_path : CSV file that processed chunks are appended to in streaming mode
+    n_jobs : If set, transform in parallel with this many worker processes
+    profiler : If given, records the cost of every transform phase (not collected from parallel workers)
+    on_error : Rows breaking the column contract: 'raise' (reject the file) or 'quarantine' (drop them)
+    quarantine_path : CSV that quarantined rows are written to for review
+    dedupe : Streaming mode: also drop rows duplicating a row of an earlier chunk
+             (keeps one 64-bit hash per emitted row, i.e. memory grows with the file)
     
     Returns:
     --------
-    Preprocessed DataFrame ready for predictions
+    Preprocessed DataFrame ready for predictions (None in streaming mode)
     """
     print("\n" + "=" * 80)
     print("DISASTER DATA PREPROCESSING - PRODUCTION MODE")
@@ -1180,23 +1862,37 @@ def preprocess_new_data(
     if not preprocessor.fitted:
         raise ValueError("Preprocessor must be fitted on training data first!")
     
+    if chunksize is not None:
+        if output_path is None:
+            raise ValueError("Streaming mode (chunksize) needs an output_path to write to")
+        
+        total_rows = 0
+        for i, chunk in enumerate(iter_preprocessed_chunks(
+            file_path, preprocessor, chunksize, profiler, on_error, quarantine_path, dedupe
+        )):
+            chunk.to_csv(output_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+            total_rows += len(chunk)
+        
+        print("\n" + "=" * 80)
+        print("NEW DATA PREPROCESSING COMPLETE!")
+        print("=" * 80)
+        print(f"✓ Streamed {total_rows:,} rows to: {output_path}")
+        return None
+    
     # Load new data
     print("\nLoading new data...")
-    df = pd.read_csv(file_path, low_memory=False)
+    df = read_raw_csv(file_path, on_error=on_error, quarantine_path=quarantine_path)
     print(f"Loaded: {df.shape[0]:,} rows × {df.shape[1]} columns")
     
     # Drop same columns as training
-    drop_cols = [
-        'Insured Damages (\'000 US$)', 'Local Time', 'Associated Dis2',
-        'Aid Contribution', 'River Basin', 'OFDA Response',
-        'Admin1 Code', 'Admin2 Code', 'Origin', 'Adm Level',
-        'Geo Locations', 'Disaster Subsubtype'
-    ]
-    drop_cols = [col for col in drop_cols if col in df.columns]
+    drop_cols = [col for col in NEW_DATA_DROP_COLUMNS if col in df.columns]
     df = df.drop(columns=drop_cols, errors='ignore')
     
     # Apply preprocessing (AUTOMATIC!)
-    df = preprocessor.transform(df, is_training=False)
+    if n_jobs is not None:
+        df = transform_parallel(df, preprocessor, n_jobs=n_jobs)
+    else:
+        df = preprocessor.transform(df, is_training=False, profiler=profiler)
     
     print("\n" + "=" * 80)
     print("NEW DATA PREPROCESSING COMPLETE!")
@@ -1206,6 +1902,146 @@ def preprocess_new_data(
     return df
 
 
+def iter_preprocessed_chunks(
+    file_path: str,
+    preprocessor: DisasterDataPreprocessor,
+    chunksize: int = 100_000,
+    profiler: Optional[PhaseProfiler] = None,
+    on_error: str = 'raise',
+    quarantine_path: Optional[str] = None,
+    dedupe: bool = True
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV through a fitted preprocessor, yielding one processed chunk at a time
+    Chunk frames are bounded by chunksize; with dedupe the concatenated chunks equal the
+    whole-file result, at the cost of one hash per emitted row (O(rows) memory, O(1) lookups)
+    
+    Parameters:
+    -----------
+    file_path : Path to new CSV file
+    preprocessor : Fitted DisasterDataPreprocessor instance (knn_mode='index')
+    chunksize : Rows read and transformed per chunk
+    profiler : If given, accumulates the cost of every transform phase over all chunks
+    on_error : Rows breaking the column contract: 'raise' (reject the file) or 'quarantine' (drop them)
+    quarantine_path : CSV that the quarantined rows of all chunks are written to
+    dedupe : Drop rows duplicating a row of an earlier chunk (duplicates within a chunk
+             are always dropped by transform); False keeps memory bounded by chunksize
+    """
+    if not preprocessor.fitted:
+        raise ValueError("Preprocessor must be fitted on training data first!")
+    if preprocessor.knn_fitted and preprocessor.knn_mode != 'index':
+        raise ValueError("Chunked preprocessing needs knn_mode='index' (batch KNN depends on the chunk)")
+    
+    # Row hashes already emitted, so duplicates spanning chunks are dropped like in one batch
+    seen_hashes = set()
+    
+    for chunk in iter_raw_csv(file_path, chunksize, on_error, quarantine_path):
+        drop_cols = [col for col in NEW_DATA_DROP_COLUMNS if col in chunk.columns]
+        chunk = chunk.drop(columns=drop_cols, errors='ignore')
+        
+        processed = preprocessor.transform(chunk, is_training=False, profiler=profiler)
+        
+        if dedupe:
+            row_hashes = pd.util.hash_pandas_object(processed, index=False).tolist()
+            seen = np.fromiter((row_hash in seen_hashes for row_hash in row_hashes), dtype=bool, count=len(row_hashes))
+            processed = processed[~seen]
+            seen_hashes.update(row_hashes)
+        
+        yield processed
+
+
+# Fitted preprocessor held by each worker process of transform_parallel
+_worker_preprocessor = None
+
+
+def _init_parallel_worker(preprocessor: DisasterDataPreprocessor):
+    """Process pool initializer: receive the fitted preprocessor once per worker"""
+    global _worker_preprocessor
+    _worker_preprocessor = preprocessor
+
+
+def _transform_partition(task: Tuple[pd.DataFrame, dict, Optional[int]]) -> pd.DataFrame:
+    """Transform one row partition, starting from the counters the serial path would have"""
+    partition, sequence_counter, seq_counter = task
+    _worker_preprocessor.sequence_counter = sequence_counter
+    _worker_preprocessor.seq_counter = seq_counter
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        return _worker_preprocessor.transform(partition, is_training=False)
+
+
+def transform_parallel(
+    df: pd.DataFrame,
+    preprocessor: DisasterDataPreprocessor,
+    n_jobs: Optional[int] = None,
+    n_partitions: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Run a fitted preprocessor over row partitions in a process pool
+    Output (rows, order, values, dtypes) is identical to preprocessor.transform(df)
+    
+    Parameters:
+    -----------
+    df : DataFrame to transform (production mode, no row drops)
+    preprocessor : Fitted DisasterDataPreprocessor instance (knn_mode='index')
+    n_jobs : Worker processes (default: all CPUs)
+    n_partitions : Row partitions (default: one per worker)
+    """
+    if not preprocessor.fitted:
+        raise ValueError("Preprocessor must be fitted on training data first!")
+    if preprocessor.knn_fitted and preprocessor.knn_mode != 'index':
+        raise ValueError("Parallel preprocessing needs knn_mode='index' (batch KNN depends on the partition)")
+    
+    n_jobs = n_jobs or os.cpu_count() or 1
+    n_partitions = max(1, min(n_partitions or n_jobs, len(df)))
+    bounds = np.linspace(0, len(df), n_partitions + 1).astype(int)
+    
+    # GLIDE construction and Seq fills number rows in order. Missing GLIDE rows never get
+    # type/year/country from GLIDE, so each partition's starting counters follow from raw input.
+    eligible = (
+        df['Glide'].isna() & df['Disaster Type'].notna() & df['Year'].notna() & df['Country'].notna()
+    ).to_numpy()
+    years = df['Year'].to_numpy()
+    seq_missing = df['Seq'].isna().to_numpy() if 'Seq' in df.columns else np.zeros(len(df), dtype=bool)
+    
+    sequence_counter = dict(preprocessor.sequence_counter)
+    seq_counter = preprocessor.seq_counter
+    tasks = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        tasks.append((df.iloc[start:stop], dict(sequence_counter), seq_counter))
+        
+        part_years = years[start:stop][eligible[start:stop]].astype(int)
+        for year, count in zip(*np.unique(part_years, return_counts=True)):
+            sequence_counter[int(year)] = sequence_counter.get(int(year), 0) + int(count)
+        if seq_counter is not None:
+            seq_counter += int(seq_missing[start:stop].sum())
+    
+    print(f"Transforming {len(df):,} rows in {len(tasks)} partitions on {n_jobs} workers...")
+    with ProcessPoolExecutor(
+        max_workers=n_jobs,
+        initializer=_init_parallel_worker,
+        initargs=(preprocessor,)
+    ) as pool:
+        parts = list(pool.map(_transform_partition, tasks))
+    
+    # Leave the caller's preprocessor as the serial path would
+    preprocessor.sequence_counter = sequence_counter
+    preprocessor.seq_counter = seq_counter
+    
+    result = pd.concat(parts)
+    
+    # Duplicates spanning partitions (the serial path drops them in final cleaning)
+    result = result.drop_duplicates()
+    
+    # Categoricals with partition-specific categories come back as object
+    for col in parts[0].select_dtypes(include=['category']).columns:
+        if result[col].dtype != 'category':
+            result[col] = result[col].astype('category')
+    
+    print(f"✓ Parallel transform complete: {result.shape}")
+    return result
+
+
 # ============================================================================
 # PART 5: UTILITY FUNCTIONS
 # ============================================================================
@@ -1225,8 +2061,12 @@ def load_preprocessor(file_path: str) -> DisasterDataPreprocessor:
     return preprocessor
 
 
-def generate_preprocessing_report(df_before: pd.DataFrame, df_after: pd.DataFrame):
-    """Generate detailed report of preprocessing changes"""
+def generate_preprocessing_report(
+    df_before: pd.DataFrame,
+    df_after: pd.DataFrame,
+    profiler: Optional[PhaseProfiler] = None
+):
+    """Generate detailed report of preprocessing changes (plus phase timings if profiled)"""
     print("\n" + "=" * 80)
     print("PREPROCESSING REPORT")
     print("=" * 80)
@@ -1249,6 +2089,9 @@ def generate_preprocessing_report(df_before: pd.DataFrame, df_after: pd.DataFram
     for col in sorted(new_cols):
         print(f"  • {col}")
     
+    if profiler is not None and profiler.records:
+        profiler.print_report()
+    
     print("\n" + "=" * 80)
 
 
@@ -1281,9 +2124,10 @@ if __name__ == "__main__":
     # Save preprocessor for later use
     save_preprocessor(preprocessor, 'disaster_preprocessor.pkl')
     
-    # Save processed data
-    train_df.to_csv('train_processed.csv', index=False)
-    test_df.to_csv('test_processed.csv', index=False)
+    # Save processed data (CSV plus typed columnar cache for fast re-reads)
+    from data_cache import write_csv_cached
+    write_csv_cached(train_df, 'train_processed.csv', postprocess=apply_output_schema)
+    write_csv_cached(test_df, 'test_processed.csv', postprocess=apply_output_schema)
     print("\n✓ Saved processed train/test sets")
     
     # PRODUCTION PHASE (Simulated)
@@ -0,0 +1,20 @@
+"""Shared fixtures: the repository modules are top-level scripts, imported from the repo root"""
+
+import os
+import sys
+import contextlib
+import io
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+
+@pytest.fixture(scope='session')
+def book1_raw():
+    """Book1.csv read through the ingestion contract"""
+    from ingestion import read_raw_csv
+    with contextlib.redirect_stdout(io.StringIO()):
+        return read_raw_csv(os.path.join(REPO_DIR, 'Book1.csv'))
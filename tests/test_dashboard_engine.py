@@ -0,0 +1,262 @@
+"""Tests for dashboard_engine.py"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import REPO_DIR
+from dashboard_engine import (
+    CorrelationEngine, DatasetWatcher, ExportStore, FilterIndex, TableView, binned_histogram, pairwise_pearson
+)
+from ingestion import QuarantineWarning, SchemaError
+
+
+def frame(n_rows: int = 2000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'Year': rng.integers(1990, 2021, n_rows),
+        'Country': rng.choice(['Kenya', 'Chad', 'Mali', 'Niger', 'Sudan'], n_rows),
+        'Disaster Type': rng.choice(['Flood', 'Drought', 'Storm'], n_rows),
+    })
+
+
+def hammer(call, n_calls: int = 4000, n_threads: int = 16) -> list:
+    """Run call(i) from many threads at once (switching threads very often), re-raising any exception"""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(n_threads) as pool:
+            return list(pool.map(call, range(n_calls)))
+    finally:
+        sys.setswitchinterval(interval)
+
+
+def test_filter_index_memo_is_safe_under_concurrent_eviction():
+    df = frame()
+    index = FilterIndex(df, ['Country', 'Disaster Type'], max_cached=2)
+
+    def query(i):
+        first = 1990 + i % 25
+        positions = index.positions((first, first + 3), {'Country': ['Kenya', 'Chad'][: 1 + i % 2]})
+        expected = np.flatnonzero(
+            df['Year'].between(first, first + 3) & df['Country'].isin(['Kenya', 'Chad'][: 1 + i % 2])
+        )
+        np.testing.assert_array_equal(positions, expected)
+
+    hammer(query)
+    assert len(index._cache) <= 2
+
+
+def test_export_store_is_safe_under_concurrent_eviction():
+    df = frame(200)
+    store = ExportStore(df, max_cached=2)
+    selections = [['Year'], ['Country'], ['Disaster Type'], ['Year', 'Country']]
+
+    def export(i):
+        columns = selections[i % len(selections)]
+        assert store.artifact('CSV', columns) == df[columns].to_csv(index=False).encode()
+
+    hammer(export, n_calls=2000)
+    assert len(store._cache) <= 2
+
+
+def test_watcher_compaction_keeps_older_snapshots_readable(tmp_path):
+    pytest.importorskip('pyarrow')
+    with open(os.path.join(REPO_DIR, 'Book1.csv'), 'rb') as f:
+        lines = f.read().splitlines(keepends=True)
+    source = str(tmp_path / 'Book1.csv')
+    with open(source, 'wb') as f:
+        f.writelines(lines[:401])
+
+    watcher = DatasetWatcher(source, compact_ratio=0.1)
+    first = watcher.poll()
+    expected = pd.read_csv(source)['Location']
+    expected = expected.where(expected.notna(), None)  # Arrow text columns hold None
+
+    # Each batch exceeds compact_ratio of the base: two full reloads and shared rebuilds
+    for start, stop in [(401, 501), (501, 651)]:
+        with open(source, 'ab') as f:
+            f.writelines(lines[start:stop])
+        snapshot = watcher.poll(background=False)
+        assert len(snapshot.store) == stop - 1 and snapshot.n_appended == 0
+
+    assert len(first.store) == 400
+    pd.testing.assert_series_equal(first.store['Location'], expected, check_dtype=False)
+
+
+def write_book1_head(path, n_rows: int = 400, **extra_columns) -> pd.DataFrame:
+    """First rows of Book1.csv (as raw text) in a CSV the watcher can grow"""
+    df = pd.read_csv(os.path.join(REPO_DIR, 'Book1.csv'), dtype=str, nrows=n_rows).assign(**extra_columns)
+    df.to_csv(path, index=False)
+    return df
+
+
+def test_watcher_rejects_appends_that_break_the_contract(tmp_path):
+    source = str(tmp_path / 'Book1.csv')
+    df = write_book1_head(source)
+    bad = df.tail(2).assign(**{'Total Deaths': ['12', 'unknown']})
+
+    watcher = DatasetWatcher(source)
+    first = watcher.poll()
+    bad.to_csv(source, mode='a', header=False, index=False)
+    snapshot = watcher.poll(background=False)
+
+    assert snapshot is first and len(snapshot.store) == 400
+    assert isinstance(watcher.error, SchemaError)
+    assert watcher.poll(background=False) is first  # the rejected file is not parsed again
+
+    with pytest.warns(QuarantineWarning):
+        quarantining = DatasetWatcher(source, on_error='quarantine')
+    assert len(quarantining.poll().store) == 401
+    df.tail(1).to_csv(source, mode='a', header=False, index=False)
+    with pytest.warns(QuarantineWarning):
+        bad.to_csv(source, mode='a', header=False, index=False)
+        snapshot = quarantining.poll(background=False)
+    assert snapshot.n_appended == 2 and quarantining.error is None
+    assert snapshot.store['Total Deaths'].iloc[-1] == 12.0
+
+
+def test_watcher_profile_follows_dtypes_changed_by_appends(tmp_path):
+    source = str(tmp_path / 'Book1.csv')
+    df = write_book1_head(source, Note='1')
+    watcher = DatasetWatcher(source)
+    profile = watcher.poll().cube.profile.set_index('Column')['Data Type']
+    assert profile['Note'] == 'int64'
+    assert (profile['Year'], profile['Latitude']) == ('Int64', 'float64')  # contract dtypes
+
+    df.tail(3).assign(Note=['2', 'n/a', 'see report']).to_csv(source, mode='a', header=False, index=False)
+    snapshot = watcher.poll(background=False)
+    cube = snapshot.cube
+
+    assert snapshot.n_appended == 3
+    for col in ['Note', 'Year', 'Latitude', 'Total Deaths']:
+        assert cube.profile.set_index('Column').loc[col, 'Data Type'] == str(snapshot.store[col].dtype), col
+    assert cube.profile.set_index('Column').loc['Note', 'Data Type'] == 'object'
+    assert 'Note' in cube.categorical_columns and 'Note' not in cube.numeric_columns
+
+
+def test_filter_index_size_is_linear_in_rows_for_near_unique_columns():
+    n_rows = 200_000
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        'Year': rng.integers(1990, 2021, n_rows),
+        'Glide': [f'FL-{i:07d}' for i in range(n_rows)],  # one value per row
+        'Country': rng.choice(['Kenya', 'Chad', 'Mali', None], n_rows),
+    })
+    index = FilterIndex(df, ['Glide', 'Country'])
+
+    # order + bounds per column and the year order: a few int32/float64 entries per row
+    assert index.memory_bytes <= 32 * n_rows
+
+    glides = ['FL-0000007', 'FL-0123456', 'FL-0199999']
+    expected = np.flatnonzero(df['Glide'].isin(glides) & df['Year'].between(2000, 2020))
+    np.testing.assert_array_equal(index.positions((2000, 2020), {'Glide': glides}), expected)
+    expected = np.flatnonzero(df['Country'].isin(['Chad', 'Mali']) & df['Year'].between(1995, 1999))
+    np.testing.assert_array_equal(index.positions((1995, 1999), {'Country': ['Chad', 'Mali']}), expected)
+
+
+def impact_frame(n_rows: int = 500) -> pd.DataFrame:
+    """Numeric columns with missing values, ties and a constant column"""
+    rng = np.random.default_rng(4)
+    deaths = rng.integers(0, 50, n_rows).astype(float)  # many ties
+    deaths[rng.random(n_rows) < 0.2] = np.nan
+    affected = deaths * 30 + rng.normal(0, 200, n_rows)
+    affected[rng.random(n_rows) < 0.3] = np.nan
+    return pd.DataFrame({
+        'Total Deaths': deaths,
+        'No Affected': affected,
+        'CPI': rng.normal(60, 10, n_rows),
+        'Constant': np.ones(n_rows),
+        'Country': rng.choice(['Kenya', 'Chad', 'Mali'], n_rows),
+    })
+
+
+@pytest.mark.parametrize('ascending', [True, False])
+def test_table_view_sorts_pages_of_a_subset_by_global_rank(ascending):
+    df = impact_frame()
+    view = TableView(df)
+    positions = np.flatnonzero(df['Country'] == 'Chad')
+    expected = df.iloc[positions].sort_values('Total Deaths', ascending=ascending, kind='stable', na_position='last')
+
+    page_size = 7
+    pages = [
+        view.page(positions, page, page_size, sort_by='Total Deaths', ascending=ascending)
+        for page in range(-(-len(positions) // page_size))
+    ]
+    assert all(len(page) == page_size for page in pages[:-1])
+    pd.testing.assert_frame_equal(pd.concat(pages), expected)
+
+
+def test_table_view_pages_stop_at_the_end_of_a_shrunk_selection():
+    """After a filter shrinks the rows, the last page holds the remainder and later pages are empty"""
+    df = impact_frame()
+    view = TableView(df)
+    view.page(None, 3, 25, sort_by='CPI')  # ranks computed over every row
+    shrunk = np.flatnonzero((df['Country'] == 'Mali') & (df['CPI'] > 70))
+    n_pages = -(-len(shrunk) // 25)
+
+    last = view.page(shrunk, n_pages - 1, 25, sort_by='CPI')
+    assert len(last) == len(shrunk) - (n_pages - 1) * 25
+    assert last['CPI'].tolist() == sorted(df['CPI'].iloc[shrunk])[(n_pages - 1) * 25:]
+    for sort_by in ['CPI', None]:
+        past_end = view.page(shrunk, n_pages, 25, sort_by=sort_by, columns=['Country', 'CPI'])
+        assert past_end.empty and list(past_end.columns) == ['Country', 'CPI']
+
+
+def test_correlation_engine_matches_dataframe_corr():
+    df = impact_frame()
+    columns = ['Total Deaths', 'No Affected', 'CPI', 'Constant']
+    engine = CorrelationEngine(df)
+    assert engine.columns == columns
+
+    pearson = engine.matrix()
+    pd.testing.assert_frame_equal(pearson, df[columns].corr(), rtol=1e-10)
+    pd.testing.assert_frame_equal(engine.matrix('spearman'), df[columns].corr(method='spearman'))
+    pd.testing.assert_frame_equal(engine.select(['CPI', 'Total Deaths']), df[['CPI', 'Total Deaths']].corr(), rtol=1e-10)
+
+    selection = ['Total Deaths', 'No Affected', 'CPI']
+    pairs = engine.strong_pairs(selection, threshold=0.5)
+    corr = df[selection].corr()
+    expected = [
+        (a, b) for i, a in enumerate(selection) for b in selection[i + 1:] if abs(corr.loc[a, b]) > 0.5
+    ]
+    assert list(zip(pairs['Feature 1'], pairs['Feature 2'])) == expected == [('Total Deaths', 'No Affected')]
+
+
+def test_pairwise_pearson_matches_dataframe_corr_with_sparse_overlaps():
+    rng = np.random.default_rng(5)
+    values = rng.normal(size=(60, 5)) * [1, 1e6, 1e-6, 10, 1] + [0, 1e9, 0, 0, 0]
+    values[rng.random(values.shape) < 0.5] = np.nan
+    values[:, 4] = np.nan
+    values[0, 4] = 1.0  # a single present value: no correlation
+
+    expected = pd.DataFrame(values).corr().to_numpy()
+    result = pairwise_pearson(values)
+    off_diagonal = ~np.eye(5, dtype=bool)
+    np.testing.assert_allclose(result[off_diagonal], expected[off_diagonal], rtol=1e-8)
+
+
+def test_binned_histogram_matches_np_histogram():
+    rng = np.random.default_rng(6)
+    values = rng.lognormal(3, 1, 1000)
+    values[::7] = np.nan
+    valid = ~np.isnan(values)
+
+    result = binned_histogram(values, bins=30)
+    counts, edges = np.histogram(values[valid], bins=30)
+    np.testing.assert_array_equal(result['Count'], counts)
+    np.testing.assert_array_equal(result['Lower'], edges[:-1])
+    np.testing.assert_array_equal(result['Upper'], edges[1:])
+    np.testing.assert_allclose(result['Center'] + result['Width'] / 2, edges[1:])
+    assert result['Count'].sum() == valid.sum()
+
+    # Pre-aggregated input: events per year binned with the counts as weights
+    years, events = np.arange(1950, 2021), rng.integers(0, 100, 71)
+    weighted = binned_histogram(years, bins=10, weights=events)
+    np.testing.assert_array_equal(weighted['Count'], np.histogram(years, bins=10, weights=events)[0])
+
+    assert binned_histogram([np.nan, np.nan]).empty
@@ -0,0 +1,57 @@
+"""Tests for data_cache.py"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from data_cache import SHARED_KEEP_VERSIONS, file_digest, open_shared_dataset, read_csv_cached, shared_dir_for
+
+
+def write_version(path: str, n_rows: int) -> pd.DataFrame:
+    df = pd.DataFrame({
+        'Year': np.arange(n_rows) + 1990,
+        'Total Deaths': np.linspace(0, 1, n_rows),
+        'Country': [f'Country {i}' for i in range(n_rows)],
+    })
+    df.to_csv(path, index=False)
+    return df
+
+
+def test_attached_dataset_reads_unloaded_columns_after_rebuilds(tmp_path):
+    source = str(tmp_path / 'data.csv')
+    first = write_version(source, 10)
+    old = open_shared_dataset(source)
+    assert old.read(['Year'])['Year'].tolist() == first['Year'].tolist()
+
+    # Enough rebuilds to push the first version out of retention
+    for n_rows in range(11, 11 + SHARED_KEEP_VERSIONS):
+        write_version(source, n_rows)
+        new = open_shared_dataset(source)
+        assert new.n_rows == n_rows
+    assert not os.path.exists(old.path)
+    assert len(os.listdir(shared_dir_for(source))) == SHARED_KEEP_VERSIONS
+
+    # Columns the old session never read come from its original version
+    columns = old.read(['Total Deaths', 'Country'])
+    pd.testing.assert_frame_equal(columns, first[['Total Deaths', 'Country']], check_dtype=False)
+
+
+def test_touched_source_is_hashed_once(tmp_path, monkeypatch):
+    import data_cache
+
+    source = str(tmp_path / 'data.csv')
+    expected = write_version(source, 10)
+    read_csv_cached(source)
+
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))  # touch: same content
+    digests = []
+    monkeypatch.setattr(data_cache, 'file_digest', lambda path: digests.append(path) or file_digest(path))
+
+    for _ in range(3):
+        pd.testing.assert_frame_equal(read_csv_cached(source), expected)
+    assert len(digests) == 1
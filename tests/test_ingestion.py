@@ -0,0 +1,29 @@
+"""Tests for ingestion.py"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import REPO_DIR
+from ingestion import QuarantineWarning, SchemaError, VIOLATION_COLUMN, enforce_schema, read_raw_csv
+
+
+def bad_frame() -> pd.DataFrame:
+    return pd.DataFrame({'Year': ['2001', '2002', 'n/a'], 'Total Deaths': ['1', 'x', '3'], 'Country': ['Chad'] * 3})
+
+
+def test_contract_violations_raise_by_default(tmp_path):
+    raw = pd.read_csv(os.path.join(REPO_DIR, 'Book1.csv'), nrows=20, dtype=str)
+    raw.loc[[3, 7], 'Total Deaths'] = 'unknown'
+    path = tmp_path / 'raw.csv'
+    raw.to_csv(path, index=False)
+    with pytest.raises(SchemaError, match='2 rows'):
+        read_raw_csv(str(path))
+
+
+def test_quarantine_is_opt_in_and_warns_with_the_count():
+    with pytest.warns(QuarantineWarning, match='2 rows quarantined'):
+        clean, quarantined = enforce_schema(bad_frame(), on_error='quarantine')
+    assert clean['Year'].tolist() == [2001]
+    assert quarantined[VIOLATION_COLUMN].tolist() == ['Total Deaths', 'Year']
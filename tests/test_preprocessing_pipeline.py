@@ -0,0 +1,385 @@
+"""Tests for preprocessing_pipeline.py"""
+
+import os
+import io
+import copy
+import gzip
+import json
+import pickle
+import contextlib
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.impute import KNNImputer
+from sklearn.metrics.pairwise import nan_euclidean_distances
+
+from preprocessing_pipeline import (
+    COUNTRY_CENTROIDS, COUNTRY_TO_CONTINENT, COUNTRY_TO_REGION, MAX_BYTES_PER_ROW, NEW_DATA_DROP_COLUMNS,
+    DisasterDataPreprocessor, NeighborIndex, PhaseProfiler, apply_output_schema, construct_glide,
+    construct_glide_series, event_name, factorize_rows, get_season, iter_preprocessed_chunks,
+    lookup_country_reference, map_unique, output_schema_mismatches, parse_glide, parse_glide_series,
+    preprocess_new_data, transform_parallel
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+BOOK1 = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Book1.csv')
+
+# Training-mode impact metrics of Book1.csv as produced by the original (row-by-row) pipeline
+IMPACT_FIXTURE = os.path.join(FIXTURES_DIR, 'book1_training_impact.csv')
+
+# Golden transform output of Book1.csv (CSV bytes, gzipped), per mode
+GOLDEN_FIXTURE = os.path.join(FIXTURES_DIR, 'book1_transform_{mode}.csv.gz')
+
+
+def transform_quietly(preprocessor, df, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return preprocessor.transform(df, **kwargs)
+
+
+def test_training_mode_impact_metrics_match_baseline(book1_raw):
+    """An unfitted preprocessor fills No Affected from the batch's own per-type medians"""
+    expected = pd.read_csv(IMPACT_FIXTURE, index_col='Row')
+    result = transform_quietly(DisasterDataPreprocessor(), book1_raw, is_training=True)
+
+    assert result.index.tolist() == expected.index.tolist()
+    for col in expected.columns:
+        np.testing.assert_array_equal(result[col].to_numpy(dtype='float64'), expected[col].to_numpy(dtype='float64'), err_msg=col)
+
+
+def test_neighbor_index_matches_knn_imputer():
+    """Partially observed training rows are donors too, at KNNImputer's nan_euclidean distance"""
+    rng = np.random.default_rng(0)
+    train = rng.normal(size=(300, 5))
+    train[rng.random(train.shape) < 0.3] = np.nan
+    queries = rng.normal(size=(40, 5))
+    queries[rng.random(queries.shape) < 0.3] = np.nan
+
+    result = NeighborIndex(train).impute(queries, list(range(5)))
+
+    expected = KNNImputer(n_neighbors=5, weights='distance').fit(train).transform(queries)
+    np.testing.assert_allclose(result, expected, rtol=1e-9)
+
+
+def test_neighbor_index_pickles_without_trees():
+    rng = np.random.default_rng(1)
+    index = NeighborIndex(rng.normal(size=(50, 3)))
+    index.impute(np.array([[np.nan, 0.0, 0.0]]), [0])
+    assert index._trees
+
+    restored = pickle.loads(pickle.dumps(index))
+    assert restored._trees == {}
+    np.testing.assert_array_equal(
+        restored.impute(np.array([[np.nan, 0.0, 0.0]]), [0]), index.impute(np.array([[np.nan, 0.0, 0.0]]), [0])
+    )
+
+
+def test_index_mode_pickle_without_neighbor_index_restores_one():
+    """Index-mode preprocessors pickled before NeighborIndex kept their training matrix in the imputer"""
+    rng = np.random.default_rng(2)
+    preprocessor = DisasterDataPreprocessor()
+    preprocessor.knn_imputer.fit(rng.normal(size=(20, 4)))
+    state = preprocessor.__dict__.copy()
+    del state['knn_index']
+
+    restored = DisasterDataPreprocessor.__new__(DisasterDataPreprocessor)
+    restored.__setstate__(state)
+    assert restored.knn_index is not None
+    np.testing.assert_array_equal(restored.knn_index.train, preprocessor.knn_imputer._fit_X)
+
+
+@pytest.fixture(scope='module')
+def fitted_preprocessor(book1_raw):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DisasterDataPreprocessor().fit(book1_raw)
+
+
+class LegacyIndex:
+    """
+    The fitted KNNImputer behind NeighborIndex's interface (index mode before the KD-trees)
+
+    Where the k-th and (k+1)-th nearest donors are at the same distance, or a donor is at
+    distance 0, KNNImputer's pick among the tied donors is arbitrary (argpartition order);
+    those cells take the index's answer so the comparison only covers well-defined neighbors.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.imputer = KNNImputer(n_neighbors=index.n_neighbors, weights='distance', keep_empty_features=True)
+        self.imputer.fit(index.train)
+        self.tied = 0
+
+    def impute(self, queries, columns):
+        result = self.imputer.transform(queries)[:, columns]
+        own = self.index.impute(queries, columns)
+        k = self.index.n_neighbors
+        for out_col, col in enumerate(columns):
+            rows = np.flatnonzero(np.isnan(queries[:, col]))
+            donors = ~np.isnan(self.index.train[:, col])
+            distances = np.sort(nan_euclidean_distances(queries[rows], self.index.train[donors]), axis=1)
+            tied = rows[np.isclose(distances[:, k - 1], distances[:, k]) | (distances[:, 0] < 1e-6)]
+            result[tied, out_col] = own[tied, out_col]
+            self.tied += len(tied)
+        return result
+
+
+def test_index_mode_imputes_like_the_fitted_knn_imputer(book1_raw, fitted_preprocessor):
+    """
+    Book1 imputations through the pipeline match KNNImputer over the training matrix to 1e-5
+    (relative; nan_euclidean's expanded formula loses a few digits), except on tied neighbors
+    """
+    legacy = copy.deepcopy(fitted_preprocessor)
+    legacy.knn_index = LegacyIndex(legacy.knn_index)
+    result = transform_quietly(copy.deepcopy(fitted_preprocessor), book1_raw)
+    expected = transform_quietly(legacy, book1_raw)
+
+    cols = fitted_preprocessor.knn_impact_cols
+    assert result.index.equals(expected.index)
+    np.testing.assert_allclose(result[cols].to_numpy(dtype='float64'), expected[cols].to_numpy(dtype='float64'), rtol=1e-5)
+    assert legacy.knn_index.tied < 0.3 * book1_raw[cols].isna().sum().sum()
+
+
+def test_streaming_drops_duplicates_across_chunks(tmp_path, fitted_preprocessor):
+    raw = pd.read_csv(BOOK1, low_memory=False).head(300)
+    path = tmp_path / 'feed.csv'
+    pd.concat([raw, raw.head(50)]).to_csv(path, index=False)  # last chunk repeats rows of the first
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        whole = preprocess_new_data(str(path), copy.deepcopy(fitted_preprocessor))
+        deduped = pd.concat(iter_preprocessed_chunks(str(path), copy.deepcopy(fitted_preprocessor), chunksize=100))
+        kept = pd.concat(iter_preprocessed_chunks(str(path), copy.deepcopy(fitted_preprocessor), chunksize=100, dedupe=False))
+
+    # Concatenated chunks hold object columns where each chunk had its own categories
+    def values(df):
+        return df.astype({col: object for col in df.select_dtypes('category').columns}).reset_index(drop=True)
+    pd.testing.assert_frame_equal(values(deduped), values(whole))
+    assert len(kept) > len(whole)
+
+
+def test_transform_parallel_matches_serial_transform(book1_raw, fitted_preprocessor):
+    """Partitions start from the serial counters; duplicates spanning partitions are dropped once"""
+    raw = book1_raw.drop(columns=[col for col in NEW_DATA_DROP_COLUMNS if col in book1_raw.columns]).iloc[2000:2400]
+    complete = raw[raw['Glide'].notna() & raw['Seq'].notna()]
+    df = pd.concat([raw, complete.head(15)], ignore_index=True)  # repeats of partition 1 in partition 3
+    # Missing Seq / GLIDE in every partition (numbered from the counters), some rows missing both
+    df.loc[[5, 9, 130, 131, 150, 260, 300], 'Seq'] = pd.NA
+    df.loc[[7, 9, 140, 150, 270, 310], 'Glide'] = np.nan
+
+    serial = copy.deepcopy(fitted_preprocessor)
+    parallel = copy.deepcopy(fitted_preprocessor)
+    expected = transform_quietly(serial, df)
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = transform_parallel(df, parallel, n_jobs=2, n_partitions=3)
+
+    assert len(result) < len(df)
+    pd.testing.assert_frame_equal(result, expected)
+    assert parallel.seq_counter == serial.seq_counter
+    assert parallel.sequence_counter == serial.sequence_counter
+
+
+@pytest.mark.parametrize('mode', ['training', 'production'])
+def test_transform_matches_golden_output(book1_raw, fitted_preprocessor, mode):
+    """Book1.csv transforms to exactly the stored output, without modifying the input frame"""
+    raw = book1_raw.drop(columns=[col for col in NEW_DATA_DROP_COLUMNS if col in book1_raw.columns])
+    before = raw.copy()
+    if mode == 'training':
+        result = transform_quietly(DisasterDataPreprocessor(), raw, is_training=True)
+    else:
+        result = transform_quietly(copy.deepcopy(fitted_preprocessor), raw)
+
+    path = GOLDEN_FIXTURE.format(mode=mode)
+    produced = result.to_csv(index_label='Row')
+    pd.testing.assert_frame_equal(pd.read_csv(io.StringIO(produced), index_col='Row'), pd.read_csv(path, index_col='Row'))
+    with gzip.open(path, 'rt', newline='') as f:
+        assert produced == f.read(), "same values, different CSV bytes"
+    pd.testing.assert_frame_equal(raw, before)
+
+
+@pytest.fixture(scope='module')
+def book1_processed(book1_raw):
+    """Book1.csv processed in training mode, without the columns the pipeline drops"""
+    raw = book1_raw.drop(columns=[col for col in NEW_DATA_DROP_COLUMNS if col in book1_raw.columns])
+    return transform_quietly(DisasterDataPreprocessor(), raw, is_training=True)
+
+
+def test_output_schema_dtypes_and_footprint(book1_processed):
+    assert output_schema_mismatches(book1_processed) == []
+    assert book1_processed.memory_usage(deep=True).sum() / len(book1_processed) <= MAX_BYTES_PER_ROW
+
+
+def test_apply_output_schema_restores_dtypes_after_csv_round_trip(book1_processed, tmp_path):
+    book1_processed.to_csv(tmp_path / 'processed.csv', index=False)
+
+    restored = apply_output_schema(pd.read_csv(tmp_path / 'processed.csv', low_memory=False))
+    assert output_schema_mismatches(restored) == []
+    assert restored.memory_usage(deep=True).sum() / len(restored) <= MAX_BYTES_PER_ROW
+
+
+def test_parse_glide_series_matches_parse_glide():
+    codes = pd.Series([
+        'FL-2004-000123-BGD', 'EQ-1999-12-TUR', ' TC-2013-000139-PHL ', 'DR-2011-000090',  # full, short, padded, partial
+        'fl-2004-000123-BGD', 'FL-04-000123-BGD', 'FL-2004-000123-BG', 'FL-2004', '', np.nan, None,
+    ], index=range(10, 21))
+
+    parsed = parse_glide_series(codes)
+
+    assert parsed.index.equals(codes.index)
+    assert parsed.dtypes.astype(str).to_dict() == {
+        'type_code': 'category', 'year': 'Int64', 'sequence': 'Int64', 'country_code': 'category'
+    }
+    for label, code in codes.items():
+        expected = parse_glide(code)
+        row = parsed.loc[label]
+        assert {key: None if pd.isna(value) else value for key, value in row.items()} == expected, code
+
+
+def test_construct_glide_series_matches_construct_glide():
+    rows = pd.DataFrame({
+        'Disaster Type': ['Flood', 'Drought', 'Meteor', 'Storm', 'Flood'],  # 'Meteor' has no GLIDE type
+        'Year': [2004, 1999, 2004, 2010, 2021],
+        'Seq': [123, 7, 1, 1234567, 2],
+        'Country': ['Algeria', 'Angola', 'Algeria', 'Atlantis', 'Albania'],  # no ISO code for 'Atlantis'
+    }, index=[3, 1, 4, 1, 5])
+
+    result = construct_glide_series(rows['Disaster Type'], rows['Year'], rows['Seq'], rows['Country'])
+
+    expected = [construct_glide(*row) for row in rows[['Disaster Type', 'Year', 'Seq', 'Country']].itertuples(index=False)]
+    assert [None if pd.isna(glide) else glide for glide in result] == expected
+    assert expected[0] == 'FL-2004-000123-DZA' and expected[2] is None and expected[3] is None
+
+
+def test_constructed_glides_take_consecutive_sequences_per_year():
+    """Each year continues from the stored maximum, in row order, and the maximum advances"""
+    preprocessor = DisasterDataPreprocessor()
+    preprocessor.sequence_counter = {2004: 41}
+    df = pd.DataFrame({
+        'Glide': ['FL-2004-000007-DZA', np.nan, np.nan, np.nan, np.nan, np.nan],
+        'Disaster Type': ['Flood', 'Flood', 'Storm', 'Drought', 'Flood', 'Flood'],
+        'Year': [2004, 2004, 1999, 2004, np.nan, 1999],  # the row without a year is left alone
+        'Country': ['Algeria', 'Algeria', 'Angola', 'Albania', 'Algeria', 'Angola'],
+    })
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = preprocessor._construct_missing_glide(df.copy())
+
+    assert result['Glide'].tolist()[:4] + result['Glide'].tolist()[5:] == [
+        'FL-2004-000007-DZA', 'FL-2004-000042-DZA', 'ST-1999-000001-AGO', 'DR-2004-000043-ALB', 'FL-1999-000002-AGO'
+    ]
+    assert pd.isna(result['Glide'].iloc[4])
+    assert preprocessor.sequence_counter == {2004: 43, 1999: 2}
+
+
+def test_country_reference_matches_the_lookup_dictionaries():
+    countries = pd.Series(['Burkina Faso', 'Cape Verde', 'Atlantis', np.nan, 'Burkina Faso', 'Ghana'], index=range(6, 0, -1))
+
+    reference = lookup_country_reference(countries)
+
+    assert reference.index.equals(countries.index)
+    expected = pd.DataFrame({
+        'Continent': [COUNTRY_TO_CONTINENT.get(country) for country in countries],
+        'Region': [COUNTRY_TO_REGION.get(country) for country in countries],
+    }, index=countries.index)
+    pd.testing.assert_frame_equal(reference[['Continent', 'Region']].fillna(np.nan), expected.fillna(np.nan), check_names=False)
+    assert reference.loc[6, ['Latitude', 'Longitude']].tolist() == [12.2383, -1.5616]  # '12.2383 N', '1.5616 W'
+    assert reference.loc[[5, 4, 3], ['Latitude', 'Longitude']].isna().all().all()  # no centroid / unknown / missing
+
+
+def test_impute_geographic_fills_only_missing_values():
+    df = pd.DataFrame({
+        'Country': ['Ghana', 'Ghana', 'Atlantis', np.nan],
+        'Continent': [np.nan, 'Elsewhere', np.nan, np.nan],
+        'Latitude': [np.nan, '5.6 N', np.nan, np.nan],
+        'Longitude': [np.nan, '0.2 W', '10 E', np.nan],
+    })
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = DisasterDataPreprocessor()._impute_geographic(df.copy())
+
+    ghana = COUNTRY_CENTROIDS['Ghana']
+    assert result['Continent'].tolist()[:2] == [COUNTRY_TO_CONTINENT['Ghana'], 'Elsewhere']
+    assert result['Region'].tolist()[0] == COUNTRY_TO_REGION['Ghana']
+    assert result['Latitude'].tolist()[:2] == [float(ghana[0].split()[0]), 5.6]
+    assert result['Longitude'].tolist()[:3] == [-float(ghana[1].split()[0]), -0.2, 10.0]
+    assert result.loc[[2, 3], ['Continent', 'Region', 'Latitude']].isna().all().all()
+
+
+def test_impute_temporal_rolls_end_dates_over_into_later_years():
+    df = pd.DataFrame({
+        'Disaster Type': ['Drought', 'Epidemic', 'Flood', 'Storm', 'Wildfire'],
+        'Start Year': [1990, 2019, 2000, 2010, 2015],
+        'Start Month': [10.0, 3.0, 12.0, np.nan, 11.0],
+        'Start Day': [5.0, 31.0, 25.0, 2.0, np.nan],
+        'End Year': [np.nan, np.nan, np.nan, np.nan, 2016.0],
+        'End Month': [np.nan, np.nan, np.nan, 7.0, np.nan],
+        'End Day': [np.nan, np.nan, np.nan, np.nan, np.nan],
+    })
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = DisasterDataPreprocessor()._impute_temporal(df.copy())
+
+    # Whole months of the type's duration: 730 days = 24 months, 365 = 12, 10 = 0, 60 = 2
+    assert result['End Year'].tolist() == [1992, 2020, 2000, 2010, 2016]
+    assert result['End Month'].tolist() == [10, 3, 12, 7, 1]
+    # Calendar end dates kept inside the end month: 1990-10-05 + 730 days = 1992-10-04 (1992 is a leap year),
+    # 2019-03-31 + 365 days = 2020-03-30, 2000-12-25 + 10 days is past December (day 31),
+    # a July 2 start (month defaulted) + 3 days, a November 15 start (day defaulted) + 60 days = 2016-01-14
+    assert result['End Day'].tolist() == [4, 30, 31, 5, 14]
+    assert result.loc[3, ['Start Month', 'Start Day']].tolist() == [7, 2]
+
+
+def test_map_unique_matches_a_direct_map():
+    rng = np.random.default_rng(7)
+    index = pd.Index(rng.permutation(300) * 3)
+    types = pd.Series(rng.choice(['Flood', 'Storm', 'Drought', None], 300), index=index, name='Disaster Type')
+    countries = pd.Series(rng.choice(['Chad', 'Mali', np.nan], 300).astype(object), index=index)
+    years = pd.Series(rng.choice([1999.0, 2004.0, np.nan], 300), index=index)
+    months = pd.Series(rng.choice([1.0, 4.0, 7.0, 12.0, np.nan], 300), index=index)
+
+    pd.testing.assert_series_equal(map_unique(get_season, months), months.map(get_season))
+    glide_types = {'Flood': 'FL', 'Storm': 'ST'}
+    pd.testing.assert_series_equal(map_unique(glide_types, types), types.map(glide_types), check_dtype=False)
+    expected = pd.Series([event_name(*row) for row in zip(types, countries, years)], index=index)
+    pd.testing.assert_series_equal(map_unique(event_name, types, countries, years), expected)
+
+
+def test_factorize_rows_codes_value_combinations():
+    a = pd.Series(['x', 'y', None, 'x', np.nan, 'y', 'x'])
+    b = pd.Series([1.0, 1.0, 2.0, 1.0, 2.0, np.nan, 2.0])
+
+    codes, (a_values, b_values) = factorize_rows(a, b)
+
+    # One code per distinct (a, b) pair, None and NaN being the same missing value
+    pairs = [(None if pd.isna(x) else x, None if pd.isna(y) else y) for x, y in zip(a, b)]
+    assert len(set(codes)) == len(set(pairs)) == 5
+    for code, pair in zip(codes, pairs):
+        value = (a_values[code], b_values[code])
+        assert (None if pd.isna(value[0]) else value[0], None if pd.isna(value[1]) else value[1]) == pair
+
+
+def test_phase_profiler_reports_every_phase_of_each_transform(book1_raw, fitted_preprocessor, tmp_path):
+    raw = book1_raw.head(200)
+    profiler = PhaseProfiler()
+    transform_quietly(copy.deepcopy(fitted_preprocessor), raw, profiler=profiler)
+    result = transform_quietly(copy.deepcopy(fitted_preprocessor), raw, profiler=profiler)
+
+    report = profiler.to_frame()
+    assert report['phase'].tolist() == [
+        'parse_glide_codes', 'impute_from_glide', 'construct_missing_glide', 'impute_geographic',
+        'create_quality_flags', 'impute_temporal', 'impute_categorical_and_binary', 'impute_impact_metrics',
+        'engineer_features', 'final_cleaning',
+    ]  # production mode skips the row drops
+    assert (report['calls'] == 2).all()
+    assert report['rows_in'].iloc[0] == 2 * len(raw) and report['rows_out'].iloc[-1] == 2 * len(result)
+    assert (report[['wall_s', 'cpu_s']] >= 0).all().all()
+    assert report['wall_pct'].sum() == pytest.approx(100)
+
+    path = tmp_path / 'phases.json'
+    saved = json.loads(profiler.to_json(str(path)))
+    assert saved == json.loads(path.read_text())
+    assert [phase['phase'] for phase in saved['phases']] == report['phase'].tolist()
+    assert saved['total']['wall_s'] == pytest.approx(report['wall_s'].sum())
+
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        profiler.print_report()
+    assert all(phase in out.getvalue() for phase in report['phase']) and 'TOTAL' in out.getvalue()
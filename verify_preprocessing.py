@@ -4,16 +4,24 @@ Verification Script for Preprocessed Data
 Checks data quality, missing values, and feature summary
 """
 
+import sys
+import warnings
 import pandas as pd
 import numpy as np
+from preprocessing_pipeline import OUTPUT_SCHEMA, MAX_BYTES_PER_ROW, apply_output_schema, output_schema_mismatches
+from ingestion import QuarantineWarning, read_raw_csv
+from data_cache import read_csv_cached
+
+# Checks that fail the verification (non-zero exit status)
+failures = []
 
 print("=" * 80)
 print("PREPROCESSING VERIFICATION REPORT")
 print("=" * 80)
 
-# Load processed data
-train = pd.read_csv('train_processed.csv')
-test = pd.read_csv('test_processed.csv')
+# Load processed data (CSV loses dtypes, so the columnar cache keeps the output schema)
+train = read_csv_cached('train_processed.csv', postprocess=apply_output_schema)
+test = read_csv_cached('test_processed.csv', postprocess=apply_output_schema)
 
 # Basic Info
 print("\n📊 DATASET SHAPES:")
@@ -50,10 +58,26 @@ else:
 # Data Types Summary
 print("\n📋 FEATURE TYPES:")
 numerical_cols = train.select_dtypes(include=[np.number]).columns.tolist()
-categorical_cols = train.select_dtypes(include=['object']).columns.tolist()
+categorical_cols = train.select_dtypes(include=['object', 'category']).columns.tolist()
 print(f"   Numerical:   {len(numerical_cols)} features")
 print(f"   Categorical: {len(categorical_cols)} features")
 
+# Output Schema & Memory Footprint
+print("\n🧮 OUTPUT SCHEMA & MEMORY:")
+schema_mismatches = output_schema_mismatches(train)
+bytes_per_row = train.memory_usage(deep=True).sum() / len(train)
+print(f"   Schema columns:  {sum(col in train.columns for col in OUTPUT_SCHEMA)}/{len(OUTPUT_SCHEMA)} present")
+print(f"   Memory:          {train.memory_usage(deep=True).sum() / 1024**2:.2f} MB ({bytes_per_row:,.0f} bytes/row)")
+
+if schema_mismatches:
+    print(f"   ❌ FAILED: dtypes differ from schema: {', '.join(schema_mismatches)}")
+    failures.append("output schema")
+if bytes_per_row > MAX_BYTES_PER_ROW:
+    print(f"   ❌ FAILED: memory footprint regressed above {MAX_BYTES_PER_ROW} bytes/row")
+    failures.append("memory footprint")
+if not schema_mismatches and bytes_per_row <= MAX_BYTES_PER_ROW:
+    print("   ✅ Compact schema enforced, footprint within budget")
+
 # Impact Metrics Summary
 print("\n💥 IMPACT METRICS SUMMARY:")
 impact_cols = ['Total Deaths', 'No Injured', 'No Affected', 'No Homeless', "Total Damages ('000 US$)"]
@@ -90,7 +114,7 @@ if 'Severity_Category' in train.columns:
 print("\n🚩 DATA QUALITY FLAGS:")
 flag_cols = [col for col in train.columns if '_Known' in col or '_Precise' in col or '_Complete' in col]
 for col in flag_cols:
-    true_count = train[col].sum() if train[col].dtype in ['bool', 'int64', 'float64'] else 0
+    true_count = int(train[col].sum()) if pd.api.types.is_numeric_dtype(train[col]) else 0
     pct = true_count / len(train) * 100
     print(f"   {col}: {true_count:,}/{len(train):,} ({pct:.1f}%) are original/complete")
 
@@ -115,6 +139,18 @@ for disaster, count in top_disasters.items():
     pct = count / len(train) * 100
     print(f"      • {disaster}: {count} ({pct:.1f}%)")
 
+# Raw Ingestion (rows dropped by the column contract never reach the outputs)
+print("\n📥 RAW INGESTION:")
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore', QuarantineWarning)
+    raw = read_raw_csv('Book1.csv', on_error='quarantine')
+n_quarantined = len(pd.read_csv('Book1.csv', usecols=[0])) - len(raw)
+print(f"   Rows read:        {len(raw):,}")
+print(f"   Rows quarantined: {n_quarantined:,}")
+if n_quarantined:
+    print(f"   ❌ FAILED: {n_quarantined:,} rows break the column contract")
+    failures.append("quarantined rows")
+
 print("\n" + "=" * 80)
 print("VERIFICATION COMPLETE!")
 print("=" * 80)
@@ -128,9 +164,12 @@ print(f"   ✓ {int(train['Year'].min())}-{int(test['Year'].max())} temporal cov
 print(f"   ✓ {train['Country'].nunique()} countries represented")
 print(f"   ✓ {train['Disaster Type'].nunique()} disaster types")
 
-if total_missing == 0:
+if failures:
+    print(f"\n   ❌ VERIFICATION FAILED: {', '.join(failures)}")
+elif total_missing == 0:
     print("\n   🎉 READY FOR MODEL TRAINING! 🎉")
 else:
     print(f"\n   ⚠️  {total_missing} missing values need attention")
 
 print("=" * 80)
+sys.exit(1 if failures else 0)